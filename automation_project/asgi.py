@@ -3,14 +3,25 @@ ASGI config for automation_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Served with an ASGI server (docker compose runs
+``uvicorn automation_project.asgi:application``), the live metrics stream
+(/api/metrics/stream/) holds one idle connection per dashboard; with
+DEBUG on, static files are served here too, as runserver does. Database
+connections are not kept between requests here (SERVER_INTERFACE).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'automation_project.settings')
+os.environ.setdefault('SERVER_INTERFACE', 'asgi')  # no persistent DB connections (settings.py)
 
 application = get_asgi_application()
+if settings.DEBUG:
+    application = ASGIStaticFilesHandler(application)
@@ -17,6 +17,35 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 DUMMY_DATA_DIR = BASE_DIR / "dummy_data"
 
+# Scan pipeline: parser processes (1 = parse inline), files per committed chunk,
+# and streaming mode (lazy walk + per-chunk manifest lookups for huge drops)
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "1"))
+SCAN_BATCH_SIZE = int(os.getenv("SCAN_BATCH_SIZE", "500"))
+SCAN_STREAM = os.getenv("SCAN_STREAM", "0") == "1"
+
+# /scan/ runs the pipeline as a background job; a running job that stops
+# reporting progress for this long is considered dead
+SCAN_JOBS_IN_BACKGROUND = True
+SCAN_JOB_STALE_SECONDS = 15 * 60
+# ...so the job also reports in every this many files while they are diffed/hashed
+SCAN_HEARTBEAT_FILES = int(os.getenv("SCAN_HEARTBEAT_FILES", "200"))
+
+# Rows per dashboard / items API page (?limit= asks for another size, up to the max)
+DASHBOARD_PAGE_SIZE = int(os.getenv("DASHBOARD_PAGE_SIZE", "50"))
+DASHBOARD_MAX_PAGE_SIZE = 500
+
+# Live metrics stream (dashboard/metrics_stream.py): how often each process reads the
+# data version, min seconds between two events to a client, heartbeat and lifetime of
+# a connection, and how long browsers wait before reconnecting
+METRICS_STREAM_POLL_SECONDS = 1.0
+METRICS_STREAM_MIN_INTERVAL = 2.0
+METRICS_STREAM_HEARTBEAT_SECONDS = 15
+METRICS_STREAM_MAX_SECONDS = 600
+METRICS_STREAM_RETRY_MS = 10_000
+
+# Newest approved emails used to train the offline email classifier
+LOCAL_CLASSIFIER_TRAINING_LIMIT = 2000
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
@@ -106,13 +135,72 @@ WSGI_APPLICATION = 'automation_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite profile (SQLITE_PROFILE env var):
+# - "production" (default): WAL journal, so reviewers keep reading and saving
+#   while a scan commits; writers wait for the lock (busy timeout) instead of
+#   failing with "database is locked", and take it when the transaction
+#   starts (BEGIN IMMEDIATE: a read that later upgrades to a write can't be
+#   refused mid-transaction); under WSGI, connections are reused across requests.
+# - "default": Django's stock SQLite settings (rollback journal, 5 s timeout,
+#   a new connection per request).
+# Persistent connections need a WSGI server's fixed worker threads: under ASGI
+# (asgi.py sets SERVER_INTERFACE=asgi) each request runs in a new thread whose
+# connection would never be reused or closed, so they close per request there.
+SERVER_INTERFACE = os.getenv("SERVER_INTERFACE", "wsgi")
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+SQLITE_PROFILES = {
+    "default": {},
+    "production": {
+        "OPTIONS": {
+            "timeout": 20,  # seconds to wait for a lock (busy_timeout)
+            "transaction_mode": "IMMEDIATE",
+            "init_command": (
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"  # fsync at checkpoints only, still crash-safe with WAL
+                "PRAGMA cache_size=-20000;"   # 20 MB page cache per connection
+                "PRAGMA temp_store=MEMORY"
+            ),
+        },
+        "CONN_MAX_AGE": 600 if SERVER_INTERFACE == "wsgi" else 0,
+        "CONN_HEALTH_CHECKS": True,
+    },
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        **SQLITE_PROFILES[SQLITE_PROFILE],
     }
 }
 
+# /api/metrics/storage/ scans the whole database; its result is reused until items
+# change, and for at most this long
+STORAGE_STATS_CACHE_SECONDS = 300
+
+# Rendered dashboard / detail pages (dashboard/page_cache.py), keyed by the items
+# data version. In-process memory by default; PAGE_CACHE_DIR shares them between
+# processes (uvicorn / gunicorn workers) through files. PAGE_CACHE_SECONDS=0 turns
+# the cache off.
+PAGE_CACHE_SECONDS = int(os.getenv("PAGE_CACHE_SECONDS", "300"))
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", "")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "pages": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "pages",
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    },
+}
+if PAGE_CACHE_DIR:
+    CACHES["pages"] = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": PAGE_CACHE_DIR,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,53 @@
+"""
+Benchmarks, run as `python -m benchmarks.<name>` (see each script's docstring).
+
+The database benchmarks set Django up on a throwaway database with
+temp_database() and fill it with seed_items().
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+BATCH_SIZE = 5000
+
+
+@contextmanager
+def temp_database(**overrides):
+    """
+    Set Django up on a fresh, migrated SQLite database in a temporary
+    directory (yielded), removed on exit. `overrides` are settings applied
+    before django.setup().
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "automation_project.settings")
+    from django.conf import settings
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.DATABASES["default"]["NAME"] = os.path.join(tmp, "bench.sqlite3")
+        for name, value in overrides.items():
+            setattr(settings, name, value)
+
+        import django
+        django.setup()
+        from django.core.management import call_command
+
+        call_command("migrate", verbosity=0)
+        yield tmp
+
+
+def seed_items(count, fields, raw=None, start=0):
+    """
+    Insert ExtractedItem(**fields(n)) for n in range(start, count),
+    BATCH_SIZE rows per bulk_create and transaction. `raw(n)`, if given,
+    is the content of each item's raw document, written with it.
+    """
+    from django.db import transaction
+    from core.models import ExtractedItem, RawDocument
+
+    for offset in range(start, count, BATCH_SIZE):
+        numbers = range(offset, min(offset + BATCH_SIZE, count))
+        with transaction.atomic():
+            items = ExtractedItem.objects.bulk_create([ExtractedItem(**fields(n)) for n in numbers])
+            if raw is not None:
+                RawDocument.objects.bulk_create(
+                    [RawDocument(item=item, content=raw(n)) for n, item in zip(numbers, items)]
+                )
@@ -0,0 +1,54 @@
+"""
+Cold-start benchmark: wall time of fresh processes that load the Django
+project, and whether they imported the Gemini SDK.
+
+    python -m benchmarks.bench_cold_start [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "manage.py check": [sys.executable, "manage.py", "check"],
+    "import dashboard.views": [
+        sys.executable, "-c",
+        "import os, sys, django;"
+        "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'automation_project.settings');"
+        "django.setup();"
+        "import dashboard.views;"
+        "print('google.generativeai loaded:', 'google.generativeai' in sys.modules)",
+    ],
+    "pytest tests/test_views_dashboard.py": [
+        sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "tests/test_views_dashboard.py",
+    ],
+}
+
+
+def timed(command):
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise SystemExit(f"{' '.join(command)} failed:\n{result.stdout}{result.stderr}")
+    return elapsed, result.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, command in COMMANDS.items():
+        runs = [timed(command) for _ in range(args.repeat)]
+        median = statistics.median(seconds for seconds, _ in runs)
+        note = next((line for line in runs[0][1].splitlines() if "loaded:" in line), "")
+        print(f"{label:<36} {median * 1000:8.0f} ms  {note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Dashboard pages benchmark: render time of the first, a deep and a status-filtered dashboard page as the table grows.
+
+Grows one throwaway SQLite database through `--sizes` item counts and
+at each size times the dashboard view (query and template render) for:
+
+- "first": the newest page over all items
+- "deep": the page after a cursor 90% of the way down
+- "pending": the first page of one status
+- "all rows": loading every list row, as the view did before pagination
+
+    python -m benchmarks.bench_dashboard_pages [--sizes 100 10000 100000] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import seed_items, temp_database
+
+
+def timed(run, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with temp_database():
+        from django.conf import settings
+        from django.test import RequestFactory
+        from django.utils import timezone
+        from core.models import ExtractedItem
+        from core.utils.keyset import encode_cursor
+        from dashboard.views import LIST_FIELDS, dashboard
+
+        statuses = ("pending", "approved", "rejected", "error")
+        now = timezone.now()
+        factory = RequestFactory()
+        count = 0
+        print(f"page size {settings.DASHBOARD_PAGE_SIZE}")
+        for size in sorted(args.sizes):
+            seed_items(size, lambda n: dict(
+                source_type="invoice", source_file=f"invoice_{n}.html", status=statuses[n % 4],
+                created_at=now - timezone.timedelta(seconds=n),
+                data={"invoice number": f"TF-{n}", "customer name": f"Customer {n % 500}", "total": "€1,054.00"},
+            ), start=count)
+            count = max(count, size)
+
+            created_at, pk = ExtractedItem.objects.order_by("-created_at", "-id").values_list("created_at", "id")[size * 9 // 10]
+            requests = {
+                "first": factory.get("/", {"status": "all"}),
+                "deep": factory.get("/", {"status": "all", "after": encode_cursor([created_at, pk])}),
+                "pending": factory.get("/", {"status": "pending"}),
+            }
+            cells = [f"{label} {timed(lambda: dashboard(request), args.repeat) * 1000:6.1f} ms" for label, request in requests.items()]
+            all_rows = timed(lambda: list(ExtractedItem.objects.only(*LIST_FIELDS).order_by("-created_at")), 1)
+            print(f"{size:>9} items   " + "   ".join(cells) + f"   all rows {all_rows * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
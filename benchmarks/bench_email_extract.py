@@ -0,0 +1,99 @@
+"""
+Microbenchmark: email field extraction on large multipart messages.
+
+Compares the previous parse_email extraction (up to eight re.search
+passes plus a findall over the raw text, patterns looked up on every
+call) with the single-pass extractor in parsers.email_extract.
+
+    python -m benchmarks.bench_email_extract [--attachment-kb 2048] [--repeat 20]
+"""
+import argparse
+import os
+import re
+import timeit
+from email.message import EmailMessage
+
+from parsers.email_extract import decode_email, extract_contact
+
+
+def legacy_extract(raw):
+    """
+    Field extraction as parse_email did it before the single-pass extractor.
+    """
+    def safe_search(pattern, text):
+        m = re.search(pattern, text, re.IGNORECASE)
+        return m.group(1).strip() if m else None
+
+    data = {}
+    name = safe_search(r"(?:Name|Όνομα):\s*(.*)", raw)
+    email = safe_search(r"(?:Email):\s*(.*)", raw)
+    phone = safe_search(r"(?:Phone|Κινητό|Τηλέφωνο):\s*(.*)", raw)
+    if not name:
+        name = safe_search(r"[-•]\s*(?:Όνομα|Name):\s*(.*)", raw)
+    if not email:
+        email = safe_search(r"[-•]\s*(?:Email):\s*(.*)", raw)
+    if not phone:
+        phone = safe_search(r"[-•]\s*(?:Κινητό|Phone|Τηλέφωνο):\s*(.*)", raw)
+    if name:
+        data["name"] = name
+    if email:
+        data["email"] = email
+    if phone:
+        data["phone"] = phone
+    if not email:
+        matches = re.findall(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", raw)
+        if matches:
+            personal = [e for e in matches if not e.startswith(("info@", "contact@", "support@"))]
+            data["email"] = (personal or matches)[0]
+    if not phone:
+        match = re.search(
+            r"(?:\+30\s?)?(?:69\d{2}[-\s]?\d{3}[-\s]?\d{3}|2[1-8]\d{2}[-\s]?\d{3}[-\s]?\d{3})", raw
+        )
+        if match:
+            data["phone"] = match.group(0).strip()
+    return data
+
+
+def build_message(attachment_kb):
+    """
+    A realistic inquiry: short Greek body without labels (so every
+    fallback runs), an HTML alternative and two binary attachments.
+    """
+    message = EmailMessage()
+    message["From"] = "Ελένη Παπαδοπούλου <eleni@example.gr>"
+    message["To"] = "info@techflow-solutions.gr"
+    message["Subject"] = "Προσφορά για νέο e-shop"
+    body = "Καλημέρα σας,\n\nθα θέλαμε μια προσφορά για νέο e-shop.\n" * 20
+    message.set_content(body + "\nΕλένη, 6944-123456\n")
+    message.add_alternative(f"<p>{body}</p>", subtype="html")
+    for name in ("brief.pdf", "mockups.zip"):
+        message.add_attachment(
+            os.urandom(attachment_kb * 512), maintype="application", subtype="octet-stream", filename=name,
+        )
+    return message.as_string()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--attachment-kb", type=int, default=2048, help="total attachment size")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    raw = build_message(args.attachment_kb)
+    print(f"message: {len(raw) / 1024:.0f} KiB, {raw.count(chr(10))} lines")
+
+    legacy = legacy_extract(raw)
+    current = extract_contact(decode_email(raw))
+    print(f"legacy:      {legacy}")
+    print(f"single-pass: {current}")
+
+    for label, func in (
+        ("legacy", lambda: legacy_extract(raw)),
+        ("single-pass", lambda: extract_contact(decode_email(raw))),
+    ):
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"{label:<12} {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
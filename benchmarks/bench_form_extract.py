@@ -0,0 +1,63 @@
+"""
+Benchmark: contact-form extraction throughput (forms/second) on the
+dummy_data/forms corpus, BeautifulSoup tree + eight find() calls vs. the
+single-pass html.parser collector in parsers.forms_parser.
+
+    python -m benchmarks.bench_form_extract [--seconds 2]
+"""
+import argparse
+import pathlib
+import time
+
+from bs4 import BeautifulSoup
+
+from parsers.forms_parser import FIELDS, parse_form
+
+FORMS_DIR = pathlib.Path(__file__).resolve().parent.parent / "dummy_data" / "forms"
+
+
+def bs4_parse_form(raw_html):
+    """
+    parse_form as it was before the single-pass collector.
+    """
+    soup = BeautifulSoup(raw_html, "html.parser")
+
+    def get_input(name):
+        tag = soup.find(["input", "textarea", "select"], attrs={"name": name})
+        if tag is None:
+            return ""
+        if tag.name == "select":
+            option = tag.find("option", selected=True)
+            return option.get_text(strip=True) if option else ""
+        return tag.get("value", "").strip() if tag.name == "input" else tag.get_text(strip=True)
+
+    return {key: get_input(name) for key, name in FIELDS.items()}
+
+
+def throughput(func, documents, seconds):
+    parsed = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for document in documents:
+            func(document)
+        parsed += len(documents)
+    return parsed / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0, help="run time per implementation")
+    args = parser.parse_args()
+
+    documents = [path.read_text(encoding="utf-8") for path in sorted(FORMS_DIR.glob("*.html"))]
+    mismatches = sum(parse_form(document) != bs4_parse_form(document) for document in documents)
+    print(f"{len(documents)} forms, {mismatches} output mismatches")
+
+    baseline = throughput(bs4_parse_form, documents, args.seconds)
+    current = throughput(parse_form, documents, args.seconds)
+    print(f"beautifulsoup  {baseline:10.0f} forms/s")
+    print(f"single-pass    {current:10.0f} forms/s  ({current / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: invoice extraction throughput (invoices/second) on the
+dummy_data/invoices corpus.
+
+- beautifulsoup: the previous parse_invoice (soup.get_text + eight regexes)
+- generic:       tokenizer + full-text regexes (layout cache cleared each call)
+- planned:       tokenizer + cached per-layout extraction plan
+
+    python -m benchmarks.bench_invoice_extract [--seconds 2]
+"""
+import argparse
+import pathlib
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+from parsers.invoice_parser import layout_plans, parse_invoice
+
+INVOICES_DIR = pathlib.Path(__file__).resolve().parent.parent / "dummy_data" / "invoices"
+
+
+def bs4_parse_invoice(raw_html):
+    """
+    parse_invoice as it was before layout plans.
+    """
+    text = BeautifulSoup(raw_html, "html.parser").get_text("\n", strip=True)
+
+    def find(pattern):
+        m = re.search(pattern, text, re.MULTILINE | re.UNICODE)
+        return m.group(1).strip() if m else ""
+
+    data = {
+        "invoice number": find(r"Αριθμός:\s*([A-Za-z0-9\-\/]+)"),
+        "date": find(r"Ημερομηνία:\s*([0-9]{2}\/[0-9]{2}\/[0-9]{4})"),
+        "customer name": find(r"Πελάτης:\s*\n(.*)"),
+        "net total": find(r"Καθαρή Αξία:\s*(€[\d\.,]+)"),
+        "vat amount": find(r"ΦΠΑ\s*24%:\s*(€[\d\.,]+)"),
+        "total": find(r"ΣΥΝΟΛΟ:\s*(€[\d\.,]+)"),
+    }
+    notes = find(r"Σημειώσεις:\s*(.*)")
+    delivery = find(r"Παράδοση:\s*(.*)")
+    if notes:
+        data["notes"] = notes
+    if delivery:
+        data["delivery"] = delivery
+    return data
+
+
+def generic_parse_invoice(raw_html):
+    layout_plans.clear()
+    return parse_invoice(raw_html)
+
+
+def throughput(func, documents, seconds):
+    parsed = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for document in documents:
+            func(document)
+        parsed += len(documents)
+    return parsed / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=2.0, help="run time per implementation")
+    args = parser.parse_args()
+
+    documents = [path.read_text(encoding="utf-8") for path in sorted(INVOICES_DIR.glob("*.html"))]
+    layout_plans.clear()
+    mismatches = sum(parse_invoice(document) != bs4_parse_invoice(document) for document in documents)
+    print(f"{len(documents)} invoices, {layout_plans.stats()['layouts']} layouts, {mismatches} output mismatches")
+
+    baseline = throughput(bs4_parse_invoice, documents, args.seconds)
+    for label, func in (
+        ("beautifulsoup", bs4_parse_invoice),
+        ("generic", generic_parse_invoice),
+        ("planned", parse_invoice),
+    ):
+        rate = baseline if func is bs4_parse_invoice else throughput(func, documents, args.seconds)
+        print(f"{label:<14} {rate:10.0f} invoices/s  ({rate / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
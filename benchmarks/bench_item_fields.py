@@ -0,0 +1,79 @@
+"""
+Typed fields benchmark: "invoices over €5,000 from January" and "top 50 by total", JSON data vs. the ItemFields projection.
+
+Builds a throwaway SQLite database with `--items` invoices dated over
+2024. "json" reads every item's data and filters / sorts in Python (the
+only way with amounts stored as "€1,054.00" strings), "typed" runs
+core.utils.item_fields.filter_items() on the indexed projection.
+
+    python -m benchmarks.bench_item_fields [--items 100000] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+from datetime import date
+
+from benchmarks import seed_items, temp_database
+
+
+def timed(run, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with temp_database():
+        from core.models import ExtractedItem, ItemFields
+        from core.utils.item_fields import filter_items, parse_date
+        from parsers.invoice_parser import parse_amount
+
+        start = time.perf_counter()
+        seed_items(args.items, lambda n: dict(source_type="invoice", source_file=f"invoice_{n}.html", data={
+            "invoice number": f"TF-{n:06d}",
+            "date": f"{n % 28 + 1:02d}/{n % 12 + 1:02d}/2024",
+            "customer name": f"Customer {n % 500}",
+            "total": f"€{(n * 7919) % 10_000:,}.00",
+        }))
+        print(f"{args.items} items, written and projected in {time.perf_counter() - start:.1f} s")
+
+        def json_january():
+            found = []
+            for pk, data in ExtractedItem.objects.values_list("id", "data").iterator(chunk_size=2000):
+                total, day = parse_amount(data.get("total")), parse_date(data.get("date"))
+                if total is not None and total >= 5000 and day and date(2024, 1, 1) <= day <= date(2024, 1, 31):
+                    found.append(pk)
+            return found
+
+        def json_top():
+            rows = ExtractedItem.objects.values_list("id", "data").iterator(chunk_size=2000)
+            totals = [(parse_amount(data.get("total")), pk) for pk, data in rows]
+            return sorted((pair for pair in totals if pair[0] is not None), reverse=True)[:50]
+
+        def typed(params):
+            items, _ = filter_items(ExtractedItem.objects.only("id"), params)
+            return list(items.values_list("id", flat=True)[:50] if "sort" in params else items.values_list("id", flat=True))
+
+        january = {"min_total": "5000", "date_from": "2024-01-01", "date_to": "2024-01-31"}
+        top = {"sort": "-total"}
+        assert sorted(json_january()) == sorted(typed(january))
+        typed_totals = ItemFields.objects.in_bulk(typed(top))
+        assert [total for total, _ in json_top()] == [typed_totals[pk].total for pk in typed(top)]
+
+        for name, before, after in (
+            ("over 5000 in January", json_january, lambda: typed(january)),
+            ("top 50 by total", json_top, lambda: typed(top)),
+        ):
+            print(f"{name:<21} json {timed(before, args.repeat) * 1000:8.1f} ms   typed {timed(after, args.repeat) * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
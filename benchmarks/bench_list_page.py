@@ -0,0 +1,81 @@
+"""
+List-page benchmark: latency and peak memory of the dashboard at 100k items, with and without raw documents in the row.
+
+Builds a throwaway SQLite database with `--items` items (each with a
+`--raw-size` character raw document), then times:
+
+- "rows + raw": the items loaded together with their raw content, as the
+  list did when raw_content was a column of ExtractedItem
+- "list rows": the queryset the dashboard uses now
+- "dashboard view": the full view, query and template render
+
+    python -m benchmarks.bench_list_page [--items 100000] [--raw-size 4000] [--repeat 1]
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from benchmarks import seed_items, temp_database
+
+
+def measure(run, repeat):
+    """
+    Median wall time (seconds) of run() and its peak traced memory (bytes),
+    from a separate traced run since tracing slows allocation down.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def populate(items, raw_size):
+    raw = ("<p>Lorem ipsum dolor sit amet, Τιμολόγιο TF-2024-001</p>\n" * (raw_size // 56 + 1))[:raw_size]
+    statuses = ("pending", "approved", "rejected", "error")
+    seed_items(
+        items,
+        lambda n: dict(
+            source_type="invoice", source_file=f"invoice_{n}.html",
+            status=statuses[n % 4], data={"invoice number": f"TF-{n}", "total": "€1,054.00"},
+        ),
+        raw=lambda n: raw,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--raw-size", type=int, default=4000)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    with temp_database():
+        from django.test import RequestFactory
+        from core.models import ExtractedItem
+        from dashboard.views import LIST_FIELDS, dashboard
+
+        start = time.perf_counter()
+        populate(args.items, args.raw_size)
+        print(f"{args.items} items with {args.raw_size}-char raw documents in {time.perf_counter() - start:.1f} s")
+
+        request = RequestFactory().get("/", {"status": "all"})
+        cases = {
+            "rows + raw": lambda: list(ExtractedItem.objects.select_related("raw_document").order_by("-created_at")),
+            "list rows": lambda: list(ExtractedItem.objects.only(*LIST_FIELDS).order_by("-created_at")),
+            "dashboard view": lambda: dashboard(request),
+        }
+        for label, run in cases.items():
+            seconds, peak = measure(run, args.repeat)
+            print(f"{label:<16} {seconds * 1000:9.0f} ms  peak {peak / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Metrics benchmark: latency of the status/source/daily metrics endpoints, GROUP BY over the item table vs. the counters.
+
+Builds a throwaway SQLite database with `--items` items spread over 60
+days; "group by" runs the queries the endpoints used before MetricCounter,
+"counters" the endpoints as they are now.
+
+    python -m benchmarks.bench_metrics [--items 100000] [--repeat 20]
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import seed_items, temp_database
+
+
+def timed(run, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with temp_database():
+        from django.db.models import Count
+        from django.db.models.functions import TruncDate
+        from django.test import RequestFactory
+        from django.utils import timezone
+        from core.models import ExtractedItem
+        from dashboard import views
+
+        now = timezone.now()
+        statuses = ("pending", "approved", "rejected", "error")
+        sources = ("form", "email", "invoice")
+        seed_items(args.items, lambda n: dict(
+            source_type=sources[n % 3], source_file=f"{n}.html", status=statuses[n % 4], data={},
+            created_at=now - timezone.timedelta(days=n % 60),
+        ))
+
+        start_date = now.date() - timezone.timedelta(days=13)
+        group_by = {
+            "status": lambda: list(ExtractedItem.objects.values("status").annotate(count=Count("id"))),
+            "source": lambda: list(ExtractedItem.objects.values("source_type").annotate(count=Count("id"))),
+            "daily": lambda: list(
+                ExtractedItem.objects.filter(created_at__date__gte=start_date)
+                .annotate(day=TruncDate("created_at")).values("day", "status")
+                .annotate(count=Count("id")).order_by("day")
+            ),
+        }
+        request = RequestFactory().get("/")
+        counters = {
+            "status": lambda: views.metrics_status_counts(request),
+            "source": lambda: views.metrics_source_counts(request),
+            "daily": lambda: views.metrics_daily_counts(request),
+        }
+
+        print(f"{args.items} items")
+        for name in group_by:
+            before = timed(group_by[name], args.repeat)
+            after = timed(counters[name], args.repeat)
+            print(f"{name:<7} group by {before * 1000:8.2f} ms   counters {after * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Metrics polling benchmark: DB queries and time spent serving idle dashboard tabs, with and without conditional GET.
+
+Builds a throwaway SQLite database with `--items` items, then simulates
+`--reviewers` open dashboards polling the status, source and daily
+endpoints for `--rounds` rounds, with one item approved every
+`--write-every` rounds. "plain" tabs fetch everything each time,
+"conditional" tabs send back the ETag they got (as dashboard.html does).
+Query counts and DB time include the writes.
+
+    python -m benchmarks.bench_metrics_polling [--items 10000] [--reviewers 30] [--rounds 30] [--write-every 10]
+"""
+import argparse
+import time
+
+from benchmarks import seed_items, temp_database
+
+ENDPOINTS = ("metrics_status", "metrics_source", "metrics_daily")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--reviewers", type=int, default=30)
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--write-every", type=int, default=10)
+    args = parser.parse_args()
+
+    with temp_database(ALLOWED_HOSTS=["testserver"]):
+        from django.db import connection
+        from django.test import Client
+        from django.urls import reverse
+        from core.models import ExtractedItem
+
+        seed_items(args.items, lambda n: dict(source_type="form", source_file=f"{n}.html", data={}))
+        urls = [reverse(name) for name in ENDPOINTS]
+        pending = iter(ExtractedItem.objects.values_list("pk", flat=True))
+
+        print(f"{args.items} items, {args.reviewers} reviewers x {args.rounds} rounds x {len(urls)} endpoints")
+        for mode in ("plain", "conditional"):
+            client = Client()
+            etags = [{} for _ in range(args.reviewers)]
+            full = not_modified = 0
+            elapsed = 0.0
+            queries = 0
+            db_time = 0.0
+
+            def count(execute, sql, params, many, context):
+                nonlocal queries, db_time
+                queries += 1
+                started = time.perf_counter()
+                try:
+                    return execute(sql, params, many, context)
+                finally:
+                    db_time += time.perf_counter() - started
+
+            with connection.execute_wrapper(count):
+                for round_ in range(args.rounds):
+                    if round_ and round_ % args.write_every == 0:
+                        ExtractedItem.objects.filter(pk=next(pending)).update(status="approved")
+                    start = time.perf_counter()
+                    for tab in etags:
+                        for url in urls:
+                            headers = {"HTTP_IF_NONE_MATCH": tab[url]} if mode == "conditional" and url in tab else {}
+                            resp = client.get(url, **headers)
+                            if resp.status_code == 304:
+                                not_modified += 1
+                            else:
+                                full += 1
+                                tab[url] = resp["ETag"]
+                    elapsed += time.perf_counter() - start
+            polls = args.reviewers * args.rounds * len(urls)
+            print(
+                f"{mode:<12} {elapsed * 1000 / polls:6.3f} ms/poll   {queries / polls:5.2f} queries"
+                f" / {db_time * 1000 / polls:6.3f} ms DB per poll"
+                f"   {full} full / {not_modified} not modified"
+            )
+
+
+if __name__ == "__main__":
+    main()
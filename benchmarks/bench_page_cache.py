@@ -0,0 +1,107 @@
+"""
+Page cache benchmark: hit rate and latency of the dashboard and detail pages with and without the page cache.
+
+Builds a throwaway SQLite database with `--items` items, then replays
+`--requests` page views from reviewers (seeded): mostly the first
+pending page, some other statuses and later pages, and detail pages of
+the newest pending items, with one item approved every `--write-every`
+views. The same sequence runs with the cache off (PAGE_CACHE_SECONDS=0)
+and on (locmem; `--file-cache` for the file-based backend). Times are
+per request through the full Django stack, the writes excluded.
+
+    python -m benchmarks.bench_page_cache [--items 10000] [--requests 2000] [--write-every 50] [--file-cache]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks import seed_items, temp_database
+
+STATUSES = ("pending", "approved", "rejected", "error")
+
+
+def run(args):
+    """
+    Seed the items, then replay the same page views without and with the page cache.
+    """
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.test import Client
+    from django.urls import reverse
+    from django.utils import timezone
+    from core.models import ExtractedItem
+    from core.utils import keyset
+    from core.utils.item_fields import filter_items
+    from dashboard import page_cache
+
+    now = timezone.now()
+    seed_items(args.items, lambda n: dict(
+        source_type="invoice", source_file=f"invoice_{n}.html", status=STATUSES[n % 4],
+        created_at=now - timezone.timedelta(seconds=n),
+        data={"invoice number": f"TF-{n}", "customer name": f"Customer {n % 500}", "total": "€1,054.00"},
+    ))
+
+    dashboard = reverse("dashboard")
+    pending, _ = filter_items(ExtractedItem.objects.filter(status="pending"), {})
+    _, cursor = keyset.page(pending, None, settings.DASHBOARD_PAGE_SIZE)
+    newest = list(ExtractedItem.objects.filter(status="pending").order_by("-created_at").values_list("pk", flat=True)[:20])
+
+    rng = random.Random(args.seed)
+    views = []
+    for _ in range(args.requests):
+        roll = rng.random()
+        if roll < 0.6:
+            views.append((dashboard, {}))
+        elif roll < 0.75:
+            views.append((dashboard, {"status": rng.choice(STATUSES[1:])}))
+        elif roll < 0.85:
+            views.append((dashboard, {"after": cursor}))
+        else:
+            views.append((reverse("detail", args=[rng.choice(newest)]), {}))
+
+    print(f"{args.items} items, {args.requests} page views, one approval every {args.write_every}"
+          f" ({'file' if args.file_cache else 'locmem'} cache)")
+    for mode, seconds in (("no cache", 0), ("page cache", 300)):
+        settings.PAGE_CACHE_SECONDS = seconds
+        caches["pages"].clear()
+        before = page_cache.stats()
+        approvals = iter(ExtractedItem.objects.filter(status="pending").order_by("created_at").values_list("pk", flat=True))
+        client = Client()
+        times = []
+        for n, (url, params) in enumerate(views):
+            if n and n % args.write_every == 0:
+                ExtractedItem.objects.filter(pk=next(approvals)).update(status="approved")
+            start = time.perf_counter()
+            client.get(url, params)
+            times.append(time.perf_counter() - start)
+        after = page_cache.stats()
+        hits, misses = after["hits"] - before["hits"], after["misses"] - before["misses"]
+        times.sort()
+        print(
+            f"{mode:<11} median {statistics.median(times) * 1000:6.2f} ms   p95 {times[len(times) * 95 // 100] * 1000:6.2f} ms"
+            f"   mean {statistics.mean(times) * 1000:6.2f} ms   hit rate {hits / max(hits + misses, 1):5.1%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--write-every", type=int, default=50)
+    parser.add_argument("--file-cache", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pages_dir:
+        if args.file_cache:
+            os.environ["PAGE_CACHE_DIR"] = pages_dir  # read when the settings load
+
+        with temp_database(ALLOWED_HOSTS=["testserver"]):
+            run(args)
+
+
+if __name__ == "__main__":
+    main()
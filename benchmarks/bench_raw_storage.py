@@ -0,0 +1,46 @@
+"""
+Raw-storage benchmark: stored size and decompression time of raw documents, per storage format.
+
+The dictionary is trained on every other document of each dummy_data
+folder and measured on the rest, so its ratio is not flattered by having
+seen the documents it compresses.
+
+    python -m benchmarks.bench_raw_storage [--repeat 200]
+"""
+import argparse
+import pathlib
+import time
+
+from core.utils import raw_storage
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    folders = [ROOT / "dummy_data" / name for name in ("forms", "emails", "invoices")]
+    documents = [sorted(path.read_text(encoding="utf-8") for path in folder.iterdir() if path.is_file())
+                 for folder in folders]
+    zdict = raw_storage.train_dictionary([docs[::2] for docs in documents])
+    held_out = [text for docs in documents for text in docs[1::2]]
+    plain = sum(len(text.encode("utf-8")) for text in held_out)
+
+    print(f"{len(held_out)} held-out documents, {plain} bytes, dictionary {len(zdict)} bytes")
+    for label, dictionary in (("zlib", None), ("zlib + dictionary", (1, zdict))):
+        blobs = [raw_storage.encode(text, dictionary) for text in held_out]
+        stored = sum(map(len, blobs))
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for blob in blobs:
+                raw_storage.decode(blob, {1: zdict})
+        per_document = (time.perf_counter() - start) / (args.repeat * len(blobs))
+
+        print(f"{label:<18} {stored:7d} bytes  ratio {plain / stored:5.2f}  decode {per_document * 1e6:6.1f} us/doc")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Search benchmark: latency of a dashboard search, LIKE scan over the JSON data vs. the FTS5 index.
+
+Builds a throwaway SQLite database with `--items` invoices (raw HTML
+included) and looks up customers by name: "like" is the
+`data__icontains` filter a search box would otherwise need, "fts" is
+core.utils.search (best 200 by rank, as the dashboard shows). Unique
+invoice numbers and phone numbers are the selective case; common
+customer names make FTS rank every match. Index build time is reported too.
+
+    python -m benchmarks.bench_search [--items 100000] [--repeat 20]
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import seed_items, temp_database
+
+QUERIES = ("TF-012345", "6944-012345", "Computer World", "Δέλτα")
+
+
+def timed(run, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with temp_database():
+        from core.models import ExtractedItem
+        from core.utils.search import search
+
+        customers = ("Computer World SA", "Δέλτα ΑΕ", "Alpha Trading", "Omega Ltd", "Βήτα ΟΕ")
+        start = time.perf_counter()
+        seed_items(
+            args.items,
+            lambda n: dict(
+                source_type="invoice", source_file=f"invoice_{n}.html",
+                data={"invoice_number": f"TF-{n:06d}", "customer": customers[n % 5], "total": f"€{n % 997}.00"},
+            ),
+            raw=lambda n: (
+                f"<html><body><h1>Τιμολόγιο TF-{n:06d}</h1><p>{customers[n % 5]}</p>"
+                f"<p>Τηλ. 6944-{n:06d}</p></body></html>"
+            ),
+        )
+        print(f"{args.items} items, written and indexed in {time.perf_counter() - start:.1f} s")
+
+        for query in QUERIES:
+            # LIKE sees neither the compressed raw documents nor Greek (stored as \u escapes in JSON)
+            like_search = lambda: list(ExtractedItem.objects.filter(data__icontains=query).values_list("id", flat=True)[:200])
+            like = timed(like_search, args.repeat)
+            fts = timed(lambda: search(query), args.repeat)
+            print(
+                f"{query:<16} like {like * 1000:8.2f} ms ({len(like_search()):>3} hits)"
+                f"   fts {fts * 1000:6.2f} ms ({len(search(query)):>3} hits)"
+            )
+
+
+if __name__ == "__main__":
+    main()
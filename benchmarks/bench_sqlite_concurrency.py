@@ -0,0 +1,166 @@
+"""
+Concurrency stress test: a scan importing files while reviewers save items in parallel, per SQLite profile.
+
+Each profile (settings.SQLITE_PROFILES) runs in its own process against a
+fresh database file: `--files` generated documents are scanned in chunks
+of `--batch-size` while `--reviewers` threads keep doing what a POST to the
+detail page does (load an item, change its data and status, save) until
+the scan is over. Reported per profile: scan time, review saves per second,
+their p95 latency, and how many saves (or scan chunks) failed with
+"database is locked".
+
+    python -m benchmarks.bench_sqlite_concurrency [--files 2000] [--reviewers 4]
+"""
+import argparse
+import json
+import os
+import pathlib
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+PROFILES = ("default", "production")
+
+
+def generate_documents(base, files):
+    # Copies of the dummy documents, each made unique so none is deduplicated
+    sources = [
+        path for folder in ("forms", "emails", "invoices")
+        for path in sorted((ROOT / "dummy_data" / folder).iterdir()) if path.is_file()
+    ]
+    for folder in ("forms", "emails", "invoices"):
+        (base / "dummy_data" / folder).mkdir(parents=True)
+    for n in range(files):
+        source = sources[n % len(sources)]
+        text = source.read_text(encoding="utf-8")
+        marker = f"\n<!-- copy {n} -->\n" if source.suffix == ".html" else f"\nRef: {n}\n"
+        target = base / "dummy_data" / source.parent.name / f"{source.stem}_{n}{source.suffix}"
+        target.write_text(text + marker, encoding="utf-8")
+
+
+def run_profile(files, reviewers, batch_size, seed_items):
+    os.environ["GOOGLE_API_KEY"] = ""  # no LLM calls from the scan
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "automation_project.settings")
+    from django.conf import settings
+
+    tmp = pathlib.Path(tempfile.mkdtemp())
+    try:
+        settings.BASE_DIR = tmp
+        settings.DATABASES["default"]["NAME"] = str(tmp / "bench.sqlite3")
+
+        import django
+        django.setup()
+        from django.core.management import call_command
+        from django.db import OperationalError, connection, transaction
+        from core.models import ExtractedItem
+        from parsers.pipeline import run_full_scan
+
+        call_command("migrate", verbosity=0)
+        generate_documents(tmp, files)
+        ExtractedItem.objects.bulk_create([
+            ExtractedItem(source_type="form", source_file=f"review_{n}.html", data={"full name": "Test"})
+            for n in range(seed_items)
+        ])
+        ids = list(ExtractedItem.objects.values_list("id", flat=True))
+        connection.close()
+
+        scan_done = threading.Event()
+        scan = {"error": None}
+        results = []  # (seconds, locked) per review save
+        results_lock = threading.Lock()
+
+        def scanner():
+            start = time.perf_counter()
+            try:
+                run_full_scan(workers=1, batch_size=batch_size)
+            except OperationalError as e:
+                scan["error"] = str(e)
+            finally:
+                scan["seconds"] = time.perf_counter() - start
+                connection.close()
+                scan_done.set()
+
+        def reviewer(seed):
+            rng = random.Random(seed)
+            try:
+                while not scan_done.is_set():
+                    start = time.perf_counter()
+                    locked = False
+                    try:
+                        with transaction.atomic():
+                            item = ExtractedItem.objects.select_related("raw_document").get(pk=rng.choice(ids))
+                            item.data = {"full name": f"Reviewed {rng.random():.6f}"}
+                            item.status = rng.choice(("pending", "approved", "rejected"))
+                            item.save()
+                    except OperationalError as e:
+                        if "locked" not in str(e):
+                            raise
+                        locked = True
+                    with results_lock:
+                        results.append((time.perf_counter() - start, locked))
+                    time.sleep(0.002)  # a reviewer's next click
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=scanner)] + [
+            threading.Thread(target=reviewer, args=(n,)) for n in range(reviewers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        saved = sorted(seconds for seconds, locked in results if not locked)
+        return {
+            "scan_seconds": scan["seconds"],
+            "scan_error": scan["error"],
+            "imported": ExtractedItem.objects.count() - seed_items,
+            "saves": len(saved),
+            "locked": sum(locked for _, locked in results),
+            "saves_per_second": len(saved) / scan["seconds"],
+            "p95_ms": saved[int(len(saved) * 0.95)] * 1000 if saved else None,
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--reviewers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--seed-items", type=int, default=200)
+    parser.add_argument("--profile", choices=PROFILES, help=argparse.SUPPRESS)  # child process
+    args = parser.parse_args()
+
+    if args.profile:
+        print(json.dumps(run_profile(args.files, args.reviewers, args.batch_size, args.seed_items)))
+        return
+
+    print(f"{args.files} files scanned in chunks of {args.batch_size}, {args.reviewers} reviewers saving meanwhile")
+    for profile in PROFILES:
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_sqlite_concurrency", "--profile", profile,
+             "--files", str(args.files), "--reviewers", str(args.reviewers),
+             "--batch-size", str(args.batch_size), "--seed-items", str(args.seed_items)],
+            cwd=ROOT, capture_output=True, text=True, env={**os.environ, "SQLITE_PROFILE": profile},
+        )
+        if result.returncode != 0:
+            raise SystemExit(f"{profile} profile failed:\n{result.stderr}")
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        p95 = f"{stats['p95_ms']:.1f} ms" if stats["p95_ms"] is not None else "-"
+        print(
+            f"{profile:<11} scan {stats['scan_seconds']:6.2f} s ({stats['imported']} imported"
+            f"{', failed: ' + stats['scan_error'] if stats['scan_error'] else ''})  "
+            f"saves {stats['saves']:5d} ({stats['saves_per_second']:6.1f}/s, p95 {p95})  "
+            f"locked {stats['locked']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
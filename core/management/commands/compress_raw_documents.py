@@ -0,0 +1,68 @@
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand
+
+from core.models import RawDocument
+from core.utils import raw_storage
+from core.utils.db_stats import storage_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompress stored raw documents with the newest shared dictionary, "
+        "in batches. With --train, first build a new dictionary from the "
+        "newest documents of each source type."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--train", action="store_true",
+                            help="Train and store a new dictionary before recompressing.")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Documents rewritten per transaction (default: 500).")
+        parser.add_argument("--vacuum", action="store_true",
+                            help="VACUUM afterwards, so the freed pages shrink the database file.")
+
+    def handle(self, *args, **options):
+        before = storage_stats()
+
+        if options["train"]:
+            trained = raw_storage.train_stored_dictionary()
+            if trained is None:
+                self.stdout.write("No raw documents stored yet, nothing to train on.")
+                return
+            self.stdout.write(f"Trained dictionary #{trained[0]} ({len(trained[1])} bytes).")
+
+        raw_storage.reset_cache()
+        dictionary = raw_storage.current_dictionary()
+        if dictionary is None:
+            self.stdout.write("No dictionary stored yet; run with --train.")
+            return
+
+        rewritten = 0
+        documents = RawDocument.objects.only("item_id", "data").order_by("item_id")
+        last = 0
+        # pk ranges, not iterator(): the rows are rewritten while walking the table
+        while page := list(documents.filter(item_id__gt=last)[:options["batch_size"]]):
+            last = page[-1].item_id
+            batch = [document for document in page if raw_storage.dictionary_of(document.data) != dictionary[0]]
+            for document in batch:
+                document.content = document.content  # decompress, recompress with the current dictionary
+            if batch:
+                rewritten += self._save(batch)
+
+        if options["vacuum"]:
+            with connection.cursor() as cursor:
+                cursor.execute("VACUUM")
+
+        after = storage_stats()
+        self.stdout.write(
+            f"Recompressed {rewritten} documents: stored raw content "
+            f"{before['stored_bytes']} -> {after['stored_bytes']} bytes "
+            f"({after['compression_ratio']}x), database file "
+            f"{before['file_bytes']} -> {after['file_bytes']} bytes."
+        )
+
+    @staticmethod
+    def _save(batch):
+        with transaction.atomic():
+            RawDocument.objects.bulk_update(batch, ["data", "size"])
+        return len(batch)
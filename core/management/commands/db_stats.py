@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.db_stats import storage_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the database file size, bytes per table, how much of the page "
+        "cache the item table needs, and how well raw documents compress."
+    )
+
+    def handle(self, *args, **options):
+        stats = storage_stats()
+        mib = 2 ** 20
+
+        self.stdout.write(
+            f"Database: {stats['file_bytes'] / mib:.1f} MiB "
+            f"({stats['pages']} pages of {stats['page_size']} bytes, {stats['free_pages']} free)"
+        )
+        for table, size in sorted(stats["tables"].items(), key=lambda row: -row[1]):
+            self.stdout.write(f"  {table:<32} {size / mib:9.2f} MiB")
+
+        self.stdout.write(
+            f"Page cache: {stats['cache_pages']} pages; item table needs {stats['hot_pages']} "
+            f"(pressure {stats['cache_pressure']})"
+        )
+        self.stdout.write(
+            f"Raw documents: {stats['raw_documents']}, {stats['raw_bytes'] / mib:.2f} MiB "
+            f"stored as {stats['stored_bytes'] / mib:.2f} MiB (ratio {stats['compression_ratio']})"
+        )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from core.models import ExtractedItem, Invoice
+from core.utils.invoice_validation import validate_invoices
+from parsers.invoice_parser import STRUCTURED_KEYS, parse_invoice
+from parsers.pipeline import save_invoice_details
+
+
+class Command(BaseCommand):
+    help = (
+        "Check every invoice in one pass: line items sum to the net total, "
+        "VAT is 24% of net, and net + VAT equals the total. Mismatches are "
+        "stored on the Invoice rows and listed here."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backfill", action="store_true",
+                            help="First parse line items and amounts for invoice items imported before they were stored.")
+        parser.add_argument("--show", type=int, default=20,
+                            help="How many mismatching invoices to list (default: 20).")
+
+    def handle(self, *args, **options):
+        if options["backfill"]:
+            missing = (
+                ExtractedItem.objects.filter(source_type="invoice", invoice__isnull=True)
+                .exclude(status="error")
+                .select_related("raw_document")
+            )
+            invoices = []
+            for item in missing.iterator():
+                parsed = parse_invoice(item.raw_document.content)
+                invoices.append((item, {key: parsed.get(key) for key in STRUCTURED_KEYS}))
+            if invoices:
+                save_invoice_details(invoices)
+            self.stdout.write(f"Backfilled {len(invoices)} invoices.")
+
+        result = validate_invoices()
+        failed = result[result["mismatches"] != ""]
+        self.stdout.write(f"Checked {len(result)} invoices: {len(failed)} with mismatches.")
+
+        shown = Invoice.objects.filter(pk__in=[int(pk) for pk in failed.index[:options["show"]]]).select_related("item")
+        for invoice in shown:
+            self.stdout.write(f"  #{invoice.item_id} {invoice.item.source_file}: {invoice.mismatches}")
@@ -0,0 +1,59 @@
+import logging
+import pathlib
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from parsers.pipeline import ingest_files
+from parsers.watcher import DirectoryWatcher
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Watch dummy_data/{forms,emails,invoices} and continuously ingest "
+        "new or changed files through the parsers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=1.0,
+                            help="Seconds between directory polls (default: 1).")
+        parser.add_argument("--settle", type=float, default=2.0,
+                            help="Quiet period before a burst of files is ingested as one batch (default: 2).")
+        parser.add_argument("--max-wait", type=float, default=30.0,
+                            help="Ingest pending files after this many seconds even if files keep arriving (default: 30).")
+        parser.add_argument("--full-every", type=int, default=30,
+                            help="Re-stat every file on every Nth poll to catch in-place edits (default: 30).")
+        parser.add_argument("--once", action="store_true",
+                            help="Exit as soon as nothing is left pending (one catch-up pass).")
+
+    def handle(self, *args, **options):
+        base = pathlib.Path(settings.BASE_DIR) / "dummy_data"
+        watcher = DirectoryWatcher(
+            base,
+            settle=options["settle"],
+            max_wait=options["max_wait"],
+            full_every=options["full_every"],
+        )
+        self.stdout.write(f"Watching {base} (Ctrl+C to stop)")
+
+        try:
+            while True:
+                ready = watcher.poll()
+                if ready:
+                    close_old_connections()
+                    try:
+                        created, errors = ingest_files(ready)
+                        if created or errors:
+                            self.stdout.write(f"Ingested {len(ready)} files: {created} created, {errors} errors")
+                    except Exception:
+                        # Keep the daemon alive; the files are retried when they change again
+                        logger.exception("Ingest failed for %s files", len(ready))
+                if options["once"] and not watcher.pending:
+                    return
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped.")
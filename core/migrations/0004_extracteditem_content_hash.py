@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:13
+
+import hashlib
+import pathlib
+
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+# dummy_data sub-directory of each source type, as scanned when this migration was written
+FOLDERS = {"form": "forms", "email": "emails", "invoice": "invoices"}
+
+
+def _content_hash(item, base):
+    # The scan hashes the file's bytes (parsers.worker.parse_document); raw_content
+    # is decoded and newline-normalized, so it is only the fallback for files that
+    # are gone (CRLF, BOM or non-UTF-8 files would not match the scan otherwise)
+    path = base / FOLDERS.get(item.source_type, "") / item.source_file
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return hashlib.sha256(item.raw_content.encode("utf-8")).hexdigest()
+
+
+def backfill_content_hash(apps, schema_editor):
+    """
+    Hash the source file (or, when it is gone, the stored raw content) of
+    existing items, in batches, so documents imported before this
+    migration are deduplicated too.
+    """
+    ExtractedItem = apps.get_model("core", "ExtractedItem")
+    base = pathlib.Path(settings.BASE_DIR) / "dummy_data"
+    items = ExtractedItem.objects.only("id", "source_type", "source_file", "raw_content").order_by("pk")
+    last = 0
+    # pk ranges, not iterator(): the rows are written while walking the table
+    while batch := list(items.filter(pk__gt=last)[:BATCH_SIZE]):
+        for item in batch:
+            item.content_hash = _content_hash(item, base)
+        ExtractedItem.objects.bulk_update(batch, ["content_hash"])
+        last = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_scanjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='extracteditem',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
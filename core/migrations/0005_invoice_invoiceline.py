@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_extracteditem_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Invoice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('net_total', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('vat_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('total', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('is_consistent', models.BooleanField(null=True)),
+                ('mismatches', models.CharField(blank=True, default='', max_length=100)),
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='invoice', to='core.extracteditem')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InvoiceLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('description', models.CharField(blank=True, default='', max_length=255)),
+                ('quantity', models.DecimalField(blank=True, decimal_places=3, max_digits=12, null=True)),
+                ('unit_price', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('line_total', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='core.invoice')),
+            ],
+            options={
+                'ordering': ['invoice', 'position'],
+            },
+        ),
+    ]
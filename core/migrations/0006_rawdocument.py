@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def move_raw_content(apps, schema_editor):
+    """
+    Copy raw_content of existing items into RawDocument rows, in batches,
+    before the column is dropped.
+    """
+    ExtractedItem = apps.get_model("core", "ExtractedItem")
+    RawDocument = apps.get_model("core", "RawDocument")
+    batch = []
+    for item_id, content in ExtractedItem.objects.values_list("id", "raw_content").iterator(chunk_size=BATCH_SIZE):
+        batch.append(RawDocument(item_id=item_id, content=content))
+        if len(batch) >= BATCH_SIZE:
+            RawDocument.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        RawDocument.objects.bulk_create(batch)
+
+
+def restore_raw_content(apps, schema_editor):
+    ExtractedItem = apps.get_model("core", "ExtractedItem")
+    RawDocument = apps.get_model("core", "RawDocument")
+    batch = []
+    for item_id, content in RawDocument.objects.values_list("item_id", "content").iterator(chunk_size=BATCH_SIZE):
+        batch.append(ExtractedItem(id=item_id, raw_content=content))
+        if len(batch) >= BATCH_SIZE:
+            ExtractedItem.objects.bulk_update(batch, ["raw_content"])
+            batch = []
+    if batch:
+        ExtractedItem.objects.bulk_update(batch, ["raw_content"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_invoice_invoiceline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RawDocument',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='raw_document', serialize=False, to='core.extracteditem')),
+                ('content', models.TextField()),
+            ],
+        ),
+        # A default lets the column be re-added when migrating backwards
+        migrations.AlterField(
+            model_name='extracteditem',
+            name='raw_content',
+            field=models.TextField(default=''),
+        ),
+        migrations.RunPython(move_raw_content, restore_raw_content),
+        migrations.RemoveField(
+            model_name='extracteditem',
+            name='raw_content',
+        ),
+    ]
@@ -0,0 +1,142 @@
+import zlib
+from itertools import zip_longest
+
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 500
+
+# Frozen copy of the core.utils.raw_storage format as of this migration, so later
+# changes to that module don't change what this migration writes or reads
+PLAIN = 0
+ZLIB = 1
+ZLIB_DICT = 2
+LEVEL = 9
+DICTIONARY_SIZE = 32 * 1024
+TRAINING_SAMPLES = 20
+
+
+def encode(text, dictionary=None):
+    plain = text.encode("utf-8")
+    if dictionary:
+        dictionary_id, zdict = dictionary
+        compressor = zlib.compressobj(LEVEL, zdict=zdict)
+        blob = bytes([ZLIB_DICT]) + dictionary_id.to_bytes(4, "big") + compressor.compress(plain) + compressor.flush()
+    else:
+        blob = bytes([ZLIB]) + zlib.compress(plain, LEVEL)
+    return blob if len(blob) <= len(plain) else bytes([PLAIN]) + plain
+
+
+def decode(blob, dictionaries):
+    blob = bytes(blob)
+    kind, payload = blob[0], blob[1:]
+    if kind == PLAIN:
+        plain = payload
+    elif kind == ZLIB:
+        plain = zlib.decompress(payload)
+    elif kind == ZLIB_DICT:
+        decompressor = zlib.decompressobj(zdict=dictionaries[int.from_bytes(payload[:4], "big")])
+        plain = decompressor.decompress(payload[4:]) + decompressor.flush()
+    else:
+        raise ValueError(f"Unknown raw document format {kind}")
+    return plain.decode("utf-8")
+
+
+def train_dictionary(samples, size=DICTIONARY_SIZE):
+    picked = []
+    total = 0
+    for group in zip_longest(*samples):
+        for text in filter(None, group):
+            picked.append(text.encode("utf-8"))
+            total += len(picked[-1])
+        if total >= size:
+            break
+    return b"".join(reversed(picked))[-size:]
+
+
+def compress_raw_documents(apps, schema_editor):
+    """
+    Train a first shared dictionary on the stored documents (newest ones of
+    each source type), then compress every raw document with it, in batches.
+    """
+    RawDocument = apps.get_model("core", "RawDocument")
+    CompressionDictionary = apps.get_model("core", "CompressionDictionary")
+
+    samples = [
+        list(
+            RawDocument.objects.filter(item__source_type=source_type)
+            .order_by("-item_id")
+            .values_list("content", flat=True)[:TRAINING_SAMPLES]
+        )
+        for source_type in RawDocument.objects.values_list("item__source_type", flat=True).distinct()
+    ]
+    dictionary = None
+    if samples:
+        zdict = train_dictionary(samples)
+        stored = CompressionDictionary.objects.create(data=zdict, samples=sum(map(len, samples)))
+        dictionary = (stored.id, zdict)
+
+    documents = RawDocument.objects.only("item_id", "content").order_by("pk")
+    last = 0
+    # pk ranges, not iterator(): the rows are written while walking the table
+    while batch := list(documents.filter(pk__gt=last)[:BATCH_SIZE]):
+        for document in batch:
+            document.data = encode(document.content, dictionary)
+            document.size = len(document.content.encode("utf-8"))
+        RawDocument.objects.bulk_update(batch, ["data", "size"])
+        last = batch[-1].pk
+
+
+def decompress_raw_documents(apps, schema_editor):
+    RawDocument = apps.get_model("core", "RawDocument")
+    CompressionDictionary = apps.get_model("core", "CompressionDictionary")
+    dictionaries = {pk: bytes(data) for pk, data in CompressionDictionary.objects.values_list("id", "data")}
+
+    documents = RawDocument.objects.only("item_id", "data").order_by("pk")
+    last = 0
+    while batch := list(documents.filter(pk__gt=last)[:BATCH_SIZE]):
+        for document in batch:
+            document.content = decode(document.data, dictionaries)
+        RawDocument.objects.bulk_update(batch, ["content"])
+        last = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_rawdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompressionDictionary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.BinaryField()),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='rawdocument',
+            name='data',
+            field=models.BinaryField(default=b''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='rawdocument',
+            name='size',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        # A default lets the column be re-added when migrating backwards
+        migrations.AlterField(
+            model_name='rawdocument',
+            name='content',
+            field=models.TextField(default=''),
+        ),
+        migrations.RunPython(compress_raw_documents, decompress_raw_documents),
+        migrations.RemoveField(
+            model_name='rawdocument',
+            name='content',
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:50
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+# Frozen copy of the core.utils.metric_counters keys and counting as of
+# this migration; later changes there must not change what it writes.
+def counter_keys(status, source_type, day):
+    return [("status", status), ("source", source_type), ("day", f"{day.isoformat()}:{status}")]
+
+
+def count_existing_items(apps, schema_editor):
+    MetricCounter = apps.get_model("core", "MetricCounter")
+    ExtractedItem = apps.get_model("core", "ExtractedItem")
+
+    counts = Counter()
+    rows = (
+        ExtractedItem.objects.order_by()
+        .annotate(day=TruncDate("created_at"))
+        .values_list("status", "source_type", "day")
+        .annotate(n=Count("pk"))
+    )
+    for status, source_type, day, n in rows:
+        for key in counter_keys(status, source_type, day):
+            counts[key] += n
+
+    MetricCounter.objects.all().delete()
+    MetricCounter.objects.bulk_create(
+        [MetricCounter(dimension=dimension, key=key, count=count) for (dimension, key), count in counts.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_compressed_raw_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(max_length=10)),
+                ('key', models.CharField(max_length=40)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key'), name='unique_metric_counter')],
+            },
+        ),
+        migrations.RunPython(count_existing_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,143 @@
+import email
+import email.policy
+import html
+import re
+import unicodedata
+import zlib
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+# Frozen copies of the core.utils.search text assembly and of the
+# core.utils.raw_storage decoding as of this migration, so later changes
+# to those modules don't change what this migration indexes
+TABLE = "core_itemsearch"
+PLAIN = 0
+ZLIB = 1
+ZLIB_DICT = 2
+
+_INVISIBLE = re.compile(r"<(style|script)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[^>]+>")
+_BLOCK_TAG = re.compile(r"<\s*/?\s*(?:br|p|div|tr|li|h\d)\b[^>]*>", re.IGNORECASE)
+
+
+def decode(blob, dictionaries):
+    blob = bytes(blob)
+    kind, payload = blob[0], blob[1:]
+    if kind == PLAIN:
+        plain = payload
+    elif kind == ZLIB:
+        plain = zlib.decompress(payload)
+    elif kind == ZLIB_DICT:
+        decompressor = zlib.decompressobj(zdict=dictionaries[int.from_bytes(payload[:4], "big")])
+        plain = decompressor.decompress(payload[4:]) + decompressor.flush()
+    else:
+        raise ValueError(f"Unknown raw document format {kind}")
+    return plain.decode("utf-8")
+
+
+def normalize(text):
+    decomposed = unicodedata.normalize("NFD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def fields_text(data):
+    return normalize(" ".join(str(value) for value in (data or {}).values() if value not in (None, "")))
+
+
+def _part_text(part):
+    try:
+        return part.get_content()
+    except (LookupError, UnicodeError):
+        payload = part.get_payload(decode=True) or b""
+        return payload.decode("utf-8", errors="ignore")
+
+
+def email_text(raw):
+    message = email.message_from_bytes(raw.encode("utf-8"), policy=email.policy.default)
+    if not message.keys():
+        return f"\n{raw}\n"
+
+    plain, markup, attachments = [], [], []
+    for part in message.walk():
+        if part.is_multipart():
+            continue
+        if part.get_content_disposition() == "attachment" or part.get_content_maintype() != "text":
+            attachments.append(part.get_filename() or part.get_content_type())
+            continue
+        if part.get_content_subtype() == "html":
+            markup.append(_part_text(part))
+        else:
+            plain.append(_part_text(part))
+
+    if plain:
+        body = "\n".join(plain)
+    else:
+        body = html.unescape(_TAG.sub("", _BLOCK_TAG.sub("\n", "\n".join(markup))))
+    headers = "\n".join(f"{name}: {value}" for name, value in message.items())
+    return f"{headers}\n{body}\n{' '.join(attachments)}"
+
+
+def raw_text(source_type, raw):
+    if source_type == "email":
+        return normalize(email_text(raw))
+    return normalize(html.unescape(_TAG.sub(" ", _INVISIBLE.sub(" ", raw))))
+
+
+def index_fields(cursor, rows):
+    cursor.executemany(
+        f"INSERT INTO {TABLE} (rowid, source_file, fields, raw) VALUES (%s, %s, %s, '')",
+        [(pk, normalize(source_file), fields_text(data)) for pk, source_file, data in rows],
+    )
+
+
+def index_raw(cursor, rows):
+    cursor.executemany(
+        f"UPDATE {TABLE} SET raw = %s WHERE rowid = %s",
+        [(raw_text(source_type, raw), pk) for pk, source_type, raw in rows],
+    )
+
+
+def index_existing_items(apps, schema_editor):
+    """
+    Index the data values and raw text of every stored item, in batches.
+    """
+    ExtractedItem = apps.get_model("core", "ExtractedItem")
+    RawDocument = apps.get_model("core", "RawDocument")
+    CompressionDictionary = apps.get_model("core", "CompressionDictionary")
+    dictionaries = {pk: bytes(data) for pk, data in CompressionDictionary.objects.values_list("id", "data")}
+
+    with schema_editor.connection.cursor() as cursor:
+        batch = []
+        for row in ExtractedItem.objects.values_list("id", "source_file", "data").iterator(chunk_size=BATCH_SIZE):
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                index_fields(cursor, batch)
+                batch = []
+        index_fields(cursor, batch)
+
+        batch = []
+        documents = RawDocument.objects.values_list("item_id", "item__source_type", "data")
+        for pk, source_type, data in documents.iterator(chunk_size=BATCH_SIZE):
+            batch.append((pk, source_type, decode(data, dictionaries)))
+            if len(batch) >= BATCH_SIZE:
+                index_raw(cursor, batch)
+                batch = []
+        index_raw(cursor, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_metriccounter'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE VIRTUAL TABLE core_itemsearch USING fts5("
+            "source_file, fields, raw, tokenize = 'unicode61 remove_diacritics 2')",
+            "DROP TABLE core_itemsearch",
+        ),
+        migrations.RunPython(index_existing_items, migrations.RunPython.noop),
+    ]
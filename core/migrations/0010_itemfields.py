@@ -0,0 +1,129 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:03
+
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+# Frozen copy of the core.utils.item_fields projection (and of the amount
+# parsing it uses) as of this migration, so later changes to those modules
+# don't change what this migration writes
+TEXT_FIELDS = {
+    "name": ("customer name", "full name", "name"),
+    "email": ("email",),
+    "phone": ("phone",),
+    "invoice_number": ("invoice number",),
+}
+DATE_KEYS = ("date", "submission date")
+DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d.%m.%Y")
+MONEY_FIELDS = {"net_total": "net total", "vat_amount": "vat amount", "total": "total"}
+PROJECTED_FIELDS = (*TEXT_FIELDS, "date", *MONEY_FIELDS)
+MAX_AMOUNT = Decimal("999999999999.99")
+
+_NUMBER = re.compile(r"(-?)\s*[€$£]?\s*(\d[\d.,]*)")
+
+
+def _first(data, keys):
+    for key in keys:
+        value = data.get(key)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def parse_date(text):
+    text = (text or "").strip().split("T")[0].split(" ")[0]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_amount(text):
+    m = _NUMBER.search(text or "")
+    if m is None:
+        return None
+    sign, number = m.group(1), m.group(2).rstrip(".,")
+    last = max(number.rfind("."), number.rfind(","))
+    if last >= 0 and 1 <= len(number) - last - 1 <= 2:
+        number = number[:last].replace(".", "").replace(",", "") + "." + number[last + 1:]
+    else:
+        number = number.replace(".", "").replace(",", "")
+    try:
+        return Decimal(sign + number)
+    except InvalidOperation:
+        return None
+
+
+def _money(text):
+    amount = parse_amount(text)
+    if amount is None or abs(amount) > MAX_AMOUNT:
+        return None
+    return amount.quantize(Decimal("0.01"))
+
+
+def project(data):
+    data = data or {}
+    values = {field: _first(data, keys) for field, keys in TEXT_FIELDS.items()}
+    values["name"] = values["name"][:255]
+    values["email"] = values["email"].lower()[:254]
+    values["phone"] = values["phone"][:50]
+    values["invoice_number"] = values["invoice_number"][:100]
+    values["date"] = parse_date(_first(data, DATE_KEYS))
+    for field, key in MONEY_FIELDS.items():
+        values[field] = _money(data.get(key))
+    return values
+
+
+def store(model, rows):
+    objs = [model(item_id=pk, **project(data)) for pk, data in rows]
+    if objs:
+        model.objects.bulk_create(
+            objs, update_conflicts=True, unique_fields=["item"], update_fields=list(PROJECTED_FIELDS),
+        )
+
+
+def project_existing_items(apps, schema_editor):
+    ExtractedItem = apps.get_model("core", "ExtractedItem")
+    ItemFields = apps.get_model("core", "ItemFields")
+    batch = []
+    for row in ExtractedItem.objects.values_list("id", "data").iterator(chunk_size=BATCH_SIZE):
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            store(ItemFields, batch)
+            batch = []
+    store(ItemFields, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_itemsearch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemFields',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='typed', serialize=False, to='core.extracteditem')),
+                ('name', models.CharField(blank=True, default='', max_length=255)),
+                ('email', models.CharField(blank=True, db_index=True, default='', max_length=254)),
+                ('phone', models.CharField(blank=True, db_index=True, default='', max_length=50)),
+                ('invoice_number', models.CharField(blank=True, db_index=True, default='', max_length=100)),
+                ('date', models.DateField(blank=True, null=True)),
+                ('net_total', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('vat_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('total', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name', 'item'], name='itemfields_name'), models.Index(fields=['date', 'item'], name='itemfields_date'), models.Index(fields=['total', 'item'], name='itemfields_total')],
+            },
+        ),
+        migrations.RunPython(project_existing_items, migrations.RunPython.noop),
+    ]
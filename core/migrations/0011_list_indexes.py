@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_itemfields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='extracteditem',
+            index=models.Index(fields=['status', 'created_at'], name='item_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='extracteditem',
+            index=models.Index(fields=['created_at'], name='item_created'),
+        ),
+    ]
@@ -1,6 +1,80 @@
-from django.db import models
+from collections import Counter
+
+from django.db import models, transaction
 from django.utils import timezone
 
+from core.utils import item_fields, metric_counters, raw_storage, search
+
+PK_CHUNK = 500  # pks per IN (...) when recounting/reindexing updated rows
+INDEXED_FIELDS = {"source_file", "data"}  # ExtractedItem fields in the search index / ItemFields
+
+
+class ExtractedItemQuerySet(models.QuerySet):
+    """
+    Bulk writes that keep MetricCounter, ItemFields and the search index
+    in step, in the same transaction, and bump the "items" DataVersion.
+    """
+
+    def _chunks(self, pks):
+        for start in range(0, len(pks), PK_CHUNK):
+            yield self.model._base_manager.filter(pk__in=pks[start:start + PK_CHUNK])
+
+    def _tally_pks(self, pks):
+        counts = Counter()
+        for items in self._chunks(pks):
+            counts.update(metric_counters.tally(items))
+        return counts
+
+    def _reindex_pks(self, pks):
+        for items in self._chunks(pks):
+            rows = list(items.values_list("pk", "source_file", "data"))
+            search.index_fields(rows)
+            ItemFields.store([(pk, data) for pk, _, data in rows])
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            MetricCounter.record(Counter(key for obj in objs for key in obj.counter_keys()))
+            search.index_fields([(obj.pk, obj.source_file, obj.data) for obj in objs])
+            ItemFields.store([(obj.pk, obj.data) for obj in objs])
+            if objs:
+                DataVersion.bump(DataVersion.ITEMS)
+        return objs
+
+    def update(self, **kwargs):
+        counted = not metric_counters.COUNTED_FIELDS.isdisjoint(kwargs)
+        indexed = not INDEXED_FIELDS.isdisjoint(kwargs)
+        if not (counted or indexed):
+            rows = super().update(**kwargs)
+            if rows:
+                DataVersion.bump(DataVersion.ITEMS)
+            return rows
+        with transaction.atomic(using=self.db, savepoint=False):
+            pks = list(self.values_list("pk", flat=True))
+            before = self._tally_pks(pks) if counted else None
+            rows = super().update(**kwargs)
+            if counted:
+                deltas = self._tally_pks(pks)
+                deltas.subtract(before)
+                MetricCounter.record(deltas)
+            if indexed:
+                self._reindex_pks(pks)
+            if rows:
+                DataVersion.bump(DataVersion.ITEMS)
+        return rows
+
+    def delete(self):
+        with transaction.atomic(using=self.db, savepoint=False):
+            removed = metric_counters.tally(self)
+            pks = list(self.values_list("pk", flat=True))
+            result = super().delete()
+            MetricCounter.record(Counter({key: -count for key, count in removed.items()}))
+            search.unindex(pks)
+            if pks:
+                DataVersion.bump(DataVersion.ITEMS)
+        return result
+
+
 class ExtractedItem(models.Model):
     SOURCE_TYPES = (
         ("form", "Form"),
@@ -19,16 +93,343 @@ class ExtractedItem(models.Model):
     source_file = models.CharField(max_length=255)
     status = models.CharField(max_length=20, choices=STATUS_TYPES, default="pending")
 
-    raw_content = models.TextField()
+    content_hash = models.CharField(max_length=64, blank=True, default="", db_index=True)  # sha256 of the source bytes
     data = models.JSONField(default=dict, blank=True)
     error_message = models.TextField(null=True, blank=True)
 
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ExtractedItemQuerySet.as_manager()
+
+    class Meta:
+        # Dashboard pages, newest first, per status or over all items;
+        # id (the rowid) ends every entry, so (created_at, id) keysets seek on them
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="item_status_created"),
+            models.Index(fields=["created_at"], name="item_created"),
+        ]
+
+    def counter_keys(self):
+        return metric_counters.counter_keys(self.status, self.source_type, metric_counters.day_of(self.created_at))
+
+    def _stored_counter_keys(self):
+        # The row as stored now, read inside the write's transaction (locked:
+        # BEGIN IMMEDIATE on SQLite, FOR UPDATE elsewhere), not as it was when
+        # this instance was loaded: two saves of one item can't both move it
+        # out of the same old counter
+        if self._state.adding:
+            return []
+        stored = (
+            type(self)._base_manager.select_for_update().filter(pk=self.pk)
+            .values_list(*metric_counters.COUNTED_ORDER).first()
+        )
+        if stored is None:
+            return []
+        status, source_type, created_at = stored
+        return metric_counters.counter_keys(status, source_type, metric_counters.day_of(created_at))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        counted = update_fields is None or not metric_counters.COUNTED_FIELDS.isdisjoint(update_fields)
+        indexed = update_fields is None or not INDEXED_FIELDS.isdisjoint(update_fields)
+        if not (counted or indexed):
+            super().save(*args, **kwargs)
+            DataVersion.bump(DataVersion.ITEMS)
+            return
+        with transaction.atomic():
+            stored = self._stored_counter_keys() if counted else None
+            super().save(*args, **kwargs)
+            if counted:
+                deltas = Counter(self.counter_keys())
+                deltas.subtract(stored)
+                MetricCounter.record(deltas)
+            if indexed:
+                search.index_fields([(self.pk, self.source_file, self.data)])
+                ItemFields.store([(self.pk, self.data)])
+            DataVersion.bump(DataVersion.ITEMS)
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        with transaction.atomic():
+            stored = self._stored_counter_keys()
+            result = super().delete(*args, **kwargs)
+            MetricCounter.record(Counter({key: -1 for key in stored}))
+            search.unindex([pk])
+            DataVersion.bump(DataVersion.ITEMS)
+        return result
+
     def is_editable(self):
         # Extracted approved/rejected items cannot be edited
         return self.status in ["pending", "error"]
 
     def __str__(self):
         return f"{self.id} - {self.source_file} ({self.source_type})"
+
+
+class MetricCounter(models.Model):
+    """
+    Pre-aggregated ExtractedItem count for one status, source type or
+    day + status (see core.utils.metric_counters), so the metrics
+    endpoints read a few rows instead of grouping the whole item table.
+    """
+    dimension = models.CharField(max_length=10)  # "status", "source" or "day"
+    key = models.CharField(max_length=40)  # e.g. "pending", "invoice", "2025-11-01:pending"
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["dimension", "key"], name="unique_metric_counter"),
+        ]
+
+    @classmethod
+    def record(cls, deltas):
+        metric_counters.record(cls, deltas)
+        if any(deltas.values()):
+            DataVersion.bump(DataVersion.METRICS)
+
+    @classmethod
+    def counts(cls, dimension, keys=None):
+        """
+        {key: count} for one dimension (optionally only `keys`).
+        """
+        counters = cls.objects.filter(dimension=dimension)
+        if keys is not None:
+            counters = counters.filter(key__in=keys)
+        return dict(counters.values_list("key", "count"))
+
+    def __str__(self):
+        return f"{self.dimension} {self.key}: {self.count}"
+
+
+class DataVersion(models.Model):
+    """
+    A cheap "has anything changed?" marker: a number bumped in the same
+    transaction as every write to the data it stands for, with the time
+    of the last bump. Clients (e.g. the metrics ETags) compare one row
+    instead of re-reading the data.
+
+    - "metrics": the MetricCounter counts
+    - "items": any ExtractedItem (or invoice check) write; keys the cached
+      dashboard and detail pages
+    """
+    METRICS = "metrics"
+    ITEMS = "items"
+
+    name = models.CharField(max_length=20, unique=True)
+    version = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def bump(cls, name):
+        now = timezone.now()
+        if not cls.objects.filter(name=name).update(version=models.F("version") + 1, changed_at=now):
+            cls.objects.create(name=name, version=1, changed_at=now)
+
+    @classmethod
+    def current(cls, name):
+        """
+        (version, changed_at) of `name`; (0, None) if it never changed.
+        """
+        return cls.objects.filter(name=name).values_list("version", "changed_at").first() or (0, None)
+
+    @classmethod
+    def stamp(cls, name):
+        """
+        current(name) as a cache key part; changed_at tells a recreated
+        database (counting from 0 again) apart.
+        """
+        version, changed_at = cls.current(name)
+        return f"{version}.{changed_at.timestamp()}" if changed_at else "0"
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class ItemFields(models.Model):
+    """
+    Typed, indexed copy of the common fields of an ExtractedItem's data
+    (see core.utils.item_fields): names, contacts, dates and amounts the
+    dashboard and API filter and sort on without reading the JSON.
+    Rewritten from `data` on every item write.
+    """
+    item = models.OneToOneField(ExtractedItem, on_delete=models.CASCADE, primary_key=True, related_name="typed")
+
+    name = models.CharField(max_length=255, blank=True, default="")  # customer / contact
+    email = models.CharField(max_length=254, blank=True, default="", db_index=True)  # lowercased
+    phone = models.CharField(max_length=50, blank=True, default="", db_index=True)
+    invoice_number = models.CharField(max_length=100, blank=True, default="", db_index=True)
+    date = models.DateField(null=True, blank=True)  # invoice / submission date
+
+    net_total = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    vat_amount = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    total = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        # Sortable columns: (value, item) so ties are ordered by the index too
+        indexes = [
+            models.Index(fields=["name", "item"], name="itemfields_name"),
+            models.Index(fields=["date", "item"], name="itemfields_date"),
+            models.Index(fields=["total", "item"], name="itemfields_total"),
+        ]
+
+    @classmethod
+    def store(cls, rows):
+        item_fields.store(cls, rows)
+
+    def __str__(self):
+        return f"Fields of item {self.item_id}"
+
+
+class CompressionDictionary(models.Model):
+    """
+    Shared zlib dictionary trained on stored raw documents
+    (see core.utils.raw_storage). Kept forever: rows compressed with it
+    refer to it by id.
+    """
+    data = models.BinaryField()
+    samples = models.PositiveIntegerField(default=0)  # documents it was built from
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Dictionary #{self.id} ({len(self.data)} bytes)"
+
+
+class RawDocumentQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # Raw text goes into the search index with the documents
+        with transaction.atomic(using=self.db, savepoint=False):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            search.index_raw([obj.search_row() for obj in objs])
+        return objs
+
+
+class RawDocument(models.Model):
+    """
+    The original HTML/EML of an ExtractedItem, kept out of the item row so
+    lists, metrics and exports never read it; only the detail page and
+    re-parsing load it (item.raw_document.content).
+
+    Stored compressed in `data`; `content` compresses on assignment and
+    decompresses on access.
+    """
+    item = models.OneToOneField(
+        ExtractedItem, on_delete=models.CASCADE, primary_key=True, related_name="raw_document",
+    )
+    data = models.BinaryField()
+    size = models.PositiveIntegerField(default=0)  # uncompressed utf-8 bytes
+
+    objects = RawDocumentQuerySet.as_manager()
+
+    @property
+    def content(self):
+        if "_content" not in self.__dict__:
+            self._content = raw_storage.decompress(self.data)
+        return self._content
+
+    @content.setter
+    def content(self, text):
+        self.data = raw_storage.compress(text)
+        self.size = len(text.encode("utf-8"))
+        self._content = text
+
+    def search_row(self):
+        return self.item_id, self.item.source_type, self.content
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            search.index_raw([self.search_row()])
+
+    def __str__(self):
+        return f"Raw content of item {self.item_id}"
+
+
+class ScanManifestEntry(models.Model):
+    """
+    One row per file seen by the scan pipeline.
+    Loaded once per scan so unchanged files are skipped without
+    reading them or querying ExtractedItem.
+    """
+    path = models.CharField(max_length=512, unique=True)  # relative to dummy_data, e.g. "emails/email_01.eml"
+    size = models.BigIntegerField()
+    mtime_ns = models.BigIntegerField()
+    content_hash = models.CharField(max_length=64)  # sha256 of the raw bytes
+
+    scanned_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.path
+
+
+class ScanJob(models.Model):
+    """
+    A background run of the scan pipeline, with the progress it reports.
+    """
+    STATUS_TYPES = (
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    )
+    ACTIVE_STATUSES = ("queued", "running")
+
+    status = models.CharField(max_length=20, choices=STATUS_TYPES, default="queued")
+
+    files_seen = models.PositiveIntegerField(default=0)
+    parsed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(null=True, blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # heartbeat, bumped on every progress report
+
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    def throughput(self):
+        # Files per second since the job started
+        if not self.started_at:
+            return 0.0
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return round(self.files_seen / elapsed, 2) if elapsed > 0 else 0.0
+
+    def __str__(self):
+        return f"Scan #{self.id} ({self.status})"
+
+
+class Invoice(models.Model):
+    """
+    Typed side of an invoice ExtractedItem: amounts as exact decimals
+    (ExtractedItem.data keeps them as written, e.g. "€1,054.00"), its
+    line items, and the outcome of the consistency checks.
+    """
+    item = models.OneToOneField(ExtractedItem, on_delete=models.CASCADE, related_name="invoice")
+
+    net_total = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    vat_amount = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    total = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+
+    is_consistent = models.BooleanField(null=True)  # None until validated
+    mismatches = models.CharField(max_length=100, blank=True, default="")  # e.g. "lines,vat"
+
+    def __str__(self):
+        return f"Invoice for item {self.item_id}"
+
+
+class InvoiceLine(models.Model):
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name="lines")
+    position = models.PositiveIntegerField()
+
+    description = models.CharField(max_length=255, blank=True, default="")
+    quantity = models.DecimalField(max_digits=12, decimal_places=3, null=True, blank=True)
+    unit_price = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    line_total = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        ordering = ["invoice", "position"]
+
+    def __str__(self):
+        return f"{self.position}. {self.description}"
@@ -0,0 +1,85 @@
+"""
+Size of the SQLite database and how much of it the hot path needs cached.
+
+- file/pages: page_count x page_size, and pages freed but not yet
+  returned to the filesystem (VACUUM does that)
+- tables: bytes per table, its indexes included (dbstat virtual table;
+  empty when SQLite is built without it)
+- cache_pressure: pages of the ExtractedItem table (what lists and metrics
+  scan) over the page cache size; above 1 the scan can't stay cached
+- raw documents: uncompressed vs stored bytes (see core.utils.raw_storage)
+
+storage_stats() reads the whole database (dbstat, every raw document);
+the db_stats command runs it, while the /api/metrics/storage/ endpoint
+serves cached_storage_stats().
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.db.models import Count, Sum
+from django.db.models.functions import Length
+
+from core.models import DataVersion, ExtractedItem, RawDocument
+
+
+def _pragma(cursor, name):
+    cursor.execute(f"PRAGMA {name}")
+    return cursor.fetchone()[0]
+
+
+def _table_sizes(cursor):
+    try:
+        cursor.execute(
+            "SELECT s.tbl_name, SUM(d.pgsize), COUNT(*) FROM dbstat AS d"
+            " JOIN sqlite_schema AS s ON s.name = d.name GROUP BY s.tbl_name"
+        )
+    except DatabaseError:
+        return {}
+    return {table: (size, pages) for table, size, pages in cursor.fetchall()}
+
+
+def storage_stats():
+    with connection.cursor() as cursor:
+        page_size = _pragma(cursor, "page_size")
+        pages = _pragma(cursor, "page_count")
+        free_pages = _pragma(cursor, "freelist_count")
+        cache_size = _pragma(cursor, "cache_size")  # negative: KiB instead of pages
+        tables = _table_sizes(cursor)
+
+    cache_pages = cache_size if cache_size >= 0 else -cache_size * 1024 // page_size
+    hot_pages = tables.get(ExtractedItem._meta.db_table, (0, 0))[1]
+
+    raw = RawDocument.objects.aggregate(
+        documents=Count("pk"), raw_bytes=Sum("size"), stored_bytes=Sum(Length("data")),
+    )
+    raw_bytes = raw["raw_bytes"] or 0
+    stored_bytes = raw["stored_bytes"] or 0
+
+    return {
+        "file_bytes": pages * page_size,
+        "page_size": page_size,
+        "pages": pages,
+        "free_pages": free_pages,
+        "cache_pages": cache_pages,
+        "hot_pages": hot_pages,
+        "cache_pressure": round(hot_pages / cache_pages, 3) if cache_pages else None,
+        "tables": {table: size for table, (size, _) in sorted(tables.items())},
+        "raw_documents": raw["documents"],
+        "raw_bytes": raw_bytes,
+        "stored_bytes": stored_bytes,
+        "compression_ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else None,
+    }
+
+
+def cached_storage_stats():
+    """
+    storage_stats(), recomputed when items (and their raw documents, written
+    with them) change, and at least every STORAGE_STATS_CACHE_SECONDS for
+    writes no version tracks (compress_raw_documents, VACUUM).
+    """
+    key = f"storage_stats:{DataVersion.stamp(DataVersion.ITEMS)}"
+    stats = cache.get(key)
+    if stats is None:
+        stats = storage_stats()
+        cache.set(key, stats, settings.STORAGE_STATS_CACHE_SECONDS)
+    return stats
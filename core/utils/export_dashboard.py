@@ -4,13 +4,17 @@ from pathlib import Path
 import pandas as pd
 from django.conf import settings
 
-from core.models import ExtractedItem
+from core.models import ExtractedItem, InvoiceLine
+from parsers.invoice_parser import parse_amount
 
 EXPORT_PATH = Path(settings.BASE_DIR) / "dashboard_snapshot.xlsx"
 
 # Hints for numeric columns
 NUMERIC_HINTS = ["total", "amount", "vat", "net", "price"]
 
+# Invoice columns taken from the typed Invoice row instead of the written string
+INVOICE_AMOUNTS = {"net total": "net_total", "vat amount": "vat_amount", "total": "total"}
+
 
 def _query_to_dataframe(qs):
     """
@@ -19,7 +23,7 @@ def _query_to_dataframe(qs):
     """
     rows = []
 
-    for item in qs:
+    for item in qs.select_related("invoice"):
         base = {
             "id": item.id,
             "status": item.status,
@@ -29,6 +33,19 @@ def _query_to_dataframe(qs):
         data = item.data or {}
         for k, v in data.items():
             base[k] = v
+
+        # Invoice amounts were parsed to exact decimals at import; invoices
+        # stored before the Invoice table existed have only the written
+        # strings ("€1,054.00"), parsed the same way here
+        invoice = getattr(item, "invoice", None)
+        if invoice is not None:
+            for column, field in INVOICE_AMOUNTS.items():
+                base[column] = getattr(invoice, field)
+        elif item.source_type == "invoice":
+            for column in INVOICE_AMOUNTS:
+                amount = parse_amount(base.get(column))
+                if amount is not None:
+                    base[column] = amount
         rows.append(base)
 
     if not rows:
@@ -36,15 +53,34 @@ def _query_to_dataframe(qs):
 
     df = pd.DataFrame(rows)
 
-    # Convert numeric-looking columns to numbers
+    # Convert numeric-looking columns to numbers, when every value parses;
+    # the typed invoice amounts stay exact Decimals
     for col in df.columns:
         lower = col.lower()
-        if any(hint in lower for hint in NUMERIC_HINTS):
-            df[col] = pd.to_numeric(df[col], errors="ignore")
+        if col in INVOICE_AMOUNTS or not any(hint in lower for hint in NUMERIC_HINTS):
+            continue
+        try:
+            df[col] = pd.to_numeric(df[col])
+        except (ValueError, TypeError):
+            pass
 
     return df
 
 
+def _invoice_lines_dataframe(qs):
+    """
+    Μία γραμμή ανά line item των τιμολογίων του queryset.
+    """
+    lines = InvoiceLine.objects.filter(invoice__item__in=qs).values_list(
+        "invoice__item_id", "invoice__item__source_file", "position",
+        "description", "quantity", "unit_price", "line_total",
+    )
+    return pd.DataFrame(
+        list(lines),
+        columns=["item_id", "source_file", "position", "description", "quantity", "unit price", "line total"],
+    )
+
+
 def build_multi_sheet_workbook(status_filter: str | None = None) -> BytesIO:
     """
     Δημιουργεί multi-sheet Excel με:
@@ -52,6 +88,7 @@ def build_multi_sheet_workbook(status_filter: str | None = None) -> BytesIO:
     - Forms
     - Emails
     - Invoices
+    - Invoice Lines
     Προαιρετικά εφαρμόζει status filter.
     """
     if status_filter and status_filter != "all":
@@ -63,6 +100,7 @@ def build_multi_sheet_workbook(status_filter: str | None = None) -> BytesIO:
     forms_df = _query_to_dataframe(base_qs.filter(source_type="form"))
     emails_df = _query_to_dataframe(base_qs.filter(source_type="email"))
     invoices_df = _query_to_dataframe(base_qs.filter(source_type="invoice"))
+    lines_df = _invoice_lines_dataframe(base_qs.filter(source_type="invoice"))
 
     output = BytesIO()
     with pd.ExcelWriter(output, engine="openpyxl") as writer:
@@ -70,6 +108,7 @@ def build_multi_sheet_workbook(status_filter: str | None = None) -> BytesIO:
         forms_df.to_excel(writer, sheet_name="Forms", index=False)
         emails_df.to_excel(writer, sheet_name="Emails", index=False)
         invoices_df.to_excel(writer, sheet_name="Invoices", index=False)
+        lines_df.to_excel(writer, sheet_name="Invoice Lines", index=False)
 
     output.seek(0)
     return output
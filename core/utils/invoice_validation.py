@@ -0,0 +1,118 @@
+"""
+Consistency checks for invoices, vectorized with pandas.
+
+All arithmetic is on integer cents, so there is no float rounding:
+- lines: sum of the line totals == net total (invoices with line items)
+- vat:   net total x VAT_RATE% == VAT amount, within VAT_TOLERANCE_CENTS
+         (the printed VAT is rounded to the cent)
+- total: net total + VAT amount == total
+
+check_invoices() works on plain frames, so the pipeline can validate a
+chunk before inserting it; validate_invoices() runs the checks over the
+database and stores the result on each Invoice.
+"""
+from decimal import Decimal
+
+import pandas as pd
+
+from core.models import DataVersion, Invoice, InvoiceLine
+from parsers.invoice_parser import MONEY_FIELDS, parse_amount
+
+VAT_RATE = 24
+VAT_TOLERANCE_CENTS = 1
+CHECKS = ("lines", "vat", "total")
+BATCH_SIZE = 1000
+
+
+def to_cents(amount):
+    """
+    Decimal (or None) -> integer cents (or None).
+    """
+    if amount is None:
+        return None
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+def check_invoices(invoices, lines):
+    """
+    `invoices`: frame indexed by invoice key with net, vat, total in cents
+    (missing amounts as None/NA). `lines`: frame with columns key,
+    line_total in cents, one row per line item.
+
+    Returns a frame indexed like `invoices` with lines_sum and one boolean
+    column per check (NA when the check doesn't apply, e.g. no line items
+    or a missing amount), plus is_consistent (NA when no check applied)
+    and mismatches ("lines,vat").
+    """
+    amounts = invoices[["net", "vat", "total"]].astype("Int64")
+    line_totals = lines["line_total"].astype("Int64")
+    sums = line_totals.groupby(lines["key"]).sum(min_count=1)
+    lines_sum = sums.reindex(amounts.index)
+
+    # Half-up rounding of net * rate / 100, exact in integers
+    expected_vat = (amounts["net"] * VAT_RATE + 50) // 100
+
+    result = pd.DataFrame(index=amounts.index)
+    result["lines_sum"] = lines_sum
+    result["lines"] = lines_sum == amounts["net"]
+    result["vat"] = (amounts["vat"] - expected_vat).abs() <= VAT_TOLERANCE_CENTS
+    result["total"] = amounts["net"] + amounts["vat"] == amounts["total"]
+
+    checks = result[list(CHECKS)]
+    failed = checks.eq(False).fillna(False).astype(bool)
+    applied = checks.notna().any(axis=1)
+    result["is_consistent"] = (~failed.any(axis=1)).astype("boolean").where(applied)  # NA: nothing to check
+
+    mismatches = pd.Series("", index=result.index)
+    for check in CHECKS:
+        mismatches = mismatches + failed[check].map({True: check + ",", False: ""})
+    result["mismatches"] = mismatches.str.rstrip(",")
+    return result
+
+
+def validate_invoices(queryset=None):
+    """
+    Check every invoice in `queryset` (default: all) in one pass and store
+    is_consistent / mismatches. Returns the check_invoices() frame.
+    """
+    queryset = Invoice.objects.all() if queryset is None else queryset
+
+    rows = list(queryset.values_list("id", "net_total", "vat_amount", "total"))
+    invoices = pd.DataFrame(
+        [(pk, to_cents(net), to_cents(vat), to_cents(total)) for pk, net, vat, total in rows],
+        columns=["key", "net", "vat", "total"],
+    ).set_index("key")
+    lines = pd.DataFrame(
+        [
+            (key, to_cents(line_total))
+            for key, line_total in InvoiceLine.objects.filter(invoice__in=queryset)
+            .values_list("invoice_id", "line_total")
+        ],
+        columns=["key", "line_total"],
+    )
+
+    result = check_invoices(invoices, lines)
+
+    updates = [
+        Invoice(pk=int(pk), is_consistent=None if pd.isna(consistent) else bool(consistent), mismatches=mismatches)
+        for pk, consistent, mismatches in zip(result.index, result["is_consistent"], result["mismatches"])
+    ]
+    Invoice.objects.bulk_update(updates, ["is_consistent", "mismatches"], batch_size=BATCH_SIZE)
+    if updates:
+        DataVersion.bump(DataVersion.ITEMS)  # the checks are shown on the item pages
+    return result
+
+
+def refresh_invoice_amounts(item):
+    """
+    Re-read the typed amounts of an invoice item from its (possibly edited)
+    display fields and re-run the checks for it.
+    """
+    invoice, _ = Invoice.objects.get_or_create(item=item)
+    data = item.data or {}
+    amounts = {field: parse_amount(data.get(field, "")) for field in MONEY_FIELDS}
+    invoice.net_total = amounts["net total"]
+    invoice.vat_amount = amounts["vat amount"]
+    invoice.total = amounts["total"]
+    invoice.save(update_fields=["net_total", "vat_amount", "total"])
+    validate_invoices(Invoice.objects.filter(pk=invoice.pk))
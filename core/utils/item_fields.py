@@ -0,0 +1,159 @@
+"""
+Typed projection of the common ExtractedItem.data fields (ItemFields).
+
+Each parser writes its own keys ("customer name" / "full name" / "name",
+"date" / "submission date", "€1,054.00"...); project() maps them to one
+set of typed columns, so lists filter and sort on indexed numbers, dates
+and names instead of reading every JSON document:
+
+    name, email, phone, invoice_number, date, net_total, vat_amount, total
+
+ExtractedItem rewrites the projection with `data` on every write (see
+core.models); filter_items() turns dashboard/API query parameters into
+index-backed filters and orderings on it.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+from parsers.invoice_parser import parse_amount
+
+# Projection column -> data keys it is read from, first non-empty wins
+TEXT_FIELDS = {
+    "name": ("customer name", "full name", "name"),
+    "email": ("email",),
+    "phone": ("phone",),
+    "invoice_number": ("invoice number",),
+}
+DATE_KEYS = ("date", "submission date")
+DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d.%m.%Y")
+MONEY_FIELDS = {"net_total": "net total", "vat_amount": "vat amount", "total": "total"}
+PROJECTED_FIELDS = (*TEXT_FIELDS, "date", *MONEY_FIELDS)
+
+MAX_AMOUNT = Decimal("999999999999.99")  # max_digits=14, decimal_places=2
+
+# ?sort= value -> ordering; rows without the value are left out (see filter_items)
+SORTS = {
+    "newest": "-created_at",
+    "oldest": "created_at",
+    "total": "typed__total",
+    "-total": "-typed__total",
+    "date": "typed__date",
+    "-date": "-typed__date",
+    "name": "typed__name",
+    "-name": "-typed__name",
+}
+DEFAULT_SORT = "newest"
+
+
+def _first(data, keys):
+    for key in keys:
+        value = data.get(key)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def parse_date(text):
+    """
+    "26/01/2024", "2024-01-18T16:20", ... -> date, None when unreadable.
+    """
+    text = (text or "").strip().split("T")[0].split(" ")[0]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _money(text):
+    amount = parse_amount(text)
+    if amount is None or abs(amount) > MAX_AMOUNT:
+        return None
+    return amount.quantize(Decimal("0.01"))
+
+
+def project(data):
+    """
+    ExtractedItem.data -> {projection column: typed value}.
+    """
+    data = data or {}
+    values = {field: _first(data, keys) for field, keys in TEXT_FIELDS.items()}
+    values["name"] = values["name"][:255]
+    values["email"] = values["email"].lower()[:254]
+    values["phone"] = values["phone"][:50]
+    values["invoice_number"] = values["invoice_number"][:100]
+    values["date"] = parse_date(_first(data, DATE_KEYS))
+    for field, key in MONEY_FIELDS.items():
+        values[field] = _money(data.get(key))
+    return values
+
+
+def store(model, rows):
+    """
+    Write the projection of (item id, data) rows: one upsert per batch.
+    """
+    objs = [model(item_id=pk, **project(data)) for pk, data in rows]
+    if objs:
+        model.objects.bulk_create(
+            objs, update_conflicts=True, unique_fields=["item"], update_fields=list(PROJECTED_FIELDS),
+        )
+
+
+def _date(text):
+    return date.fromisoformat(text)
+
+
+# Query parameter -> (lookup on ExtractedItem, parser of the value)
+FILTERS = {
+    "min_total": ("typed__total__gte", parse_amount),  # "5000", "5.000,00", "€5,000"
+    "max_total": ("typed__total__lte", parse_amount),
+    "date_from": ("typed__date__gte", _date),
+    "date_to": ("typed__date__lte", _date),
+    "email": ("typed__email", str.lower),
+    "invoice_number": ("typed__invoice_number", str),
+}
+
+
+def filter_items(items, params):
+    """
+    Apply the typed filters and ordering in `params` (request.GET) to an
+    ExtractedItem queryset:
+
+        min_total / max_total   total range (e.g. 5000)
+        date_from / date_to     document date range, YYYY-MM-DD
+        email, invoice_number   exact match
+        sort                    one of SORTS (default: newest first)
+
+    Malformed values are ignored, like unknown statuses. Sorting by a
+    typed column lists only the items that have it, so the ordering runs
+    on that column's index (no NULLs to push to the end).
+    Every ordering ends with the item id, so it is unique and pages can
+    be cut with core.utils.keyset.
+    Returns (queryset, applied) where `applied` holds the values in use.
+    """
+    applied = {}
+    for name, (lookup, parse) in FILTERS.items():
+        text = params.get(name, "").strip()
+        try:
+            value = parse(text) if text else None
+        except ValueError:
+            value = None
+        if value is not None:
+            applied[name] = value
+            items = items.filter(**{lookup: value})
+
+    sort = params.get("sort", DEFAULT_SORT)
+    if sort not in SORTS:
+        sort = DEFAULT_SORT
+    ordering = SORTS[sort]
+    applied["sort"] = sort
+    descending = ordering.startswith("-")
+    column = ordering.lstrip("-")
+    if not column.startswith("typed__"):
+        return items.order_by(ordering, "-id" if descending else "id"), applied
+
+    # Ties are broken by item id, the second column of each sortable index
+    present = {f"{column}__gt": ""} if column == "typed__name" else {f"{column}__isnull": False}
+    tiebreak = "-typed__item_id" if descending else "typed__item_id"
+    return items.filter(**present).order_by(ordering, tiebreak), applied
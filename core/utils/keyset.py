@@ -0,0 +1,88 @@
+"""
+Keyset (cursor) pagination.
+
+A page is the first `size` rows after a cursor, the ordering values of the
+last row of the previous page, instead of OFFSET: the database seeks into
+the ordering index and reads `size` rows, whatever the page number, so
+page N costs the same as page 1 and rows inserted meanwhile don't shift
+the pages.
+
+The queryset must be ordered by exactly two columns in the same direction,
+a sort column and a unique tie-breaker, e.g. ("-created_at", "-id") or
+("typed__total", "typed__item_id"), with an index on both.
+"""
+import base64
+import binascii
+import json
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _plain(value):
+    # Full precision: DjangoJSONEncoder would cut datetimes to milliseconds
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    text = json.dumps([_plain(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != 2:
+        raise InvalidCursor(cursor)
+    return values
+
+
+def _value(obj, path):
+    for name in path.split("__"):
+        obj = getattr(obj, name)
+    return obj
+
+
+def after(items, cursor):
+    """
+    Rows of the ordered queryset `items` that come after `cursor`.
+    """
+    first, second = items.query.order_by
+    descending = first.startswith("-")
+    first, second = first.lstrip("-"), second.lstrip("-")
+    value, tiebreak = decode_cursor(cursor)
+
+    op = "lt" if descending else "gt"
+    # The redundant bound on the sort column gives the index a range to seek to
+    bound = {f"{first}__{'lte' if descending else 'gte'}": value}
+    try:
+        return items.filter(**bound).filter(Q(**{f"{first}__{op}": value}) | Q(**{f"{second}__{op}": tiebreak}))
+    except (ValidationError, TypeError, ValueError):
+        raise InvalidCursor(cursor)
+
+
+def page(items, cursor=None, size=50):
+    """
+    (rows, next cursor) for one page of the ordered queryset `items`;
+    the next cursor is None on the last page. An unreadable cursor raises
+    InvalidCursor.
+    """
+    if cursor:
+        items = after(items, cursor)
+    rows = list(items[:size + 1])
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    last = rows[-1]
+    return rows, encode_cursor([_value(last, field.lstrip("-")) for field in items.query.order_by])
@@ -0,0 +1,89 @@
+"""
+Pre-aggregated item counts for the metrics endpoints (MetricCounter).
+
+Every ExtractedItem counts once in three counters:
+- ("status", <status>)
+- ("source", <source_type>)
+- ("day", "<YYYY-MM-DD>:<status>")   day of created_at, current time zone
+
+ExtractedItem and its queryset keep them in step with every write in the
+same transaction: save/delete, bulk_create, update, bulk_update and
+queryset delete. `manage.py rebuild_metrics` recounts from the items if
+they ever drift (e.g. rows changed with raw SQL).
+
+The functions take the models as arguments; migration 0008 keeps its own
+frozen copy of the counting, so a change of keys here needs a new
+migration (or `rebuild_metrics`), not an edit of that one.
+"""
+from collections import Counter
+
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+COUNTED_ORDER = ("status", "source_type", "created_at")
+COUNTED_FIELDS = set(COUNTED_ORDER)
+
+
+def day_of(created_at):
+    if timezone.is_aware(created_at):
+        created_at = timezone.localtime(created_at)
+    return created_at.date()
+
+
+def day_key(day, status):
+    return f"{day.isoformat()}:{status}"
+
+
+def counter_keys(status, source_type, day):
+    return [("status", status), ("source", source_type), ("day", day_key(day, status))]
+
+
+def tally(items):
+    """
+    Counter of (dimension, key) -> items for an ExtractedItem queryset,
+    counted by the database in one GROUP BY.
+    """
+    counts = Counter()
+    rows = (
+        items.order_by()
+        .annotate(day=TruncDate("created_at"))
+        .values_list("status", "source_type", "day")
+        .annotate(n=Count("pk"))
+    )
+    for status, source_type, day, n in rows:
+        for key in counter_keys(status, source_type, day):
+            counts[key] += n
+    return counts
+
+
+def record(counter_model, deltas):
+    """
+    Add `deltas` ((dimension, key) -> change) to the counters, creating
+    missing ones. Call inside the transaction of the write it mirrors.
+    """
+    for (dimension, key), change in deltas.items():
+        if not change:
+            continue
+        counters = counter_model.objects.filter(dimension=dimension, key=key)
+        if not counters.update(count=F("count") + change):
+            counter_model.objects.create(dimension=dimension, key=key, count=change)
+
+
+def rebuild(counter_model, items):
+    """
+    Replace all counters with a fresh count of `items`. Returns the drift
+    that was repaired: (dimension, key) -> stored - actual, non-zero only.
+    """
+    actual = tally(items)
+    stored = Counter({
+        (dimension, key): count
+        for dimension, key, count in counter_model.objects.values_list("dimension", "key", "count")
+    })
+    drift = {key: stored[key] - actual[key] for key in stored.keys() | actual.keys() if stored[key] != actual[key]}
+
+    counter_model.objects.all().delete()
+    counter_model.objects.bulk_create(
+        [counter_model(dimension=dimension, key=key, count=count) for (dimension, key), count in actual.items()]
+    )
+    return drift
@@ -0,0 +1,174 @@
+"""
+Compressed storage of raw documents (RawDocument.data).
+
+Every stored blob starts with a format byte:
+- PLAIN:     the utf-8 text as is (when compressing doesn't make it smaller)
+- ZLIB:      a zlib stream
+- ZLIB_DICT: a 4-byte CompressionDictionary id, then a zlib stream primed
+             with that shared dictionary
+
+HTML invoices and emails repeat the same CSS, markup and headers, which
+per-document zlib can't exploit on small files; a dictionary built from our
+own documents lets each row refer to that boilerplate instead of storing it.
+Old dictionaries stay in the database, so rows compressed with any of them
+remain readable after retraining.
+
+encode() / decode() / train_dictionary() are plain functions taking the
+dictionaries as arguments (migrations keep frozen copies, so changing the
+format here needs a new migration, not an edit of theirs); compress() /
+decompress() use the stored dictionaries, cached per process.
+"""
+import threading
+import zlib
+from itertools import zip_longest
+
+PLAIN = 0
+ZLIB = 1
+ZLIB_DICT = 2
+
+LEVEL = 9
+DICTIONARY_SIZE = 32 * 1024  # zlib's window: a longer dictionary is never referenced
+TRAINING_SAMPLES = 20  # newest documents per source type a dictionary is built from
+
+_lock = threading.Lock()
+_dictionaries = {}    # id -> bytes, filled on first use
+_current = None       # (id, bytes) used for new rows, or () when there is none
+
+
+def encode(text, dictionary=None):
+    """
+    Text -> stored blob. `dictionary` is an (id, bytes) pair or None.
+    """
+    plain = text.encode("utf-8")
+    if dictionary:
+        dictionary_id, zdict = dictionary
+        compressor = zlib.compressobj(LEVEL, zdict=zdict)
+        blob = bytes([ZLIB_DICT]) + dictionary_id.to_bytes(4, "big") + compressor.compress(plain) + compressor.flush()
+    else:
+        blob = bytes([ZLIB]) + zlib.compress(plain, LEVEL)
+    return blob if len(blob) <= len(plain) else bytes([PLAIN]) + plain
+
+
+def decode(blob, dictionaries):
+    """
+    Stored blob -> text. `dictionaries` maps a dictionary id to its bytes
+    (a dict, or a function for lazy lookups).
+    """
+    blob = bytes(blob)
+    kind, payload = blob[0], blob[1:]
+    if kind == PLAIN:
+        plain = payload
+    elif kind == ZLIB:
+        plain = zlib.decompress(payload)
+    elif kind == ZLIB_DICT:
+        dictionary_id = int.from_bytes(payload[:4], "big")
+        zdict = dictionaries(dictionary_id) if callable(dictionaries) else dictionaries[dictionary_id]
+        decompressor = zlib.decompressobj(zdict=zdict)
+        plain = decompressor.decompress(payload[4:]) + decompressor.flush()
+    else:
+        raise ValueError(f"Unknown raw document format {kind}")
+    return plain.decode("utf-8")
+
+
+def train_dictionary(samples, size=DICTIONARY_SIZE):
+    """
+    Build a shared dictionary from sample documents. `samples` holds one
+    list of texts per document type (most typical first); they are taken
+    round-robin until `size` bytes are filled, so every type gets its share,
+    and concatenated with the first picks last, where zlib reaches them with
+    the shortest distances.
+    """
+    picked = []
+    total = 0
+    for group in zip_longest(*samples):
+        for text in filter(None, group):
+            picked.append(text.encode("utf-8"))
+            total += len(picked[-1])
+        if total >= size:
+            break
+    return b"".join(reversed(picked))[-size:]
+
+
+def dictionary_of(blob):
+    """
+    Id of the dictionary a stored blob was compressed with, or None.
+    """
+    blob = bytes(blob[:5])
+    return int.from_bytes(blob[1:5], "big") if blob[:1] == bytes([ZLIB_DICT]) else None
+
+
+def _dictionary(dictionary_id):
+    zdict = _dictionaries.get(dictionary_id)
+    if zdict is None:
+        from core.models import CompressionDictionary
+
+        zdict = bytes(CompressionDictionary.objects.get(pk=dictionary_id).data)
+        with _lock:
+            _dictionaries[dictionary_id] = zdict
+    return zdict
+
+
+def current_dictionary():
+    """
+    The newest stored dictionary as (id, bytes), or None.
+    """
+    global _current
+    if _current is None:
+        from core.models import CompressionDictionary
+
+        latest = CompressionDictionary.objects.order_by("-id").first()
+        with _lock:
+            _current = (latest.id, bytes(latest.data)) if latest else ()
+            if latest:
+                _dictionaries[latest.id] = _current[1]
+    return _current or None
+
+
+def install_dictionary(dictionary_id, zdict):
+    """
+    Use a newly stored dictionary for the rows this process writes next.
+    """
+    global _current
+    with _lock:
+        _dictionaries[dictionary_id] = bytes(zdict)
+        _current = (dictionary_id, bytes(zdict))
+
+
+def train_stored_dictionary():
+    """
+    Train a dictionary on the newest stored documents of each source type,
+    store it and use it for new rows. Returns (id, bytes), or None when
+    nothing is stored yet.
+    """
+    from core.models import CompressionDictionary, RawDocument
+
+    samples = [
+        [
+            decompress(blob)
+            for blob in RawDocument.objects.filter(item__source_type=source_type)
+            .order_by("-item_id")
+            .values_list("data", flat=True)[:TRAINING_SAMPLES]
+        ]
+        for source_type in RawDocument.objects.values_list("item__source_type", flat=True).distinct()
+    ]
+    if not samples:
+        return None
+    zdict = train_dictionary(samples)
+    stored = CompressionDictionary.objects.create(data=zdict, samples=sum(map(len, samples)))
+    install_dictionary(stored.id, zdict)
+    return stored.id, zdict
+
+
+def reset_cache():
+    global _current
+    with _lock:
+        _dictionaries.clear()
+        _current = None
+
+
+def compress(text):
+    return encode(text, current_dictionary())
+
+
+def decompress(blob):
+    return decode(blob, _dictionary)
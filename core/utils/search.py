@@ -0,0 +1,121 @@
+"""
+Full-text search over items (SQLite FTS5).
+
+core_itemsearch has one row per ExtractedItem (rowid = item id) with three
+columns: the source file name, the values of `data`, and the text of the
+raw document (tags, CSS and MIME encoding stripped). ExtractedItem and
+RawDocument keep it in step from Python on every write (see core.models):
+text is normalized here before indexing, because FTS5's tokenizer lowercases
+Greek but doesn't strip its accents, so "τιμολογιο" would not find
+"Τιμολόγιο". Queries are normalized the same way.
+
+search() ranks matches with bm25, weighting data values over file names
+over raw text.
+"""
+import html
+import re
+import unicodedata
+
+from django.db import connection
+
+from parsers.email_extract import decode_email
+
+TABLE = "core_itemsearch"
+SEARCH_LIMIT = 200
+MAX_TERMS = 10
+WEIGHTS = (2.0, 5.0, 1.0)  # source_file, fields, raw
+
+_WORD = re.compile(r"\w+")
+_INVISIBLE = re.compile(r"<(style|script)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[^>]+>")
+
+
+def normalize(text):
+    """
+    Casefold and strip accents: "Τιμολόγιο" -> "τιμολογιο".
+    """
+    decomposed = unicodedata.normalize("NFD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def fields_text(data):
+    return normalize(" ".join(str(value) for value in (data or {}).values() if value not in (None, "")))
+
+
+def raw_text(source_type, raw):
+    """
+    The searchable text of a raw document: decoded headers and body for
+    emails, visible text for HTML.
+    """
+    if source_type == "email":
+        decoded = decode_email(raw)
+        text = f"{decoded.headers}\n{decoded.body}\n{' '.join(decoded.attachments)}"
+    else:
+        text = html.unescape(_TAG.sub(" ", _INVISIBLE.sub(" ", raw)))
+    return normalize(text)
+
+
+def index_fields(rows):
+    """
+    (item id, source_file, data) rows -> index, keeping the raw text
+    already indexed for them.
+    """
+    rows = [(normalize(source_file), fields_text(data), pk) for pk, source_file, data in rows]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"UPDATE {TABLE} SET source_file = %s, fields = %s WHERE rowid = %s", rows)
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (rowid, source_file, fields, raw)"
+            f" SELECT %s, %s, %s, '' WHERE NOT EXISTS (SELECT 1 FROM {TABLE} WHERE rowid = %s)",
+            [(pk, source_file, fields, pk) for source_file, fields, pk in rows],
+        )
+
+
+def index_raw(rows):
+    """
+    (item id, source_type, raw) rows -> index (the item rows exist already).
+    """
+    rows = [(raw_text(source_type, raw), pk) for pk, source_type, raw in rows]
+    if rows:
+        with connection.cursor() as cursor:
+            cursor.executemany(f"UPDATE {TABLE} SET raw = %s WHERE rowid = %s", rows)
+
+
+def unindex(pks):
+    pks = list(pks)
+    if pks:
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(pk,) for pk in pks])
+
+
+def match_expression(query):
+    """
+    User input -> FTS5 query: every word must match, as a prefix
+    ("comp world" finds "Computer World SA"). "" when there is no word.
+    """
+    terms = _WORD.findall(normalize(query))[:MAX_TERMS]
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search(query, status=None, limit=SEARCH_LIMIT):
+    """
+    Ids of the items matching `query` (optionally only with `status`),
+    best match first.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return []
+    sql = (
+        f"SELECT {TABLE}.rowid FROM {TABLE} JOIN core_extracteditem AS item ON item.id = {TABLE}.rowid"
+        f" WHERE {TABLE} MATCH %s"
+    )
+    params = [expression]
+    if status:
+        sql += " AND item.status = %s"
+        params.append(status)
+    sql += f" ORDER BY bm25({TABLE}, {', '.join(map(str, WEIGHTS))}) LIMIT %s"
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [pk for (pk,) in cursor.fetchall()]
@@ -0,0 +1,50 @@
+"""
+The dashboard metrics, read from the pre-aggregated counters
+(MetricCounter). Served one by one by the /api/metrics/* endpoints and
+together (combined()) by the live metrics stream.
+"""
+from django.utils import timezone
+
+from core.models import MetricCounter
+from core.utils.metric_counters import day_key
+
+STATUSES = ("pending", "approved", "rejected", "error")
+DAYS = 14
+
+
+def status_counts():
+    data = MetricCounter.counts("status")
+
+    # Ensure missing statuses return 0
+    for key in STATUSES:
+        data.setdefault(key, 0)
+    return data
+
+
+def source_counts():
+    return {source: count for source, count in MetricCounter.counts("source").items() if count}
+
+
+def daily_counts():
+    """
+    Counts per status for each of the last DAYS days, oldest first.
+    """
+    today = timezone.now().date()
+    start_date = today - timezone.timedelta(days=DAYS - 1)
+    days = [start_date + timezone.timedelta(days=i) for i in range(DAYS)]
+
+    # One counter per day + status: at most DAYS x 4 rows, whatever the table size
+    counts = MetricCounter.counts("day", [day_key(d, status) for d in days for status in STATUSES])
+
+    # Normalize all days (even if no data)
+    result = []
+    for d in days:
+        base = {"date": d.isoformat()}
+        for status in STATUSES:
+            base[status] = counts.get(day_key(d, status), 0)
+        result.append(base)
+    return result
+
+
+def combined():
+    return {"status": status_counts(), "source": source_counts(), "daily": daily_counts()}
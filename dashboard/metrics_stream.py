@@ -0,0 +1,138 @@
+"""
+Live dashboard metrics over Server-Sent Events (/api/metrics/stream/).
+
+Each open dashboard holds one connection instead of polling the three
+metrics endpoints. Every event is a "metrics" event carrying
+dashboard.metrics.combined(), with the data version as its id.
+
+Under ASGI (asgi.py) the connection stays open. One watcher task per
+process (per event loop) reads DataVersion "metrics" every
+METRICS_STREAM_POLL_SECONDS while any stream is open, and builds the
+payload once when it moves. Every stream then pushes it, at most once
+per METRICS_STREAM_MIN_INTERVAL: a burst of writes such as a scan
+collapses into the latest counts. Writes from other processes (scan
+workers, manage.py) are seen as well, since the marker lives in the
+database. Idle streams send a comment line every
+METRICS_STREAM_HEARTBEAT_SECONDS so proxies keep them open, and end
+after METRICS_STREAM_MAX_SECONDS. EventSource then reconnects with
+Last-Event-ID, and a client that is already up to date gets nothing
+until the next change.
+
+A WSGI server (runserver) can't hold the connection without buffering
+it whole. There a stream sends the current payload once, or nothing when
+Last-Event-ID is current, and ends. EventSource reconnects after
+METRICS_STREAM_RETRY_MS, which amounts to polling with a conditional
+request.
+"""
+import asyncio
+import json
+import logging
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from core.models import DataVersion
+from dashboard import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def current_event_id():
+    # The daily window moves at midnight, so the day is part of the id
+    version, _ = DataVersion.current(DataVersion.METRICS)
+    return f"{version}-{timezone.now().date().isoformat()}"
+
+
+def format_event(event_id, payload):
+    return f"event: metrics\nid: {event_id}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _retry():
+    return f"retry: {settings.METRICS_STREAM_RETRY_MS}\n\n"
+
+
+class _Watcher:
+    """
+    Polls the metrics version for the open streams of one event loop.
+    """
+
+    def __init__(self):
+        self.event_id = None
+        self.payload = None
+        self.changed = asyncio.Event()  # replaced by a fresh one after every change
+        self.streams = 0
+        self._task = None
+
+    def subscribe(self):
+        self.streams += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def unsubscribe(self):
+        self.streams -= 1
+
+    async def _run(self):
+        while self.streams > 0:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Reading the metrics version failed")
+            await asyncio.sleep(settings.METRICS_STREAM_POLL_SECONDS)
+
+    async def refresh(self):
+        event_id = await sync_to_async(current_event_id)()
+        if event_id == self.event_id:
+            return
+        self.payload = await sync_to_async(metrics.combined)()
+        self.event_id = event_id
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+_watchers = weakref.WeakKeyDictionary()  # event loop -> _Watcher
+
+
+def _watcher():
+    loop = asyncio.get_running_loop()
+    if loop not in _watchers:
+        _watchers[loop] = _Watcher()
+    return _watchers[loop]
+
+
+async def events(last_event_id=None):
+    """
+    The ASGI stream: SSE text chunks, until METRICS_STREAM_MAX_SECONDS
+    or the client goes away.
+    """
+    watcher = _watcher()
+    watcher.subscribe()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.METRICS_STREAM_MAX_SECONDS
+    sent = last_event_id
+    try:
+        yield _retry()
+        while loop.time() < deadline:
+            if watcher.payload is not None and watcher.event_id != sent:
+                sent = watcher.event_id
+                yield format_event(sent, watcher.payload)
+                await asyncio.sleep(settings.METRICS_STREAM_MIN_INTERVAL)  # coalesce bursts
+                continue
+            timeout = min(settings.METRICS_STREAM_HEARTBEAT_SECONDS, max(deadline - loop.time(), 0))
+            try:
+                await asyncio.wait_for(watcher.changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+    finally:
+        watcher.unsubscribe()
+
+
+def single_event(last_event_id=None):
+    """
+    The WSGI stream: the current payload, unless the client has it.
+    """
+    yield _retry()
+    event_id = current_event_id()
+    if event_id != last_event_id:
+        yield format_event(event_id, metrics.combined())
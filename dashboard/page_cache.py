@@ -0,0 +1,82 @@
+"""
+Rendered dashboard and detail pages, cached (CACHES["pages"]) under the
+ExtractedItem data version (DataVersion "items"), so reviewers looking
+at the same list share one render instead of each running its queries
+and the template.
+
+Keys hold the version and the page's query string (status filter,
+cursor, search, filters, sort). Every item create, edit, status change
+or delete bumps the version, so the next request renders afresh under
+a new key; stale entries are never read again and age out
+(PAGE_CACHE_SECONDS, or the backend's MAX_ENTRIES). The version lives
+in the database, so writes from scan workers and other processes count
+too, and a locmem cache per process stays correct.
+
+Per-request parts stay out of the cache: the CSRF token is rendered as
+a placeholder and filled in per response, and a request with flash
+messages to show is rendered normally.
+"""
+import hashlib
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+
+from core.models import DataVersion
+
+CSRF_PLACEHOLDER = "__page_cache_csrf_token__"
+
+_lock = threading.Lock()
+_counters = Counter(hits=0, misses=0, bypassed=0)
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def page_key(name, request, *parts):
+    """
+    Cache key of page `name` for this request at the current items
+    version; `parts` are extra inputs of the page besides its query string.
+    """
+    query = sorted(request.GET.lists())
+    digest = hashlib.sha1(repr((query, parts)).encode()).hexdigest()
+    return f"page:{name}:{DataVersion.stamp(DataVersion.ITEMS)}:{digest}"
+
+
+def render_page(request, template_name, key, get_context):
+    """
+    The response for `template_name`, rendered from get_context() on a
+    miss, or straight from the cache under `key`.
+    """
+    if request.method not in ("GET", "HEAD") or len(get_messages(request)):
+        _count("bypassed")
+        return HttpResponse(render_to_string(template_name, get_context(), request))
+
+    cache = caches["pages"]
+    html = cache.get(key)
+    if html is None:
+        _count("misses")
+        context = dict(get_context(), csrf_token=CSRF_PLACEHOLDER, messages=())
+        html = render_to_string(template_name, context, request)
+        cache.set(key, html, settings.PAGE_CACHE_SECONDS)
+    else:
+        _count("hits")
+    return HttpResponse(html.replace(CSRF_PLACEHOLDER, get_token(request)))
+
+
+def stats():
+    """
+    Hit/miss counters for this process.
+    """
+    with _lock:
+        stats = dict(_counters)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    return stats
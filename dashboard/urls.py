@@ -7,9 +7,19 @@ urlpatterns = [
     path("scan/", views.scan, name="scan"),
     path("item/<int:pk>/", views.detail, name="detail"),
     path("export/", views.export_items, name="export_items"),
+    path("api/items/", views.items_api, name="items_api"),
 
     # Metrics API endpoints
     path("api/metrics/status/", views.metrics_status_counts, name="metrics_status"),
     path("api/metrics/source/", views.metrics_source_counts, name="metrics_source"),
     path("api/metrics/daily/", views.metrics_daily_counts, name="metrics_daily"),
+    path("api/metrics/stream/", views.metrics_stream, name="metrics_stream"),
+    path("api/metrics/parsers/", views.metrics_parser_timings, name="metrics_parsers"),
+    path("api/metrics/llm-cache/", views.metrics_llm_cache, name="metrics_llm_cache"),
+    path("api/metrics/page-cache/", views.metrics_page_cache, name="metrics_page_cache"),
+    path("api/metrics/classifier/", views.metrics_email_classifier, name="metrics_classifier"),
+    path("api/metrics/storage/", views.metrics_storage, name="metrics_storage"),
+
+    # Scan job progress
+    path("api/scan/<int:pk>/", views.scan_status, name="scan_status"),
 ]
@@ -1,57 +1,228 @@
 import logging
+from django.conf import settings
 from django.contrib import messages
-from django.shortcuts import render, redirect, get_object_or_404
-from core.models import ExtractedItem
-from parsers.pipeline import run_full_scan
+from django.shortcuts import redirect, get_object_or_404
+from core.models import DataVersion, ExtractedItem, ScanJob
+from parsers.jobs import active_scan_job, start_scan_job
+from parsers.email_parser import classification_cache, classifier_stats
+from parsers.registry import registry
 from core.utils.export_dashboard import build_multi_sheet_workbook, update_dashboard_snapshot
+from core.utils.db_stats import cached_storage_stats
+from core.utils.invoice_validation import refresh_invoice_amounts
+from core.utils import keyset
+from core.utils.item_fields import PROJECTED_FIELDS, SORTS, filter_items
+from core.utils.search import search as search_items
+from dashboard import metrics, page_cache
+from dashboard import metrics_stream as live_metrics
 
 # Initialize module-level logger
 logger = logging.getLogger(__name__)
 
-from django.http import HttpResponse, JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.utils import timezone
-from django.db.models import Count
-from django.db.models.functions import TruncDate
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+# ExtractedItem columns rendered by the dashboard table
+LIST_FIELDS = ("id", "source_type", "source_file", "status", "created_at")
+TYPED_LIST_FIELDS = tuple(f"typed__{field}" for field in PROJECTED_FIELDS)
+
+# Dashboard sort options (see core.utils.item_fields.SORTS); the blank default
+# keeps search results in relevance order and other lists newest first
+SORT_LABELS = (
+    ("", "Best match / newest"),
+    ("newest", "Newest first"),
+    ("oldest", "Oldest first"),
+    ("-total", "Total: high to low"),
+    ("total", "Total: low to high"),
+    ("-date", "Date: newest"),
+    ("date", "Date: oldest"),
+    ("name", "Name: A-Z"),
+    ("-name", "Name: Z-A"),
+)
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get("limit", settings.DASHBOARD_PAGE_SIZE))
+    except ValueError:
+        size = settings.DASHBOARD_PAGE_SIZE
+    return min(max(size, 1), settings.DASHBOARD_MAX_PAGE_SIZE)
+
+
+def _list_items(request, default_status):
+    """
+    One page of items for the dashboard / items API, from the request's
+    query params: status, full-text search (?q=, best matches first unless
+    one of SORTS is given), the typed filters and sort of
+    core.utils.item_fields, and keyset pagination (?after=<cursor>, ?limit=).
+    Returns (items, next cursor, status, query).
+    """
+    query = request.GET.get("q", "").strip()
+
+    # Read the status filter from query params ('all' when searching); ?tab= is
+    # the status tab the filter form was sent from, kept by filters but not searches
+    status_filter = request.GET.get("status") or ("all" if query else request.GET.get("tab") or default_status)
+
+    # Only the columns the table shows are loaded
+    items = ExtractedItem.objects.select_related("typed").only(*LIST_FIELDS, *TYPED_LIST_FIELDS)
+    items, _ = filter_items(items, request.GET)
+    if query:
+        # Search results are a single ranked page (at most SEARCH_LIMIT)
+        ranked = search_items(query, status=None if status_filter == "all" else status_filter)
+        if request.GET.get("sort") in SORTS:
+            return list(items.filter(pk__in=ranked)), None, status_filter, query
+        found = items.in_bulk(ranked)
+        return [found[pk] for pk in ranked if pk in found], None, status_filter, query
+
+    if status_filter != "all":
+        items = items.filter(status=status_filter)
+    try:
+        items, next_cursor = keyset.page(items, request.GET.get("after"), _page_size(request))
+    except keyset.InvalidCursor:
+        # Stale or mangled link: back to the first page
+        items, next_cursor = keyset.page(items, None, _page_size(request))
+    return items, next_cursor, status_filter, query
 
 
 def dashboard(request):
     """
     Render the main dashboard page.
-    Allows filtering items by status (pending, approved, rejected, error, all).
+    Allows filtering items by status (pending, approved, rejected, error, all),
+    full-text search (?q=) over extracted data and raw documents, and
+    range filters / sorting on the typed fields (total, date, name).
+    Lists one page at a time (keyset pagination, see core.utils.keyset).
+    Rendered pages are cached until an item changes (dashboard/page_cache.py).
     """
-    # Read the status filter from query params (default: 'pending')
-    status_filter = request.GET.get("status", "pending")
+    # The scan banner is read every time: jobs start and end without item writes
+    active_job = active_scan_job()
+
+    def context():
+        items, next_cursor, status_filter, query = _list_items(request, "pending")
+
+        # Page links keep every other param; status links also start from page 1
+        first_params = request.GET.copy()
+        first_params.pop("after", None)
+        next_params = request.GET.copy()
+        next_params["after"] = next_cursor
+        params = first_params.copy()
+        params.pop("status", None)
+
+        return {
+            "items": items,
+            "current_status": status_filter,
+            "query": query,
+            "filter_query": params.urlencode(),
+            "next_query": next_params.urlencode() if next_cursor else "",
+            "first_query": first_params.urlencode() if "after" in request.GET else "",
+            "sort": request.GET.get("sort") if request.GET.get("sort") in SORTS else "",
+            "sorts": SORT_LABELS,
+            "active_job": active_job,
+        }
 
-    # Apply filtering logic
-    if status_filter == "all":
-        items = ExtractedItem.objects.all().order_by("-created_at")
-    else:
-        items = ExtractedItem.objects.filter(status=status_filter).order_by("-created_at")
+    job = (active_job.pk, active_job.updated_at) if active_job else None
+    key = page_cache.page_key("dashboard", request, job)
+    return page_cache.render_page(request, "dashboard.html", key, context)
 
-    # Return dashboard template with context
-    return render(request, "dashboard.html", {
-        "items": items,
-        "current_status": status_filter,
-    })
+
+def items_api(request):
+    """
+    API endpoint:
+    Returns one page of items with their typed fields, filtered and sorted
+    like the dashboard: ?status= (default all), ?q=, ?min_total=,
+    ?max_total=, ?date_from=, ?date_to=, ?email=, ?invoice_number=,
+    ?sort=, ?limit= (default DASHBOARD_PAGE_SIZE). "next" is the ?after=
+    value of the following page, null on the last one.
+    Example:
+    {
+        "items": [
+            {"id": 12, "source_type": "invoice", "source_file": "invoice_3.html",
+             "status": "pending", "created_at": "2025-11-01T10:00:00+00:00",
+             "name": "Computer World SA", "email": "", "phone": "",
+             "invoice_number": "TF-2024-003", "date": "2024-01-26",
+             "net_total": "850.00", "vat_amount": "204.00", "total": "1054.00"},
+            ...
+        ],
+        "next": "WyIyMDI1LTExLTAxVDEwOjAwOjAwKzAwOjAwIiwxMl0"
+    }
+    """
+    items, next_cursor, _, _ = _list_items(request, "all")
+
+    rows = []
+    for item in items:
+        row = {field: getattr(item, field) for field in LIST_FIELDS}
+        typed = getattr(item, "typed", None)  # None only for items never written through the ORM
+        row.update({field: getattr(typed, field, None) for field in PROJECTED_FIELDS})
+        rows.append(row)
+    return JsonResponse({"items": rows, "next": next_cursor})
 
 
 def scan(request):
     """
-    Trigger the full data extraction pipeline.
-    Reads all dummy_data, extracts fields, populates DB.
-    Includes exception handling and user feedback.
+    Queue the data extraction pipeline as a background job and return at once.
+    Only one scan runs at a time: while a job is active, that job is reported
+    instead of starting another.
+    API clients (Accept: application/json) get the job id as JSON,
+    browsers are redirected to the dashboard, which polls the job.
     """
+    wants_json = "application/json" in request.headers.get("Accept", "")
+
     try:
-        # Run extraction pipeline for forms/emails/invoices
-        created, errors = run_full_scan()
-        messages.info(request, f"Scan completed: {created} items, {errors} errors.")
+        job, started = start_scan_job()
     except Exception as e:
         # Log and show error to the UI
         logger.exception("Scan failed")
+        if wants_json:
+            return JsonResponse({"error": str(e)}, status=500)
         messages.error(request, f"Scan failed: {e}")
+        return redirect("dashboard")
+
+    if wants_json:
+        return JsonResponse(
+            {"job_id": job.id, "started": started, "status_url": reverse("scan_status", args=[job.id])},
+            status=202 if started else 409,
+        )
+
+    if started:
+        messages.info(request, f"Scan #{job.id} started.")
+    else:
+        messages.warning(request, f"Scan #{job.id} is already running.")
     return redirect("dashboard")
 
 
+def scan_status(request, pk):
+    """
+    API endpoint:
+    Returns the progress of a scan job.
+    Polled by the dashboard while a scan is running.
+    Example:
+    {
+        "id": 3,
+        "status": "running",
+        "files_seen": 1200,
+        "parsed": 500,
+        "failed": 2,
+        "throughput": 85.3,
+        "error": null
+    }
+    """
+    job = get_object_or_404(ScanJob, pk=pk)
+    return JsonResponse({
+        "id": job.id,
+        "status": job.status,
+        "files_seen": job.files_seen,
+        "parsed": job.parsed,
+        "failed": job.failed,
+        "throughput": job.throughput(),  # files per second
+        "error": job.error_message,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    })
+
+
 def export_items(request):
     """
     Export the DB contents into a multi-sheet XLSX file.
@@ -87,10 +258,13 @@ def detail(request, pk):
       - Save as pending
     Performs auto-update of the Excel dashboard on every modification.
     """
-    # Load requested object or 404
-    item = get_object_or_404(ExtractedItem, pk=pk)
+    def load():
+        # Requested object or 404; the raw document is only read here
+        return get_object_or_404(ExtractedItem.objects.select_related("raw_document"), pk=pk)
 
     if request.method == "POST":
+        item = load()
+
         # Extract all POST form fields except control variables
         updated_data = {
             k: v for k, v in request.POST.items()
@@ -112,8 +286,14 @@ def detail(request, pk):
             item.status = "pending"
             messages.info(request, "Item saved as pending.")
 
-        # Save changes
-        item.save()
+        # Save changes; invoice amounts and checks commit with the item, so a
+        # page cached for the new version (dashboard/page_cache.py) shows both
+        with transaction.atomic():
+            item.save()
+
+            # Edited invoice amounts → typed amounts and checks follow
+            if item.source_type == "invoice":
+                refresh_invoice_amounts(item)
 
         # Auto-update Excel snapshot — non-blocking, silent on failure
         try:
@@ -124,10 +304,47 @@ def detail(request, pk):
 
         return redirect("dashboard")
 
-    # Render detail page (GET)
-    return render(request, "detail.html", {"item": item})
+    # Render detail page (GET), cached until an item changes
+    key = page_cache.page_key("detail", request, pk)
+    return page_cache.render_page(request, "detail.html", key, lambda: {"item": load()})
+
+
+def _metrics_version(request):
+    # Read once per request, shared by the ETag and Last-Modified functions
+    if not hasattr(request, "_metrics_version"):
+        request._metrics_version = DataVersion.current(DataVersion.METRICS)
+    return request._metrics_version
 
 
+def _metrics_etag(request):
+    version, _ = _metrics_version(request)
+    return f"metrics-{version}"
+
+
+def _metrics_last_modified(request):
+    _, changed_at = _metrics_version(request)
+    return changed_at
+
+
+def _daily_metrics_etag(request):
+    # The 14-day window moves at midnight even when no item changes
+    return f"{_metrics_etag(request)}-{timezone.now().date().isoformat()}"
+
+
+def _daily_metrics_last_modified(request):
+    changed_at = _metrics_last_modified(request)
+    midnight = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(changed_at, midnight) if changed_at else midnight
+
+
+# Metrics responses carry validators derived from DataVersion "metrics":
+# a poll with If-None-Match / If-Modified-Since costs one row read and gets
+# 304 when no counter changed. no-cache: browsers must always revalidate.
+metrics_conditional = condition(etag_func=_metrics_etag, last_modified_func=_metrics_last_modified)
+
+
+@cache_control(no_cache=True)
+@metrics_conditional
 def metrics_status_counts(request):
     """
     API endpoint:
@@ -141,23 +358,12 @@ def metrics_status_counts(request):
         "error": 2
     }
     """
-    # Aggregate DB entries by status
-    qs = (
-        ExtractedItem.objects
-        .values("status")
-        .annotate(count=Count("id"))
-    )
-
-    # Convert queryset into simple dict
-    data = {row["status"]: row["count"] for row in qs}
-
-    # Ensure missing statuses return 0
-    for key in ["pending", "approved", "rejected", "error"]:
-        data.setdefault(key, 0)
-
-    return JsonResponse(data)
+    # Pre-aggregated counters, kept in step with every item write
+    return JsonResponse(metrics.status_counts())
 
 
+@cache_control(no_cache=True)
+@metrics_conditional
 def metrics_source_counts(request):
     """
     API endpoint:
@@ -169,16 +375,11 @@ def metrics_source_counts(request):
         "invoice": 10
     }
     """
-    qs = (
-        ExtractedItem.objects
-        .values("source_type")
-        .annotate(count=Count("id"))
-    )
-
-    data = {row["source_type"]: row["count"] for row in qs}
-    return JsonResponse(data)
+    return JsonResponse(metrics.source_counts())
 
 
+@cache_control(no_cache=True)
+@condition(etag_func=_daily_metrics_etag, last_modified_func=_daily_metrics_last_modified)
 def metrics_daily_counts(request):
     """
     API endpoint:
@@ -190,41 +391,99 @@ def metrics_daily_counts(request):
       ...
     ]
     """
-    today = timezone.now().date()
-    start_date = today - timezone.timedelta(days=13)
-
-    # Query: group by date + status
-    qs = (
-        ExtractedItem.objects
-        .filter(created_at__date__gte=start_date)
-        .annotate(day=TruncDate("created_at"))
-        .values("day", "status")
-        .annotate(count=Count("id"))
-        .order_by("day")
-    )
-
-    # Build dictionary: day -> {status -> count}
-    days_map = {}
-    for row in qs:
-        day = row["day"]
-        status = row["status"]
-        count = row["count"]
-
-        # Ensure structure exists
-        days_map.setdefault(day, {"pending": 0, "approved": 0, "rejected": 0, "error": 0})
-        days_map[day][status] = count
-
-    # Normalize all 14 days (even if no data)
-    result = []
-    for i in range(14):
-        d = start_date + timezone.timedelta(days=i)
-        base = {"date": d.isoformat(), "pending": 0, "approved": 0, "rejected": 0, "error": 0}
-
-        # If we have data for that day, merge it
-        if d in days_map:
-            base.update(days_map[d])
-
-        result.append(base)
-
     # Return list of dicts
-    return JsonResponse(result, safe=False)
+    return JsonResponse(metrics.daily_counts(), safe=False)
+
+
+def metrics_stream(request):
+    """
+    API endpoint (Server-Sent Events):
+    Streams the status, source and daily metrics as one "metrics" event
+    whenever items are created or change status, at most every
+    METRICS_STREAM_MIN_INTERVAL seconds (see dashboard/metrics_stream.py).
+    Example event:
+        event: metrics
+        id: 42-2025-11-01
+        data: {"status": {"pending": 5, ...}, "source": {"form": 5, ...}, "daily": [...]}
+    """
+    last_event_id = request.headers.get("Last-Event-ID")
+    if isinstance(request, ASGIRequest):
+        content = live_metrics.events(last_event_id)
+    else:
+        content = live_metrics.single_event(last_event_id)
+    response = StreamingHttpResponse(content, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: pass events through unbuffered
+    return response
+
+
+def metrics_parser_timings(request):
+    """
+    API endpoint:
+    Returns call counts and cumulative parse time per parser since the
+    process started, to see which document type dominates scan time.
+    Example:
+    {
+        "invoice": {"calls": 10, "errors": 0, "seconds": 0.084},
+        ...
+    }
+    """
+    return JsonResponse(registry.stats())
+
+
+def metrics_llm_cache(request):
+    """
+    API endpoint:
+    Returns hit/miss counters of the Gemini classification cache
+    for this process, plus the number of cached entries per tier.
+    Example:
+    {
+        "memory_hits": 40, "disk_hits": 10, "misses": 2, "hit_rate": 0.962,
+        "memory_entries": 50, "disk_entries": 312
+    }
+    """
+    return JsonResponse(classification_cache.stats())
+
+
+def metrics_page_cache(request):
+    """
+    API endpoint:
+    Returns hit/miss counters of the dashboard and detail page cache
+    for this process; "bypassed" pages (POSTs, flash messages) skip it.
+    Example:
+    {"hits": 420, "misses": 35, "bypassed": 12, "hit_rate": 0.923}
+    """
+    return JsonResponse(page_cache.stats())
+
+
+def metrics_email_classifier(request):
+    """
+    API endpoint:
+    Returns how many emails the offline classifier answered vs. sent to
+    Gemini in this process, with its threshold and training size.
+    Example:
+    {
+        "local": 180, "llm": 20, "local_share": 0.9,
+        "threshold": 0.9, "training_examples": 450
+    }
+    """
+    return JsonResponse(classifier_stats())
+
+
+def metrics_storage(request):
+    """
+    API endpoint:
+    Returns the database file size, bytes per table, how many page-cache
+    pages the item table needs, and the raw document compression ratio.
+    Cached until items change (at most STORAGE_STATS_CACHE_SECONDS);
+    `manage.py db_stats` reads the live numbers.
+    Example:
+    {
+        "file_bytes": 52428800, "free_pages": 12,
+        "cache_pages": 500, "hot_pages": 310, "cache_pressure": 0.62,
+        "tables": {"core_extracteditem": 1269760, ...},
+        "raw_documents": 100000, "raw_bytes": 400000000,
+        "stored_bytes": 41000000, "compression_ratio": 9.76
+    }
+    """
+    return JsonResponse(cached_storage_stats())
@@ -0,0 +1,133 @@
+"""
+Single-pass extraction of contact details from .eml files.
+
+decode_email() parses the message with the stdlib `email` package, so
+base64 / quoted-printable bodies and RFC 2047 headers are decoded, and
+attachment payloads are skipped (only their filenames are kept).
+
+extract_contact() then walks the decoded headers and body once with one precompiled
+scanner that recognises labelled fields (Name/Όνομα, Email,
+Phone/Κινητό/Τηλέφωνο), bare email addresses and Greek phone numbers.
+The first labelled value wins; bare addresses and numbers are the
+fallback when a field has no label, as before.
+
+Kept free of Django so it runs inside scan worker processes.
+"""
+import email
+import email.policy
+import html
+import re
+from collections import namedtuple
+
+DecodedEmail = namedtuple("DecodedEmail", "headers subject body attachments")
+
+GENERIC_PREFIXES = ("info@", "contact@", "support@")
+
+_LABELS = {
+    "name": ("Name", "Όνομα"),
+    "email": ("Email",),
+    "phone": ("Phone", "Κινητό", "Τηλέφωνο"),
+}
+
+# The labelled value is captured inside a lookahead, so the scan resumes
+# right after the label and still sees addresses/numbers within the value.
+_SCANNER = re.compile(
+    "|".join(
+        [
+            rf"(?:{'|'.join(labels)}):\s*(?=(?P<{field}>.*))"
+            for field, labels in _LABELS.items()
+        ]
+        + [
+            r"(?P<address>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)",
+            # Greek phones (mobile: 69XX-XXXXXX, landline: 2XXX-XXXXXX)
+            r"(?P<number>(?:\+30\s?)?(?:69\d{2}[-\s]?\d{3}[-\s]?\d{3}|2[1-8]\d{2}[-\s]?\d{3}[-\s]?\d{3}))",
+        ]
+    ),
+    re.IGNORECASE,
+)
+
+_BLOCK_TAG = re.compile(r"<\s*/?\s*(?:br|p|div|tr|li|h\d)\b[^>]*>", re.IGNORECASE)
+_TAG = re.compile(r"<[^>]+>")
+
+
+def _part_text(part):
+    try:
+        return part.get_content()
+    except (LookupError, UnicodeError):
+        payload = part.get_payload(decode=True) or b""
+        return payload.decode("utf-8", errors="ignore")
+
+
+def decode_email(raw):
+    """
+    Parse a raw message into DecodedEmail(headers, subject, body, attachments).
+
+    `headers` is the top-level header block as "Name: value" lines, `body`
+    the text/plain parts (or tag-stripped text/html when there is no plain
+    part), `attachments` the filenames of skipped parts. Text without a
+    header block is returned unchanged as the body.
+    """
+    message = email.message_from_bytes(raw.encode("utf-8"), policy=email.policy.default)
+    if not message.keys():
+        return DecodedEmail("", "", raw, [])
+
+    plain, markup, attachments = [], [], []
+    for part in message.walk():
+        if part.is_multipart():
+            continue
+        if part.get_content_disposition() == "attachment" or part.get_content_maintype() != "text":
+            attachments.append(part.get_filename() or part.get_content_type())
+            continue
+        if part.get_content_subtype() == "html":
+            markup.append(_part_text(part))
+        else:
+            plain.append(_part_text(part))
+
+    if plain:
+        body = "\n".join(plain)
+    else:
+        text = _BLOCK_TAG.sub("\n", "\n".join(markup))
+        body = html.unescape(_TAG.sub("", text))
+
+    headers = "\n".join(f"{name}: {value}" for name, value in message.items())
+    return DecodedEmail(headers, str(message.get("Subject", "")), body, attachments)
+
+
+def classification_text(decoded):
+    """
+    What a classifier should read: subject, decoded body and attachment
+    names (e.g. "invoice_TF-2024-002.pdf" is a strong hint), without
+    encoded payloads.
+    """
+    return "\n".join(filter(None, [decoded.subject, decoded.body, *decoded.attachments]))
+
+
+def extract_contact(decoded):
+    """
+    Return {"name", "email", "phone"} (only the keys found) from a
+    DecodedEmail's headers and body in one scan.
+    """
+    text = f"{decoded.headers}\n\n{decoded.body}"
+    labelled = {}
+    addresses = []
+    number = None
+
+    for match in _SCANNER.finditer(text):
+        kind = match.lastgroup
+        if kind == "address":
+            addresses.append(match.group("address"))
+        elif kind == "number":
+            if number is None:
+                number = match.group("number").strip()
+        elif kind not in labelled:
+            labelled[kind] = match.group(kind).strip()
+
+    data = {field: labelled[field] for field in _LABELS if labelled.get(field)}
+
+    if not data.get("email") and addresses:
+        personal = [address for address in addresses if not address.startswith(GENERIC_PREFIXES)]
+        data["email"] = (personal or addresses)[0]
+    if not data.get("phone") and number:
+        data["phone"] = number
+    return data
+
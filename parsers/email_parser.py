@@ -1,35 +1,53 @@
-import re
 import os
+import logging
+import pathlib
+import threading
+import importlib
 from dotenv import load_dotenv
-import google.generativeai as genai
+
+from parsers.email_extract import classification_text, decode_email, extract_contact
+from parsers.llm_batch import run_batch
+from parsers.llm_cache import ClassificationCache, cache_key
+from parsers.local_classifier import LocalEmailClassifier
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()  # Load GOOGLE_API_KEY and GEMINI_MODEL from .env
 
-# Configure Gemini
+# Gemini settings; the SDK itself is only imported on the first LLM call (get_gemini_model)
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
 
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
+# Classification cache: in-process LRU + shared SQLite file (empty path = memory only)
+classification_cache = ClassificationCache(
+    path=os.getenv(
+        "GEMINI_CACHE_PATH",
+        str(pathlib.Path(__file__).resolve().parent.parent / "gemini_cache.sqlite3"),
+    ),
+    ttl=int(os.getenv("GEMINI_CACHE_TTL", str(30 * 24 * 3600))),
+    max_memory=int(os.getenv("GEMINI_CACHE_SIZE", "1024")),
+    max_rows=int(os.getenv("GEMINI_CACHE_MAX_ROWS", "100000")),
+)
 
-def safe_search(pattern, text):
-    m = re.search(pattern, text, re.IGNORECASE)
-    if m:
-        return m.group(1).strip()
-    return None
+# Batch classification: concurrent calls, calls started per second,
+# per-call timeout (seconds) and retries with exponential backoff
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_RATE_PER_SEC = float(os.getenv("GEMINI_RATE_PER_SEC", "5"))
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "20"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "2"))
 
+# Offline classifier tried first; Gemini is only asked below this confidence
+LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.9"))
+local_classifier = LocalEmailClassifier()
 
-def classify_email_with_gemini(email_text: str) -> str:
-    """
-    Use Gemini to classify the email type.
-    Falls back to 'Unknown' if anything goes wrong.
-    """
+_model_lock = threading.Lock()
+_gemini_model = None
 
-    # If no API key exists → skip classification
-    if not GOOGLE_API_KEY:
-        return "Unknown"
+_classifier_lock = threading.Lock()
+_classifier_counts = {"local": 0, "llm": 0}
 
-    prompt = f"""
+def _build_prompt(email_text):
+    return f"""
     You are an email classifier. Categorize the email into EXACTLY one of the following types:
 
     - Client Inquiry
@@ -41,60 +59,201 @@ def classify_email_with_gemini(email_text: str) -> str:
     \"\"\"{email_text}\"\"\"
     """
 
+
+def get_gemini_model():
+    """
+    Return the process-wide Gemini model client, importing and configuring
+    google.generativeai on first use (it pulls in the whole gRPC/protobuf
+    stack, so processes that never call the LLM don't pay for it).
+    """
+    global _gemini_model
+    if _gemini_model is None:
+        with _model_lock:
+            if _gemini_model is None:
+                genai = importlib.import_module("google.generativeai")
+                genai.configure(api_key=GOOGLE_API_KEY)
+                _gemini_model = genai.GenerativeModel(GEMINI_MODEL)
+    return _gemini_model
+
+
+def _generate_category(model, email_text, timeout=None):
+    request_options = {"timeout": timeout} if timeout else None
+    response = model.generate_content(_build_prompt(email_text), request_options=request_options)
+    return response.text.strip()
+
+
+def classify_email_with_gemini(email_text: str) -> str:
+    """
+    Use Gemini to classify the email type.
+    Results are cached by normalized text + model, so repeat scans and
+    reprocessing cost no LLM calls.
+    Falls back to 'Unknown' if anything goes wrong.
+    """
+
+    # If no API key exists → skip classification
+    if not GOOGLE_API_KEY:
+        return "Unknown"
+
+    key = cache_key(email_text, GEMINI_MODEL)
+    cached = classification_cache.get(key)
+    if cached is not None:
+        return cached
+
     try:
-        model = genai.GenerativeModel(GEMINI_MODEL)
-        response = model.generate_content(prompt)
-        category = response.text.strip()
-        return category
+        category = _generate_category(get_gemini_model(), email_text, GEMINI_TIMEOUT)
     except Exception:
-        return "Unknown"
+        return "Unknown"  # failures are not cached, the next parse retries
+
+    if category and category != "Unknown":
+        classification_cache.set(key, category)
+    return category
+
+
+def classify_emails_with_gemini(email_texts, model=None, max_workers=None, rate=None, timeout=None, retries=None):
+    """
+    Classify many emails at once. Returns one category per text, in order.
 
-def parse_email(raw):
+    Cached texts (and duplicates within the batch) cost no call; the rest
+    run with bounded concurrency, a token-bucket rate limit, per-call
+    timeouts and retry with backoff (defaults: GEMINI_MAX_CONCURRENCY,
+    GEMINI_RATE_PER_SEC, GEMINI_TIMEOUT, GEMINI_MAX_RETRIES).
+    `model` is any object with generate_content(prompt, request_options=...),
+    e.g. a local stand-in for tests; defaults to Gemini.
+    Calls that keep failing yield 'Unknown'.
+    """
+    email_texts = list(email_texts)
+    if not email_texts:
+        return []
+    if model is None and not GOOGLE_API_KEY:
+        return ["Unknown"] * len(email_texts)
+
+    keys = [cache_key(text, GEMINI_MODEL) for text in email_texts]
+    categories = {}
+    misses = {}
+    for key, text in zip(keys, email_texts):
+        if key in categories or key in misses:
+            continue
+        cached = classification_cache.get(key)
+        if cached is not None:
+            categories[key] = cached
+        else:
+            misses[key] = text
+
+    if misses:
+        if model is None:
+            model = get_gemini_model()
+
+        results = run_batch(
+            lambda text, call_timeout: _generate_category(model, text, call_timeout),
+            misses.values(),
+            max_workers=max_workers or GEMINI_MAX_CONCURRENCY,
+            rate=rate or GEMINI_RATE_PER_SEC,
+            timeout=timeout or GEMINI_TIMEOUT,
+            retries=GEMINI_MAX_RETRIES if retries is None else retries,
+            default="Unknown",
+        )
+        for key, category in zip(misses, results):
+            categories[key] = category or "Unknown"
+            if category and category != "Unknown":
+                classification_cache.set(key, category)
+
+        logger.info("Classified %s emails: %s LLM calls, %s from cache",
+                    len(email_texts), len(misses), len(email_texts) - len(misses))
+
+    return [categories[key] for key in keys]
+
+
+def install_local_classifier(classifier):
+    """
+    Replace the offline classifier, e.g. with one trained on approved emails.
+    """
+    global local_classifier
+    local_classifier = classifier
+
+
+def _count_answer(source, n=1):
+    with _classifier_lock:
+        _classifier_counts[source] += n
+
+
+def classifier_stats():
+    """
+    How many emails the offline classifier answered vs. sent to the LLM,
+    for this process.
+    """
+    with _classifier_lock:
+        local, llm = _classifier_counts["local"], _classifier_counts["llm"]
+    total = local + llm
+    return {
+        "local": local,
+        "llm": llm,
+        "local_share": round(local / total, 3) if total else 0.0,
+        "threshold": LOCAL_CLASSIFIER_THRESHOLD,
+        "training_examples": local_classifier.examples,
+    }
+
+
+def classify_email(email_text: str) -> str:
+    """
+    Classify with the offline classifier, falling back to Gemini only
+    when its confidence is below LOCAL_CLASSIFIER_THRESHOLD.
+    """
+    category, confidence = local_classifier.predict(email_text)
+    if confidence >= LOCAL_CLASSIFIER_THRESHOLD:
+        _count_answer("local")
+        return category
+
+    _count_answer("llm")
+    return classify_email_with_gemini(email_text)
+
+
+def classify_parsed_emails(results):
+    """
+    Batch hook used by the scan pipeline: `results` is a list of
+    (raw, data) pairs from parse_email(raw, classify=False). Emails the
+    offline classifier is sure about are answered locally, the rest are
+    sent to Gemini in one batch; "category" is added to each data dict.
+    """
+    texts = [classification_text(decode_email(raw)) for raw, _ in results]
+    categories = []
+    uncertain = []
+    for index, text in enumerate(texts):
+        category, confidence = local_classifier.predict(text)
+        if confidence >= LOCAL_CLASSIFIER_THRESHOLD:
+            categories.append(category)
+        else:
+            categories.append(None)
+            uncertain.append(index)
+
+    _count_answer("local", len(results) - len(uncertain))
+    if uncertain:
+        _count_answer("llm", len(uncertain))
+        answers = classify_emails_with_gemini([texts[index] for index in uncertain])
+        for index, category in zip(uncertain, answers):
+            categories[index] = category
+
+    for (_, data), category in zip(results, categories):
+        if category and category != "Unknown":
+            fields = list(data.items())
+            data.clear()
+            data["category"] = category
+            data.update(fields)
+
+
+def parse_email(raw, classify=True):
+    """
+    Decode the message (MIME parts, transfer encodings, attachments
+    skipped) and extract name, email and phone in one pass.
+    """
+    decoded = decode_email(raw)
     data = {}
 
-    # Classify the email first
-    email_category = classify_email_with_gemini(raw)
-    if email_category and email_category != "Unknown":
-        data["category"] = email_category
-
-    # Try structured parsing first (with labels) - supports both English and Greek
-    name = safe_search(r"(?:Name|Όνομα):\s*(.*)", raw)
-    email = safe_search(r"(?:Email):\s*(.*)", raw)
-    phone = safe_search(r"(?:Phone|Κινητό|Τηλέφωνο):\s*(.*)", raw)
-
-    # Also try to extract from bulleted lists
-    if not name:
-        name = safe_search(r"[-•]\s*(?:Όνομα|Name):\s*(.*)", raw)
-    if not email:
-        email = safe_search(r"[-•]\s*(?:Email):\s*(.*)", raw)
-    if not phone:
-        phone = safe_search(r"[-•]\s*(?:Κινητό|Phone|Τηλέφωνο):\s*(.*)", raw)
-
-    if name:
-        data["name"] = name
-    if email:
-        data["email"] = email
-    if phone:
-        data["phone"] = phone
-
-    # If no structured data found, try to extract email addresses directly
-    if not email:
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        email_matches = re.findall(email_pattern, raw)
-        if email_matches:
-            # Filter out generic emails
-            personal_emails = [e for e in email_matches if not e.startswith(('info@', 'contact@', 'support@'))]
-            if personal_emails:
-                data["email"] = personal_emails[0]
-            elif email_matches:
-                data["email"] = email_matches[0]
-
-    # Extract phone numbers if not found with label
-    if not phone:
-        # Greek phone patterns (mobile: 69XX-XXXXXX, landline: 2XXX-XXXXXX)
-        phone_pattern = r'(?:\+30\s?)?(?:69\d{2}[-\s]?\d{3}[-\s]?\d{3}|2[1-8]\d{2}[-\s]?\d{3}[-\s]?\d{3})'
-        phone_match = re.search(phone_pattern, raw)
-        if phone_match:
-            data["phone"] = phone_match.group(0).strip()
-
-    return data
\ No newline at end of file
+    # Classify the email first (the scan pipeline passes classify=False
+    # and classifies whole batches with classify_parsed_emails)
+    if classify:
+        email_category = classify_email(classification_text(decoded))
+        if email_category and email_category != "Unknown":
+            data["category"] = email_category
+
+    data.update(extract_contact(decoded))
+    return data
@@ -1,26 +1,127 @@
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
+
+# Output key -> form field name, in output order
+FIELDS = {
+    "full name": "full_name",
+    "email": "email",
+    "phone": "phone",
+    "company": "company",
+    "service": "service",
+    "message": "message",
+    "priority": "priority",
+    "submission date": "submission_date",
+}
+
+
+class _AllFound(Exception):
+    pass
+
+
+class FormFieldCollector(HTMLParser):
+    """
+    Single-pass collector for named form fields, on the stdlib tokenizer.
+
+    Mirrors what BeautifulSoup's find() gave us: the first input/textarea/
+    select with a wanted name wins; inputs give their stripped value,
+    textareas their text, selects the text of the first option marked
+    `selected` ("" if none). Text is stripped per text node and joined,
+    like get_text(strip=True). Parsing stops as soon as every wanted
+    field has a value.
+    """
+
+    def __init__(self, wanted):
+        super().__init__(convert_charrefs=True)
+        self.wanted = set(wanted)
+        self.values = {}
+        self._claimed = set()
+        self._select = None     # wanted <select> still looking for its selected option
+        self._capture = None    # (field, tag) whose text is being collected
+        self._depth = 0
+        self._chunks = []
+        self._text = []
+
+    def collect(self, raw_html):
+        try:
+            self.feed(raw_html)
+            self.close()
+        except _AllFound:
+            pass
+        return self.values
+
+    def _resolve(self, field, value):
+        self.values[field] = value
+        if self.wanted.issubset(self.values):
+            raise _AllFound
+
+    def _flush_text(self):
+        if self._text:
+            text = "".join(self._text).strip()
+            if text:
+                self._chunks.append(text)
+            self._text = []
+
+    def _start_capture(self, field, tag):
+        self._capture = (field, tag)
+        self._depth = 1
+        self._chunks = []
+        self._text = []
+
+    def _finish_capture(self):
+        self._flush_text()
+        field, _ = self._capture
+        self._capture = None
+        self._resolve(field, "".join(self._chunks))
+
+    def handle_starttag(self, tag, attrs):
+        if self._capture is not None:
+            self._flush_text()
+            if tag == self._capture[1]:
+                self._depth += 1  # unclosed <option>s nest, as in BeautifulSoup
+
+        if tag in ("input", "textarea", "select"):
+            attributes = dict(attrs)
+            field = attributes.get("name")
+            if field in self.wanted and field not in self._claimed:
+                self._claimed.add(field)
+                if tag == "input":
+                    self._resolve(field, (attributes.get("value") or "").strip())
+                elif tag == "textarea":
+                    self._start_capture(field, "textarea")
+                else:
+                    self._select = field
+        elif tag == "option" and self._select is not None and self._capture is None:
+            if any(name == "selected" for name, _ in attrs):
+                field, self._select = self._select, None
+                self._start_capture(field, "option")
+
+    def handle_endtag(self, tag):
+        if self._capture is not None:
+            self._flush_text()
+            capture_tag = self._capture[1]
+            if tag == capture_tag:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_capture()
+            elif capture_tag == "option" and tag == "select":
+                self._finish_capture()
+
+        if tag == "select" and self._select is not None:
+            field, self._select = self._select, None
+            self._resolve(field, "")
+
+    def handle_data(self, data):
+        if self._capture is not None:
+            self._text.append(data)
+
+    def close(self):
+        super().close()
+        if self._capture is not None:
+            self._finish_capture()
+        if self._select is not None:
+            field, self._select = self._select, None
+            self._resolve(field, "")
+
 
 def parse_form(raw_html: str):
-    soup = BeautifulSoup(raw_html, "html.parser")
-
-    def get_input(name):
-        tag = soup.find(["input", "textarea", "select"], attrs={"name": name})
-        if tag is None:
-            return ""
-        if tag.name == "select":
-            option = tag.find("option", selected=True)
-            return option.get_text(strip=True) if option else ""
-        return tag.get("value", "").strip() if tag.name == "input" else tag.get_text(strip=True)
-
-    data = {
-        "full name": get_input("full_name"),
-        "email": get_input("email"),
-        "phone": get_input("phone"),
-        "company": get_input("company"),
-        "service": get_input("service"),
-        "message": get_input("message"),
-        "priority": get_input("priority"),
-        "submission date": get_input("submission_date"),
-    }
-
-    return data
+    values = FormFieldCollector(FIELDS.values()).collect(raw_html)
+    return {key: values.get(field, "") for key, field in FIELDS.items()}
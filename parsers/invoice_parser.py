@@ -1,5 +1,73 @@
+"""
+Invoice extraction with per-layout plans.
+
+Our invoices come from a handful of templates. layout_fingerprint() hashes
+the tag/class skeleton of a document (one regex pass, text ignored, runs
+of repeated tags/rows collapsed so line-item and address counts don't
+matter). The first invoice of a layout goes through the generic path:
+the flattened text (one stripped text node per line, as BeautifulSoup's
+get_text("\\n", strip=True) gave it) searched with every field regex.
+From that run a plan is learned: for each field, the label text node
+whose next text node holds the value. Later invoices of the same layout
+jump to the label with str.find and read only the following node, and
+fields whose label literal isn't in the document are skipped outright.
+Anything a plan can't resolve falls back to the generic path.
+
+Besides the display strings, parse_invoice() returns the amounts as exact
+Decimals ("amounts") and the rows of the line-item table ("line items");
+the pipeline stores those in Invoice / InvoiceLine instead of the JSON data.
+"""
+import hashlib
+import html
 import re
-from bs4 import BeautifulSoup
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+from html.parser import HTMLParser
+
+# Field -> (literal every match must contain, pattern over the flattened text)
+FIELD_PATTERNS = {
+    # Basic invoice info
+    "invoice number": ("Αριθμός:", re.compile(r"Αριθμός:\s*([A-Za-z0-9\-\/]+)")),
+    "date": ("Ημερομηνία:", re.compile(r"Ημερομηνία:\s*([0-9]{2}\/[0-9]{2}\/[0-9]{4})")),
+    "customer name": ("Πελάτης:", re.compile(r"Πελάτης:\s*\n(.*)")),
+
+    # Summary amounts
+    "net total": ("Καθαρή Αξία:", re.compile(r"Καθαρή Αξία:\s*(€[\d\.,]+)")),
+    "vat amount": ("ΦΠΑ", re.compile(r"ΦΠΑ\s*24%:\s*(€[\d\.,]+)")),
+    "total": ("ΣΥΝΟΛΟ:", re.compile(r"ΣΥΝΟΛΟ:\s*(€[\d\.,]+)")),
+
+    # Optional text fields
+    "notes": ("Σημειώσεις:", re.compile(r"Σημειώσεις:\s*(.*)")),
+    "delivery": ("Παράδοση:", re.compile(r"Παράδοση:\s*(.*)")),
+}
+MONEY_FIELDS = ("net total", "vat amount", "total")
+OPTIONAL_FIELDS = ("notes", "delivery")
+
+# Typed values returned next to the display fields, not stored in ExtractedItem.data
+STRUCTURED_KEYS = ("amounts", "line items")
+
+# Line-item table header keyword -> line key, first match wins
+# ("Τιμή/Ώρα" is a unit price, "Ώρες"/"Μήνες" are quantities)
+LINE_COLUMNS = (
+    (("περιγραφή", "description"), "description"),
+    (("σύνολο", "total", "amount"), "line total"),
+    (("τιμή", "price", "rate"), "unit price"),
+    (("ποσότητα", "quantity", "qty", "ώρες", "hours", "μήνες", "months"), "quantity"),
+)
+
+_START_TAG = re.compile(r"<([a-zA-Z][a-zA-Z0-9]*)([^>]*)>")
+_CLASS_ATTR = re.compile(r"""\bclass\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+_REPEATS = re.compile(r"((?:[^,]+,){1,12}?)\1+")
+_NEXT_TEXT = re.compile(r"(?:\s|<[^>]*>)*([^<]+)")
+
+_TABLE = re.compile(r"<table\b[^>]*>(.*?)</table>", re.IGNORECASE | re.DOTALL)
+_ROW = re.compile(r"<tr\b[^>]*>(.*?)</tr>", re.IGNORECASE | re.DOTALL)
+_CELL = re.compile(r"<t([hd])\b[^>]*>(.*?)</t[hd]>", re.IGNORECASE | re.DOTALL)
+_ANY_TAG = re.compile(r"<[^>]*>")
+_NUMBER = re.compile(r"(-?)\s*[€$£]?\s*(\d[\d.,]*)")
+
 
 def clean_money(v):
     if not v:
@@ -7,34 +75,302 @@ def clean_money(v):
     # Keep the value EXACTLY as written (including € and commas)
     return v.strip()
 
+
+def parse_amount(text):
+    """
+    Exact Decimal from a written amount: "€1,054.00" -> Decimal("1054.00").
+    Accepts "1.054,00" too (the last separator followed by 1-2 digits
+    is the decimal point). Returns None when there is no number.
+    """
+    m = _NUMBER.search(text or "")
+    if m is None:
+        return None
+    sign, number = m.group(1), m.group(2).rstrip(".,")
+    last = max(number.rfind("."), number.rfind(","))
+    if last >= 0 and 1 <= len(number) - last - 1 <= 2:
+        number = number[:last].replace(".", "").replace(",", "") + "." + number[last + 1:]
+    else:
+        number = number.replace(".", "").replace(",", "")
+    try:
+        return Decimal(sign + number)
+    except InvalidOperation:
+        return None
+
+
+def _cell_text(cell_html):
+    return " ".join(html.unescape(_ANY_TAG.sub(" ", cell_html)).split())
+
+
+def _line_column(header):
+    header = header.lower()
+    for keywords, key in LINE_COLUMNS:
+        if any(keyword in header for keyword in keywords):
+            return key
+    return None
+
+
+def extract_line_items(raw_html):
+    """
+    Rows of the first table whose header names a description column,
+    as [{"description", "quantity", "unit price", "line total"}] with
+    Decimal numbers (None when a cell is empty or not a number).
+    """
+    for table in _TABLE.finditer(raw_html):
+        columns = None
+        lines = []
+        for row in _ROW.finditer(table.group(1)):
+            cells = _CELL.findall(row.group(1))
+            if columns is None:
+                if cells and all(kind.lower() == "h" for kind, _ in cells):
+                    columns = [_line_column(_cell_text(text)) for _, text in cells]
+                    if "description" not in columns:
+                        break  # not a line-item table
+                continue
+            line = {"description": "", "quantity": None, "unit price": None, "line total": None}
+            for key, (_, text) in zip(columns, cells):
+                if key == "description":
+                    line[key] = _cell_text(text)
+                elif key is not None:
+                    line[key] = parse_amount(_cell_text(text))
+            if line["description"] or line["line total"] is not None:
+                lines.append(line)
+        if columns is not None and "description" in columns:
+            return lines
+    return []
+
+
+def layout_fingerprint(raw_html):
+    """
+    Hash of the start-tag/class sequence with repeated runs (up to 12 tags
+    long, e.g. a table row) collapsed to one.
+    """
+    tokens = []
+    for m in _START_TAG.finditer(raw_html):
+        tag, attrs = m.group(1).lower(), m.group(2)
+        if "class" in attrs:
+            c = _CLASS_ATTR.search(attrs)
+            if c:
+                tag += "." + ".".join(sorted((c.group(1) or c.group(2) or c.group(3) or "").split()))
+        tokens.append(tag)
+    skeleton = _REPEATS.sub(r"\1", ",".join(tokens) + ",")
+    return hashlib.sha1(skeleton.encode("utf-8")).hexdigest()[:16]
+
+
+class TextNodes(HTMLParser):
+    """
+    Stripped, non-empty text nodes of a document: the lines of
+    BeautifulSoup's get_text("\\n", strip=True), style/script excluded.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.nodes = []
+        self._text = []
+        self._skip = 0
+
+    def _flush(self):
+        if self._text:
+            text = "".join(self._text).strip()
+            if text:
+                self.nodes.append(text)
+            self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in ("style", "script"):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag in ("style", "script") and self._skip:
+            self._skip -= 1
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_data(self, data):
+        if not self._skip:
+            self._text.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def text_nodes(raw_html):
+    parser = TextNodes()
+    parser.feed(raw_html)
+    parser.close()
+    return parser.nodes
+
+
+class LayoutPlanCache:
+    """
+    Extraction plans per layout fingerprint (LRU, thread-safe).
+    A plan maps fields to the text of their label node.
+    """
+
+    def __init__(self, max_layouts=128):
+        self.max_layouts = max_layouts
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "fallbacks": 0}
+
+    def get(self, fingerprint):
+        with self._lock:
+            plan = self._plans.get(fingerprint)
+            if plan is None:
+                self._counters["misses"] += 1
+                return None
+            self._plans.move_to_end(fingerprint)
+            self._counters["hits"] += 1
+            return plan
+
+    def set(self, fingerprint, plan):
+        with self._lock:
+            self._plans[fingerprint] = plan
+            self._plans.move_to_end(fingerprint)
+            while len(self._plans) > self.max_layouts:
+                self._plans.popitem(last=False)
+
+    def count_fallback(self):
+        with self._lock:
+            self._counters["fallbacks"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, layouts=len(self._plans))
+
+
+layout_plans = LayoutPlanCache()
+
+
+def _node_after(raw_html, label):
+    """
+    Find the first text node that is exactly `label` and return the text
+    node after it (unescaped, stripped), or None.
+    """
+    start = 0
+    while True:
+        index = raw_html.find(label, start)
+        if index < 0:
+            return None
+        end = index + len(label)
+        start = end
+        if raw_html[raw_html.rfind(">", 0, index) + 1:index].strip():
+            continue
+        next_tag = raw_html.find("<", end)
+        if raw_html[end:next_tag if next_tag >= 0 else len(raw_html)].strip():
+            continue
+        m = _NEXT_TEXT.match(raw_html, end)
+        if m is None:
+            return None
+        return html.unescape(m.group(1)).strip() or None
+
+
+def _generic_extract(nodes, fields):
+    """
+    The layout-independent path: each field's regex over the full text.
+    Returns {field: re.Match or None}.
+    """
+    text = "\n".join(nodes)
+    return {field: FIELD_PATTERNS[field][1].search(text) for field in fields}
+
+
+def _learn_plan(raw_html, nodes, matches):
+    """
+    A field is planned when its match starts at a whole label node and the
+    value is in the very next node, and _node_after() finds that node
+    in the raw document.
+    """
+    starts = []
+    offset = 0
+    for node in nodes:
+        starts.append(offset)
+        offset += len(node) + 1
+
+    plan = {}
+    for field, m in matches.items():
+        if m is None:
+            continue
+        label_index = bisect_right(starts, m.start()) - 1
+        value_index = bisect_right(starts, m.start(1)) - 1
+        label = nodes[label_index]
+        if (
+            starts[label_index] == m.start()
+            and value_index == label_index + 1
+            and _node_after(raw_html, label) == nodes[value_index]
+        ):
+            plan[field] = label
+    return plan
+
+
+def _planned_extract(raw_html, plan):
+    """
+    Resolve what the plan allows straight from the raw document.
+    Returns ({field: re.Match or None}, fields left for the generic path).
+    """
+    matches = {}
+    unresolved = []
+    for field, (literal, pattern) in FIELD_PATTERNS.items():
+        label = plan.get(field)
+        if label is not None:
+            value = _node_after(raw_html, label)
+            m = pattern.search(f"{label}\n{value}") if value is not None else None
+            if m is not None:
+                matches[field] = m
+                continue
+        if literal in raw_html or ("&" in raw_html and literal in html.unescape(raw_html)):
+            unresolved.append(field)
+        else:
+            matches[field] = None  # the label isn't in the document at all
+    return matches, unresolved
+
+
 def parse_invoice(raw_html: str):
-    soup = BeautifulSoup(raw_html, "html.parser")
-    text = soup.get_text("\n", strip=True)
+    fingerprint = layout_fingerprint(raw_html)
+    plan = layout_plans.get(fingerprint)
+
+    if plan is not None:
+        matches, unresolved = _planned_extract(raw_html, plan)
+        if unresolved:
+            layout_plans.count_fallback()
+            matches.update(_generic_extract(text_nodes(raw_html), unresolved))
+    else:
+        nodes = text_nodes(raw_html)
+        matches = _generic_extract(nodes, FIELD_PATTERNS)
+        layout_plans.set(fingerprint, _learn_plan(raw_html, nodes, matches))
 
-    def find(pattern):
-        m = re.search(pattern, text, re.MULTILINE | re.UNICODE)
+    def find(field):
+        m = matches.get(field)
         return m.group(1).strip() if m else ""
 
     data = {
         # Basic invoice info
-        "invoice number": find(r"Αριθμός:\s*([A-Za-z0-9\-\/]+)"),
-        "date": find(r"Ημερομηνία:\s*([0-9]{2}\/[0-9]{2}\/[0-9]{4})"),
-        "customer name": find(r"Πελάτης:\s*\n(.*)"),
+        "invoice number": find("invoice number"),
+        "date": find("date"),
+        "customer name": find("customer name"),
 
         # Summary amounts
-        "net total": clean_money(find(r"Καθαρή Αξία:\s*(€[\d\.,]+)")),
-        "vat amount": clean_money(find(r"ΦΠΑ\s*24%:\s*(€[\d\.,]+)")),
-        "total": clean_money(find(r"ΣΥΝΟΛΟ:\s*(€[\d\.,]+)")),
+        "net total": clean_money(find("net total")),
+        "vat amount": clean_money(find("vat amount")),
+        "total": clean_money(find("total")),
     }
 
     # Optional text fields
-    notes = find(r"Σημειώσεις:\s*(.*)")
-    delivery = find(r"Παράδοση:\s*(.*)")
-
-    if notes:
-        data["notes"] = notes
+    for field in OPTIONAL_FIELDS:
+        value = find(field)
+        if value:
+            data[field] = value
 
-    if delivery:
-        data["delivery"] = delivery
+    # Typed values, normalized once here
+    data["amounts"] = {field: parse_amount(data[field]) for field in MONEY_FIELDS}
+    data["line items"] = extract_line_items(raw_html)
 
     return data
@@ -0,0 +1,100 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import ScanJob
+from parsers.pipeline import run_full_scan
+
+logger = logging.getLogger(__name__)
+
+# Serializes "is a scan running?" checks within this process
+_start_lock = threading.Lock()
+
+
+def active_scan_job():
+    """
+    Return the queued/running ScanJob, or None.
+    A running job whose heartbeat is older than SCAN_JOB_STALE_SECONDS
+    (its worker died with the process) is marked failed instead.
+    """
+    job = ScanJob.objects.filter(status__in=ScanJob.ACTIVE_STATUSES).order_by("-created_at").first()
+    if job is None:
+        return None
+
+    stale_before = timezone.now() - timezone.timedelta(seconds=settings.SCAN_JOB_STALE_SECONDS)
+    if job.updated_at < stale_before:
+        logger.warning("Marking stale scan job #%s as failed", job.id)
+        ScanJob.objects.filter(pk=job.pk).update(
+            status="failed",
+            error_message="Scan worker stopped reporting progress.",
+            finished_at=timezone.now(),
+        )
+        return None
+
+    return job
+
+
+def start_scan_job():
+    """
+    Queue a scan and start it on a background thread.
+    Returns (job, started): if a scan is already active, that job is
+    returned with started=False and nothing new is queued.
+    """
+    with _start_lock, transaction.atomic():
+        job = active_scan_job()
+        if job is not None:
+            return job, False
+        job = ScanJob.objects.create()
+
+    if settings.SCAN_JOBS_IN_BACKGROUND:
+        threading.Thread(target=_run_in_thread, args=(job.pk,), name=f"scan-job-{job.pk}", daemon=True).start()
+    else:
+        run_scan_job(job.pk)
+        job.refresh_from_db()
+
+    return job, True
+
+
+def run_scan_job(job_id):
+    """
+    Run the pipeline for a queued job, recording progress after every chunk
+    and a heartbeat while files are still being diffed and hashed.
+    """
+    jobs = ScanJob.objects.filter(pk=job_id)
+    try:
+        jobs.update(status="running", started_at=timezone.now(), updated_at=timezone.now())
+
+        def report(progress):
+            jobs.update(
+                files_seen=progress.files_seen,
+                parsed=progress.created,
+                failed=progress.errors,
+                updated_at=timezone.now(),
+            )
+
+        def heartbeat():
+            jobs.update(updated_at=timezone.now())
+
+        created, errors = run_full_scan(progress=report, heartbeat=heartbeat)
+        jobs.update(
+            status="done",
+            parsed=created,
+            failed=errors,
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        logger.info("Scan job #%s completed: %s created, %s errors", job_id, created, errors)
+    except Exception as e:
+        logger.exception("Scan job #%s failed", job_id)
+        jobs.update(status="failed", error_message=str(e), finished_at=timezone.now(), updated_at=timezone.now())
+
+
+def _run_in_thread(job_id):
+    try:
+        run_scan_job(job_id)
+    finally:
+        # The thread opened its own DB connection; don't leak it
+        connection.close()
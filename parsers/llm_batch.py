@@ -0,0 +1,77 @@
+"""
+Bounded-concurrency batch runner for LLM calls.
+
+run_batch() fans calls out to a thread pool (LLM calls are network bound),
+paces them with a token bucket so bursts stay under the provider's rate
+limit, passes a per-call timeout down to the client, and retries failed
+calls with exponential backoff and jitter.
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, at most `capacity`
+    banked (defaults to one second's worth). acquire() blocks until a token
+    is available.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.clock = clock
+        self.sleep = sleep
+
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self.sleep(wait)
+
+
+def run_batch(func, items, max_workers=4, rate=None, timeout=None, retries=2, backoff=0.5, default=None):
+    """
+    Call func(item, timeout) for every item and return the results in input order.
+
+    - at most `max_workers` calls in flight
+    - at most `rate` calls started per second (None = unlimited)
+    - each call is retried up to `retries` times, sleeping
+      backoff * 2**attempt (+ jitter) in between
+    - items that still fail get `default`
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    bucket = TokenBucket(rate) if rate else None
+
+    def call(item):
+        for attempt in range(retries + 1):
+            if bucket is not None:
+                bucket.acquire()
+            try:
+                return func(item, timeout)
+            except Exception as e:
+                if attempt == retries:
+                    logger.warning("LLM call failed after %s attempts: %s", attempt + 1, e)
+                    return default
+                time.sleep(backoff * 2 ** attempt * (1 + random.random() / 2))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        return list(executor.map(call, items))
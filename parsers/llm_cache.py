@@ -0,0 +1,186 @@
+"""
+Two-tier cache for LLM email classifications.
+
+- memory: per-process LRU (OrderedDict), checked first
+- disk:   a small SQLite file shared by all processes (web, scan workers,
+          watcher), with a TTL and a row cap
+
+Kept free of Django so it works inside scan worker processes; the disk
+tier uses the stdlib sqlite3 module with one short-lived connection per
+operation, which is safe across threads and forked processes.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize an email for cache keying: Unicode NFC and collapsed whitespace,
+    so re-parses of the same message (CRLF vs LF, re-wrapped lines) share a key.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(text: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class ClassificationCache:
+    PRUNE_EVERY = 100  # writes between expiry/row-cap sweeps of the disk tier
+
+    def __init__(self, path=None, ttl=30 * 24 * 3600, max_memory=1024, max_rows=100_000):
+        self.path = str(path) if path else None
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.max_rows = max_rows
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._writes = 0
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    # Disk tier
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS classifications ("
+                " key TEXT PRIMARY KEY, category TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS classifications_created_at ON classifications (created_at)")
+            self._schema_ready = True
+        return conn
+
+    def _disk_get(self, key):
+        """
+        (category, created_at) of the disk row for `key`, or None.
+        """
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    row = conn.execute(
+                        "SELECT category, created_at FROM classifications WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is None:
+                        return None
+                    category, created_at = row
+                    if time.time() - created_at > self.ttl:
+                        conn.execute("DELETE FROM classifications WHERE key = ?", (key,))
+                        return None
+                    return category, created_at
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None  # the cache must never break classification
+
+    def _disk_set(self, key, category):
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO classifications (key, category, created_at) VALUES (?, ?, ?)",
+                        (key, category, time.time()),
+                    )
+                    self._writes += 1
+                    if self._writes % self.PRUNE_EVERY == 0:
+                        self._prune(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _prune(self, conn):
+        conn.execute("DELETE FROM classifications WHERE created_at < ?", (time.time() - self.ttl,))
+        conn.execute(
+            "DELETE FROM classifications WHERE key IN ("
+            " SELECT key FROM classifications ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,),
+        )
+
+    # Public API
+
+    def get(self, key):
+        """
+        Return the cached category for `key`, or None on a miss.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                category, created_at = entry
+                if time.time() - created_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return category
+                del self._memory[key]
+
+        row = self._disk_get(key) if self.path else None
+
+        with self._lock:
+            if row is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            # Keep the disk row's age, so the entry expires when the row does
+            category, created_at = row
+            self._remember(key, category, created_at)
+        return category
+
+    def set(self, key, category):
+        with self._lock:
+            self._remember(key, category, time.time())
+        if self.path:
+            self._disk_set(key, category)
+
+    def _remember(self, key, category, created_at):
+        self._memory[key] = (category, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+        if self.path:
+            try:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.execute("DELETE FROM classifications")
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                pass
+
+    def stats(self):
+        """
+        Hit/miss counters for this process, plus the current tier sizes.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+
+        stats["disk_entries"] = 0
+        if self.path:
+            try:
+                conn = self._connect()
+                try:
+                    stats["disk_entries"] = conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                pass
+        return stats
@@ -0,0 +1,93 @@
+"""
+Offline email classifier used before falling back to Gemini.
+
+A small multinomial naive Bayes over word tokens. Out of the box it only
+knows a list of Greek/English keywords per category (added as pseudo
+counts); fit() adds real examples, e.g. approved emails from the
+dashboard. predict() returns the best category and its posterior
+probability, which callers compare to a confidence threshold.
+"""
+import math
+import re
+import unicodedata
+from collections import Counter
+
+CATEGORIES = ("Client Inquiry", "Invoice Notification")
+
+KEYWORDS = {
+    "Client Inquiry": [
+        "χρειαζόμαστε", "θα θέλαμε", "ενδιαφερόμαστε", "ενδιαφέρον", "προσφορά", "συνάντηση",
+        "σύστημα", "εφαρμογή", "website", "ιστοσελίδα", "ανάπτυξη", "λύση", "βοηθήσετε",
+        "need", "interested", "quote", "proposal", "meeting", "project", "system", "website",
+    ],
+    "Invoice Notification": [
+        "τιμολόγιο", "τιμολογίου", "πληρωμή", "πληρωμής", "εξόφληση", "οφειλή", "ποσό", "φπα",
+        "παραστατικό", "λογαριασμός", "κατάθεση", "iban",
+        "invoice", "payment", "paid", "amount", "due", "receipt", "billing", "vat",
+    ],
+}
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """
+    Lowercase word tokens with Greek accents removed (τιμολόγιο == τιμολογιο).
+    """
+    text = unicodedata.normalize("NFD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return [token for token in _TOKEN.findall(text) if len(token) > 1 and not token.isdigit()]
+
+
+class LocalEmailClassifier:
+    def __init__(self, keywords=KEYWORDS, keyword_weight=3.0, alpha=1.0):
+        self.alpha = alpha
+        self.token_counts = {category: Counter() for category in CATEGORIES}
+        self.doc_counts = Counter({category: 1 for category in CATEGORIES})
+        self.examples = 0
+
+        for category, words in keywords.items():
+            for word in words:
+                for token in tokenize(word):
+                    self.token_counts[category][token] += keyword_weight
+        self._refresh()
+
+    def _refresh(self):
+        self.vocabulary = set().union(*self.token_counts.values())
+        self.totals = {category: sum(counts.values()) for category, counts in self.token_counts.items()}
+
+    def fit(self, texts, labels):
+        """
+        Add labelled examples. Labels outside CATEGORIES are ignored.
+        """
+        for text, label in zip(texts, labels):
+            if label not in self.token_counts:
+                continue
+            self.token_counts[label].update(tokenize(text))
+            self.doc_counts[label] += 1
+            self.examples += 1
+        self._refresh()
+        return self
+
+    def predict(self, text):
+        """
+        Return (category, confidence), confidence being the posterior
+        probability of the chosen category (0.5 when nothing is known).
+        """
+        tokens = Counter(token for token in tokenize(text) if token in self.vocabulary)
+        total_docs = sum(self.doc_counts.values())
+        vocabulary_size = len(self.vocabulary) or 1
+
+        scores = {}
+        for category in CATEGORIES:
+            counts = self.token_counts[category]
+            denominator = self.totals[category] + self.alpha * vocabulary_size
+            score = math.log(self.doc_counts[category] / total_docs)
+            for token, n in tokens.items():
+                score += n * math.log((counts[token] + self.alpha) / denominator)
+            scores[category] = score
+
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        norm = sum(math.exp(score - top) for score in scores.values())
+        return best, 1.0 / norm
@@ -0,0 +1,113 @@
+"""
+Registry of document parsers.
+
+Maps each source type to the dummy_data folder and file patterns it
+handles and to the callable that parses it. The pipeline, the watcher
+and the worker processes all dispatch through `registry`, so adding a
+document type is one `register()` call here.
+
+The registry also keeps per-parser call counts, error counts and
+cumulative parse time. Timings measured in worker processes are sent
+back with each result and recorded by the pipeline.
+"""
+import fnmatch
+import threading
+from functools import partial
+
+from parsers.forms_parser import parse_form
+from parsers.email_parser import classify_parsed_emails, parse_email
+from parsers.invoice_parser import parse_invoice
+
+
+class ParserSpec:
+    """
+    `parse(raw) -> dict` runs per file, possibly in a worker process.
+    `enrich(results)`, if set, runs once per committed chunk in the scanning
+    process with the (raw, data) pairs of that chunk's successful parses,
+    for work that is cheaper in batches (e.g. LLM classification).
+    """
+
+    def __init__(self, source_type, folder, patterns, parse, enrich=None):
+        self.source_type = source_type
+        self.folder = folder
+        self.patterns = tuple(patterns)
+        self.parse = parse
+        self.enrich = enrich
+
+    def matches(self, name):
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.patterns)
+
+    def __repr__(self):
+        return f"ParserSpec({self.source_type!r}, {self.folder!r}, {self.patterns!r})"
+
+
+class ParserRegistry:
+    def __init__(self):
+        self._specs = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def register(self, source_type, folder, patterns, parse=None, enrich=None):
+        """
+        Register `parse` for files in dummy_data/<folder> matching `patterns`.
+        Can be used as a decorator when `parse` is omitted.
+        """
+        if parse is None:
+            def decorator(func):
+                self.register(source_type, folder, patterns, func, enrich)
+                return func
+            return decorator
+
+        if isinstance(patterns, str):
+            patterns = (patterns,)
+        spec = ParserSpec(source_type, folder, patterns, parse, enrich)
+        self._specs[source_type] = spec
+        return spec
+
+    def get(self, source_type):
+        return self._specs[source_type]
+
+    def specs(self):
+        return list(self._specs.values())
+
+    def folders(self):
+        """
+        Folders to walk, in registration order.
+        """
+        return list(dict.fromkeys(spec.folder for spec in self._specs.values()))
+
+    def match(self, folder, name):
+        """
+        Return the spec handling dummy_data/<folder>/<name>, or None.
+        """
+        if name.startswith("."):
+            return None
+        for spec in self._specs.values():
+            if spec.folder == folder and spec.matches(name):
+                return spec
+        return None
+
+    def record(self, source_type, seconds, failed=False):
+        with self._lock:
+            stats = self._stats.setdefault(source_type, {"calls": 0, "errors": 0, "seconds": 0.0})
+            stats["calls"] += 1
+            stats["errors"] += int(failed)
+            stats["seconds"] += seconds
+
+    def stats(self):
+        """
+        Cumulative {source_type: {"calls", "errors", "seconds"}} for this process.
+        """
+        with self._lock:
+            return {source_type: dict(stats) for source_type, stats in self._stats.items()}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+
+registry = ParserRegistry()
+registry.register("form", "forms", "*.html", parse_form)
+# Emails are classified per chunk with one batched LLM round instead of per file
+registry.register("email", "emails", "*.eml", partial(parse_email, classify=False), enrich=classify_parsed_emails)
+registry.register("invoice", "invoices", "*.html", parse_invoice)
@@ -0,0 +1,111 @@
+import os
+import pathlib
+import time
+
+from parsers.registry import registry
+
+
+class DirectoryWatcher:
+    """
+    Polling watcher over the dummy_data source folders.
+
+    Each poll() diffs the current directory state, {relative path:
+    (size, mtime_ns)}, against the previous one. A folder is only re-listed
+    when its own mtime changed (a file was added, removed or renamed) or on
+    every `full_every`-th poll, which catches in-place edits. Files waiting
+    to be ingested are re-stat'ed on every poll, so files still being
+    written are never handed over half-done.
+
+    poll() returns the relative paths that are ready: new or changed files
+    once nothing has changed for `settle` seconds, so a burst of arrivals
+    becomes one batch. Files that keep changing are flushed anyway after
+    `max_wait` seconds.
+    """
+
+    def __init__(self, base, settle=2.0, max_wait=30.0, full_every=30, clock=time.monotonic):
+        self.base = pathlib.Path(base)
+        self.settle = settle
+        self.max_wait = max_wait
+        self.full_every = full_every
+        self.clock = clock
+
+        self.state = {}        # relative path -> (size, mtime_ns)
+        self.dir_mtimes = {}   # folder -> mtime_ns when last listed
+        self.pending = {}      # relative path -> time first seen changing
+        self.last_change = None
+        self.polls = 0
+
+    def _list_folder(self, folder):
+        listing = {}
+        try:
+            with os.scandir(self.base / folder) as entries:
+                for entry in entries:
+                    if registry.match(folder, entry.name) is None:
+                        continue
+                    try:
+                        if entry.is_file():
+                            st = entry.stat()
+                            listing[f"{folder}/{entry.name}"] = (st.st_size, st.st_mtime_ns)
+                    except FileNotFoundError:
+                        continue  # removed while listing
+        except FileNotFoundError:
+            pass
+        return listing
+
+    def _forget(self, rel):
+        self.state.pop(rel, None)
+        self.pending.pop(rel, None)
+
+    def poll(self):
+        now = self.clock()
+        full = self.polls % self.full_every == 0
+        self.polls += 1
+        changed = set()
+
+        for folder in registry.folders():
+            try:
+                dir_mtime = (self.base / folder).stat().st_mtime_ns
+            except FileNotFoundError:
+                dir_mtime = None
+            if not full and self.dir_mtimes.get(folder) == dir_mtime:
+                continue
+            self.dir_mtimes[folder] = dir_mtime
+
+            listing = self._list_folder(folder)
+            prefix = f"{folder}/"
+            for rel in [r for r in self.state if r.startswith(prefix) and r not in listing]:
+                self._forget(rel)
+            for rel, signature in listing.items():
+                if self.state.get(rel) != signature:
+                    self.state[rel] = signature
+                    changed.add(rel)
+
+        for rel in list(self.pending):
+            if rel in changed:
+                continue
+            try:
+                st = os.stat(self.base / rel)
+            except FileNotFoundError:
+                self._forget(rel)
+                continue
+            signature = (st.st_size, st.st_mtime_ns)
+            if self.state.get(rel) != signature:
+                self.state[rel] = signature
+                changed.add(rel)
+
+        for rel in changed:
+            self.pending.setdefault(rel, now)
+        if changed:
+            self.last_change = now
+
+        if not self.pending:
+            return []
+
+        quiet = now - self.last_change >= self.settle
+        overdue = now - min(self.pending.values()) >= self.max_wait
+        if not (quiet or overdue):
+            return []
+
+        ready = sorted(self.pending)
+        self.pending.clear()
+        return ready
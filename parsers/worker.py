@@ -0,0 +1,48 @@
+"""
+Parsing entry point used by the scan pipeline.
+
+Kept free of Django imports so it can run inside worker processes
+(``ProcessPoolExecutor``) without configuring settings there.
+"""
+import hashlib
+import time
+import traceback
+from collections import namedtuple
+
+from parsers.registry import registry
+
+ParseResult = namedtuple(
+    "ParseResult",
+    ["source_type", "path", "raw", "content_hash", "data", "error", "traceback", "seconds"],
+)
+
+
+def hash_bytes(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def parse_document(job):
+    """
+    Read and parse a single file with the parser registered for its source type.
+
+    `job` is a (source_type, path) tuple. Parser exceptions never escape:
+    they are returned in `error` (message) and `traceback` so the pipeline
+    can store the item with status "error". `seconds` is the time spent in
+    the parser, for the registry's per-parser timings.
+    """
+    source_type, path = job
+    with open(path, "rb") as f:
+        content = f.read()
+    # Same text read_text() would give: undecodable bytes dropped, universal newlines
+    raw = content.decode("utf-8", errors="ignore").replace("\r\n", "\n").replace("\r", "\n")
+    content_hash = hash_bytes(content)
+
+    parse = registry.get(source_type).parse
+    started = time.perf_counter()
+    try:
+        data = parse(raw)
+        return ParseResult(source_type, path, raw, content_hash, data, None, None, time.perf_counter() - started)
+    except Exception as e:
+        return ParseResult(
+            source_type, path, raw, content_hash, None, str(e), traceback.format_exc(), time.perf_counter() - started
+        )
@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.fixture
+def dummy_data(settings, tmp_path):
+    """
+    An empty dummy_data tree (forms, emails, invoices) under tmp_path,
+    with settings.BASE_DIR pointing at it, so scans read only what a test writes.
+    """
+    dummy = tmp_path / "dummy_data"
+    for folder in ("forms", "emails", "invoices"):
+        (dummy / folder).mkdir(parents=True)
+    settings.BASE_DIR = tmp_path
+    return dummy
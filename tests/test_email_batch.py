@@ -0,0 +1,114 @@
+import threading
+import time
+
+from core.models import ExtractedItem
+from parsers import email_parser
+from parsers.llm_batch import TokenBucket, run_batch
+from parsers.llm_cache import ClassificationCache
+from parsers.pipeline import run_full_scan
+
+
+class LocalFakeModel:
+    """
+    Stand-in for genai.GenerativeModel: classifies by keyword, records
+    concurrency and the timeouts it was given, and fails the first call.
+    """
+
+    def __init__(self, name="fake"):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.timeouts = set()
+
+    def generate_content(self, prompt, request_options=None):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.timeouts.add((request_options or {}).get("timeout"))
+        try:
+            time.sleep(0.01)
+            if call == 1:
+                raise TimeoutError("deadline exceeded")
+            email = prompt.split("Email content:", 1)[1]
+            text = "Invoice Notification" if "invoice" in email.lower() else "Client Inquiry"
+            return type("Response", (), {"text": text})()
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_token_bucket_paces_calls():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=1, clock=lambda: now[0], sleep=lambda s: now.__setitem__(0, now[0] + s))
+
+    for _ in range(5):
+        bucket.acquire()
+
+    # 1 banked token, then one every 0.5s
+    assert now[0] == 2.0
+
+
+def test_run_batch_keeps_order_and_retries():
+    attempts = {}
+
+    def flaky(item, timeout):
+        attempts[item] = attempts.get(item, 0) + 1
+        if item == 3 and attempts[item] < 2:
+            raise RuntimeError("transient")
+        if item == 4:
+            raise RuntimeError("permanent")
+        return item * 10
+
+    results = run_batch(flaky, range(6), max_workers=3, retries=1, backoff=0, default=-1)
+
+    assert results == [0, 10, 20, 30, -1, 50]
+    assert attempts[3] == 2
+    assert attempts[4] == 2
+
+
+def test_classify_emails_batch_with_local_model(monkeypatch):
+    monkeypatch.setattr(email_parser, "classification_cache", ClassificationCache(path=None))
+    model = LocalFakeModel()
+    texts = [f"Please send invoice {i}" if i % 2 else f"We need a website {i}" for i in range(10)]
+
+    categories = email_parser.classify_emails_with_gemini(
+        texts + texts[:3], model=model, max_workers=3, rate=1000, timeout=5, retries=2
+    )
+
+    assert categories[:10] == ["Client Inquiry" if i % 2 == 0 else "Invoice Notification" for i in range(10)]
+    assert categories[10:] == categories[:3]
+    assert model.calls == 11           # 10 unique texts + 1 retried failure, duplicates cost nothing
+    assert model.max_in_flight <= 3
+    assert model.timeouts == {5}
+
+    # Second batch is answered from the cache
+    email_parser.classify_emails_with_gemini(texts, model=model)
+    assert model.calls == 11
+
+
+def test_full_scan_classifies_emails_in_one_batch(db, dummy_data, monkeypatch):
+    for i in range(4):
+        (dummy_data / "emails" / f"email{i}.eml").write_text(f"Name: User {i}\nWe need a website.")
+
+    model = LocalFakeModel()
+    batches = []
+    original = email_parser.classify_emails_with_gemini
+
+    def spy(texts, **kwargs):
+        batches.append(len(texts))
+        return original(texts, model=model, retries=1, **kwargs)
+
+    monkeypatch.setattr(email_parser, "GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(email_parser, "classification_cache", ClassificationCache(path=None))
+    monkeypatch.setattr(email_parser, "classify_emails_with_gemini", spy)
+    monkeypatch.setattr(email_parser, "LOCAL_CLASSIFIER_THRESHOLD", 1.01)  # nothing answered offline
+
+    assert run_full_scan() == (4, 0)
+
+    assert batches == [4]
+    for item in ExtractedItem.objects.all():
+        assert list(item.data)[0] == "category"
+        assert item.data["category"] == "Client Inquiry"
@@ -0,0 +1,64 @@
+from email.message import EmailMessage
+
+from parsers.email_extract import classification_text, decode_email, extract_contact
+from parsers.email_parser import parse_email
+
+
+def build_multipart():
+    message = EmailMessage()
+    message["From"] = "Νίκος Παππάς <nikos@example.gr>"
+    message["To"] = "info@techflow-solutions.gr"
+    message["Subject"] = "Τιμολόγιο Μαΐου"
+    message.set_content("Όνομα: Νίκος Παππάς\nΤηλέφωνο: 6944-111222\n", cte="base64")
+    message.add_alternative("<p>Όνομα: <b>Λάθος</b></p>", subtype="html")
+    # Attachment payload contains look-alike fields that must be ignored
+    message.add_attachment(
+        b"Name: Attachment\nPhone: 210-0000000\n" * 100,
+        maintype="application", subtype="octet-stream", filename="invoice_05.pdf",
+    )
+    return message.as_string()
+
+
+def test_decodes_base64_body_and_skips_attachments():
+    raw = build_multipart()
+    assert "Νίκος Παππάς\n" not in raw  # body is base64 on the wire
+
+    decoded = decode_email(raw)
+
+    assert "Τηλέφωνο: 6944-111222" in decoded.body
+    assert "Λάθος" not in decoded.body  # html alternative only used without a plain part
+    assert decoded.attachments == ["invoice_05.pdf"]
+    assert parse_email(raw, classify=False) == {
+        "name": "Νίκος Παππάς",
+        "email": "nikos@example.gr",
+        "phone": "6944-111222",
+    }
+
+
+def test_classification_text_keeps_subject_and_attachment_names():
+    text = classification_text(decode_email(build_multipart()))
+
+    assert text.startswith("Τιμολόγιο Μαΐου\n")
+    assert text.endswith("invoice_05.pdf")
+    assert "Attachment" not in text
+
+
+def test_quoted_printable_html_only_message():
+    raw = (
+        "From: shop@example.com\n"
+        "Subject: =?utf-8?q?Ερώτηση?=\n"
+        "Content-Type: text/html; charset=utf-8\n"
+        "Content-Transfer-Encoding: quoted-printable\n"
+        "\n"
+        "<p>Name: Anna&nbsp;K</p><p>Phone: 2310-123=\n456</p>\n"
+    )
+    decoded = decode_email(raw)
+
+    assert decoded.subject == "Ερώτηση"
+    assert extract_contact(decoded) == {"name": "Anna\xa0K", "email": "shop@example.com", "phone": "2310-123456"}
+
+
+def test_first_label_wins_and_generic_addresses_are_fallback():
+    raw = "Contact: info@acme.gr, maria@acme.gr\nPhone: 210-1112223\nphone: 699\n"
+
+    assert parse_email(raw, classify=False) == {"email": "maria@acme.gr", "phone": "210-1112223"}
@@ -15,3 +15,113 @@ def test_parse_email_basic():
     assert data["name"] == "John"
     assert data["email"] == "john@example.com"
     assert data["phone"] == "5551234"
+
+
+class FakeModel:
+    calls = 0
+
+    def __init__(self, name):
+        self.name = name
+
+    def generate_content(self, prompt, request_options=None):
+        FakeModel.calls += 1
+        return type("Response", (), {"text": "Client Inquiry\n"})()
+
+
+def test_gemini_classification_is_cached(monkeypatch, tmp_path):
+    from parsers import email_parser
+    from parsers.llm_cache import ClassificationCache
+
+    cache = ClassificationCache(path=tmp_path / "cache.sqlite3")
+    monkeypatch.setattr(email_parser, "GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(email_parser, "classification_cache", cache)
+    monkeypatch.setattr(email_parser, "_gemini_model", FakeModel("fake"))
+    FakeModel.calls = 0
+
+    text = "Name: John\nPlease send an offer."
+    assert email_parser.classify_email_with_gemini(text) == "Client Inquiry"
+    # Same content with different line endings / spacing hits the cache
+    assert email_parser.classify_email_with_gemini("Name: John\r\n  Please send an offer.") == "Client Inquiry"
+    assert FakeModel.calls == 1
+
+    # A fresh process (empty memory tier) is served from disk
+    monkeypatch.setattr(email_parser, "classification_cache", ClassificationCache(path=tmp_path / "cache.sqlite3"))
+    assert email_parser.classify_email_with_gemini(text) == "Client Inquiry"
+    assert FakeModel.calls == 1
+
+    stats = email_parser.classification_cache.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["disk_entries"] == 1
+
+    # Changing the model changes the key
+    monkeypatch.setattr(email_parser, "GEMINI_MODEL", "other-model")
+    email_parser.classify_email_with_gemini(text)
+    assert FakeModel.calls == 2
+
+
+def test_classification_cache_expires_entries(tmp_path):
+    from parsers.llm_cache import ClassificationCache
+
+    cache = ClassificationCache(path=tmp_path / "cache.sqlite3", ttl=-1)
+    cache.set("k", "Client Inquiry")
+
+    assert cache.get("k") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_hit_keeps_the_disk_row_age(tmp_path, monkeypatch):
+    from parsers import llm_cache
+
+    path = tmp_path / "cache.sqlite3"
+    now = 1_000_000.0
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now)
+    llm_cache.ClassificationCache(path=path, ttl=100).set("k", "Client Inquiry")
+
+    # Another process reads the row just before it expires...
+    now += 90
+    cache = llm_cache.ClassificationCache(path=path, ttl=100)
+    assert cache.get("k") == "Client Inquiry"
+    assert cache.stats()["disk_hits"] == 1
+
+    # ...and its memory copy expires with it, not a full TTL later
+    now += 20
+    assert cache.get("k") is None
+    assert cache.stats()["memory_hits"] == 0
+
+
+def test_gemini_sdk_is_imported_lazily_and_model_reused(monkeypatch):
+    import sys
+    import types
+    from parsers import email_parser
+
+    created = []
+    fake_genai = types.SimpleNamespace(
+        configure=lambda api_key: None,
+        GenerativeModel=lambda name: created.append(name) or FakeModel(name),
+    )
+    monkeypatch.setitem(sys.modules, "google.generativeai", fake_genai)
+    monkeypatch.setattr(email_parser, "_gemini_model", None)
+
+    first = email_parser.get_gemini_model()
+    assert email_parser.get_gemini_model() is first
+    assert created == [email_parser.GEMINI_MODEL]
+
+
+def test_loading_the_dashboard_does_not_import_gemini_sdk():
+    import pathlib
+    import subprocess
+    import sys
+
+    code = (
+        "import os, sys, django;"
+        "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'automation_project.settings');"
+        "django.setup();"
+        "import dashboard.views;"
+        "print('google.generativeai' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=pathlib.Path(__file__).resolve().parent.parent, capture_output=True, text=True, check=True,
+    )
+
+    assert result.stdout.strip() == "False"
@@ -1,5 +1,9 @@
+import warnings
+from decimal import Decimal
+
 from django.urls import reverse
-from core.models import ExtractedItem
+from core.models import ExtractedItem, Invoice
+from core.utils.export_dashboard import _query_to_dataframe
 
 def test_export_excel_works(client, db):
     ExtractedItem.objects.create(
@@ -16,3 +20,32 @@ def test_export_excel_works(client, db):
         "application/vnd.openxmlformats-officedocument"
     )
     assert response["Content-Disposition"].endswith(".xlsx")
+
+
+def test_export_keeps_invoice_amounts_exact(db):
+    for n, total in enumerate(["1054.10", "0.30"]):
+        item = ExtractedItem.objects.create(
+            source_type="invoice", source_file=f"{n}.html", data={"total": "written", "unit price": f"{n}.5"},
+        )
+        Invoice.objects.create(item=item, net_total=Decimal(total), vat_amount=Decimal("0"), total=Decimal(total))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # no deprecated to_numeric(errors="ignore")
+        df = _query_to_dataframe(ExtractedItem.objects.order_by("id"))
+
+    assert list(df["total"]) == [Decimal("1054.10"), Decimal("0.30")]
+    assert all(isinstance(value, Decimal) for value in df["net total"])
+    assert list(df["unit price"]) == [0.5, 1.5]
+
+
+def test_export_parses_amounts_of_invoices_without_invoice_row(db):
+    ExtractedItem.objects.create(
+        source_type="invoice", source_file="old.html",
+        data={"net total": "€850.00", "vat amount": "€204,00", "total": "€1,054.00"},
+    )
+    ExtractedItem.objects.create(source_type="invoice", source_file="blank.html", data={"total": "n/a"})
+
+    df = _query_to_dataframe(ExtractedItem.objects.order_by("id"))
+
+    assert list(df["total"]) == [Decimal("1054.00"), "n/a"]
+    assert (df["net total"][0], df["vat amount"][0]) == (Decimal("850.00"), Decimal("204.00"))
@@ -1,5 +1,7 @@
+import pathlib
+
 import pytest
-from parsers.forms_parser import parse_form
+from parsers.forms_parser import FIELDS, FormFieldCollector, parse_form
 
 def test_parse_form_basic():
     html = """
@@ -14,3 +16,54 @@ def test_parse_form_basic():
     assert data["full name"] == "John Doe"
     assert data["email"] == "john@example.com"
     assert data["phone"] == "5551234"
+
+
+def bs4_parse_form(raw_html):
+    """
+    The previous BeautifulSoup implementation, kept as the reference.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(raw_html, "html.parser")
+
+    def get_input(name):
+        tag = soup.find(["input", "textarea", "select"], attrs={"name": name})
+        if tag is None:
+            return ""
+        if tag.name == "select":
+            option = tag.find("option", selected=True)
+            return option.get_text(strip=True) if option else ""
+        return tag.get("value", "").strip() if tag.name == "input" else tag.get_text(strip=True)
+
+    return {key: get_input(name) for key, name in FIELDS.items()}
+
+
+FORMS_DIR = pathlib.Path(__file__).resolve().parent.parent / "dummy_data" / "forms"
+
+
+@pytest.mark.parametrize("path", sorted(FORMS_DIR.glob("*.html")), ids=lambda p: p.name)
+def test_parse_form_matches_beautifulsoup_on_corpus(path):
+    html = path.read_text(encoding="utf-8")
+
+    assert parse_form(html) == bs4_parse_form(html)
+
+
+@pytest.mark.parametrize("html", [
+    '<select name="service"><option>A</option><option selected>  B <b>x</b> </option></select>',
+    '<select name="service"><option selected>A<option>B</select><input name="service" value="z">',
+    '<select name="priority"><option>A</option></select>',
+    '<textarea name="message">  hi &amp; <i>there</i>\n bye </textarea>',
+    '<textarea name="message">unterminated',
+    '<input name="email" value><INPUT NAME="phone" VALUE=" 2 "><input name="phone" value="3">',
+    '',
+])
+def test_parse_form_matches_beautifulsoup_on_edge_cases(html):
+    assert parse_form(html) == bs4_parse_form(html)
+
+
+def test_collector_stops_once_all_fields_are_found():
+    collector = FormFieldCollector(["email"])
+    collector.collect('<input name="email" value="a"><p>' + "<b>x</b>" * 1000)
+
+    assert collector.values == {"email": "a"}
+    assert collector.getpos()[1] < 100  # the rest of the document was never tokenized
@@ -1,4 +1,6 @@
-from parsers.invoice_parser import parse_invoice
+import pathlib
+
+from parsers.invoice_parser import layout_fingerprint, layout_plans, parse_invoice
 
 def test_parse_invoice_basic():
     html = """
@@ -26,3 +28,48 @@ def test_parse_invoice_basic():
     assert data["net total"] == "€150.00"
     assert data["vat amount"] == "€24.00"
     assert data["total"] == "€174.00"
+
+
+INVOICES_DIR = pathlib.Path(__file__).resolve().parent.parent / "dummy_data" / "invoices"
+
+
+def corpus():
+    return [path.read_text(encoding="utf-8") for path in sorted(INVOICES_DIR.glob("*.html"))]
+
+
+def test_one_template_has_one_fingerprint():
+    # Same template, different numbers of line items and address lines
+    assert len({layout_fingerprint(html) for html in corpus()}) == 1
+    assert layout_fingerprint("<div><p>a</p></div>") != layout_fingerprint("<div><span>a</span></div>")
+
+
+def test_planned_extraction_matches_generic_path():
+    documents = corpus()
+    generic = []
+    for html in documents:
+        layout_plans.clear()
+        generic.append(parse_invoice(html))
+
+    layout_plans.clear()
+    planned = [parse_invoice(html) for html in documents]
+
+    assert planned == generic
+    stats = layout_plans.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == len(documents) - 1
+
+
+def test_plan_falls_back_when_a_label_moves():
+    layout_plans.clear()
+    template = """
+    <div class="meta"><strong>Αριθμός:</strong> {number}<br><strong>Ημερομηνία:</strong> 01/02/2024</div>
+    <p>{extra}</p>
+    """
+    parse_invoice(template.format(number="A-1", extra="x"))
+
+    # Same skeleton, but the delivery label only appears inside running text
+    data = parse_invoice(template.format(number="A-2", extra="Παράδοση: αύριο"))
+
+    assert data["invoice number"] == "A-2"
+    assert data["delivery"] == "αύριο"
+    assert layout_plans.stats()["fallbacks"] == 1
@@ -0,0 +1,111 @@
+from decimal import Decimal
+
+import pandas as pd
+from django.core.management import call_command
+from django.urls import reverse
+
+from core.models import ExtractedItem, Invoice, InvoiceLine, RawDocument
+from core.utils.invoice_validation import check_invoices
+from parsers.invoice_parser import parse_amount, parse_invoice
+from parsers.pipeline import run_full_scan
+
+INVOICE = """
+<table class="invoice-table">
+  <thead><tr><th>Περιγραφή</th><th>Ποσότητα</th><th>Τιμή Μονάδας</th><th>Σύνολο</th></tr></thead>
+  <tbody>
+    <tr><td>Χαρτί Α4</td><td>20</td><td>€12.00</td><td>€240.00</td></tr>
+    <tr><td>Στυλό &amp; μολύβια</td><td>50</td><td>€2.50</td><td>€125.00</td></tr>
+  </tbody>
+</table>
+<table>
+  <tr><td><strong>Καθαρή Αξία:</strong></td><td>€365.00</td></tr>
+  <tr><td><strong>ΦΠΑ 24%:</strong></td><td>€87.60</td></tr>
+  <tr><td><strong>ΣΥΝΟΛΟ:</strong></td><td>€1,452.60</td></tr>
+</table>
+"""
+
+
+def test_parse_amount_is_exact():
+    assert parse_amount("€1,054.00") == Decimal("1054.00")
+    assert parse_amount("1.054,50 €") == Decimal("1054.50")
+    assert parse_amount("-€3.20") == Decimal("-3.20")
+    assert parse_amount("€85") == Decimal("85")
+    assert parse_amount("—") is None
+
+
+def test_parse_invoice_returns_typed_amounts_and_line_items():
+    data = parse_invoice(INVOICE)
+
+    assert data["total"] == "€1,452.60"  # display value kept as written
+    assert data["amounts"] == {
+        "net total": Decimal("365.00"), "vat amount": Decimal("87.60"), "total": Decimal("1452.60"),
+    }
+    assert data["line items"] == [
+        {"description": "Χαρτί Α4", "quantity": Decimal("20"), "unit price": Decimal("12.00"), "line total": Decimal("240.00")},
+        {"description": "Στυλό & μολύβια", "quantity": Decimal("50"), "unit price": Decimal("2.50"), "line total": Decimal("125.00")},
+    ]
+
+
+def test_check_invoices_flags_each_rule():
+    invoices = pd.DataFrame(
+        [(1, 36500, 8760, 45260), (2, 36500, 8760, 145260), (3, 1000, 300, 1300), (4, None, None, None)],
+        columns=["key", "net", "vat", "total"],
+    ).set_index("key")
+    lines = pd.DataFrame([(1, 24000), (1, 12500), (2, 24000), (3, 1000)], columns=["key", "line_total"])
+
+    result = check_invoices(invoices, lines)
+
+    assert list(result["mismatches"]) == ["", "lines,total", "vat", ""]
+    assert list(result["is_consistent"].astype(object).where(result["is_consistent"].notna(), None)) == [
+        True, False, False, None,
+    ]
+    assert result.loc[2, "lines_sum"] == 24000
+
+
+def test_scan_stores_invoice_rows_and_validates_them(db, settings, tmp_path):
+    invoices = tmp_path / "dummy_data" / "invoices"
+    invoices.mkdir(parents=True)
+    (invoices / "good.html").write_text(INVOICE.replace("€1,452.60", "€452.60"), encoding="utf-8")
+    (invoices / "bad.html").write_text(INVOICE, encoding="utf-8")
+    settings.BASE_DIR = tmp_path
+
+    assert run_full_scan() == (2, 0)
+
+    good = Invoice.objects.get(item__source_file="good.html")
+    assert good.total == Decimal("452.60")
+    assert good.is_consistent is True
+    assert [line.line_total for line in good.lines.all()] == [Decimal("240.00"), Decimal("125.00")]
+    assert "amounts" not in good.item.data and "line items" not in good.item.data
+
+    bad = Invoice.objects.get(item__source_file="bad.html")
+    assert (bad.is_consistent, bad.mismatches) == (False, "total")
+
+
+def test_editing_amounts_rechecks_the_invoice(client, db):
+    item = ExtractedItem.objects.create(
+        source_type="invoice", source_file="inv.html",
+        data={"net total": "€365.00", "vat amount": "€87.60", "total": "€452.60"},
+    )
+    Invoice.objects.create(item=item, net_total=Decimal("365"), vat_amount=Decimal("87.6"), total=Decimal("452.6"))
+
+    client.post(
+        reverse("detail", args=[item.id]),
+        {"net total": "€365.00", "vat amount": "€87.60", "total": "€500.00", "action": "save"},
+    )
+
+    invoice = Invoice.objects.get(item=item)
+    assert invoice.total == Decimal("500.00")
+    assert invoice.mismatches == "total"
+
+
+def test_validate_invoices_command_backfills_older_items(db, capsys):
+    item = ExtractedItem.objects.create(source_type="invoice", source_file="old.html", data={})
+    RawDocument.objects.create(item=item, content=INVOICE)
+
+    call_command("validate_invoices", "--backfill")
+
+    assert InvoiceLine.objects.filter(invoice__item__source_file="old.html").count() == 2
+    out = capsys.readouterr().out
+    assert "Backfilled 1 invoices." in out
+    assert "1 with mismatches" in out
+    assert "old.html: total" in out
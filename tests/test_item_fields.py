@@ -0,0 +1,106 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.urls import reverse
+
+from core.models import ExtractedItem, ItemFields
+from core.utils.item_fields import filter_items, parse_date, project
+
+
+def invoice(number, customer, total, day, status="pending"):
+    return ExtractedItem.objects.create(source_type="invoice", source_file=f"{number}.html", status=status, data={
+        "invoice number": number, "date": day, "customer name": customer,
+        "net total": "", "vat amount": "", "total": total,
+    })
+
+
+def test_project_maps_each_parser_to_typed_columns():
+    assert project({
+        "invoice number": "TF-2024-007", "date": "26/01/2024", "customer name": "Computer World SA",
+        "net total": "€850.00", "vat amount": "€204.00", "total": "€1,054.00",
+    }) == {
+        "name": "Computer World SA", "email": "", "phone": "", "invoice_number": "TF-2024-007",
+        "date": date(2024, 1, 26), "net_total": Decimal("850.00"), "vat_amount": Decimal("204.00"),
+        "total": Decimal("1054.00"),
+    }
+    form = project({"full name": "Γιάννης Κ.", "email": "Yannis@Example.GR", "submission date": "2024-01-18T16:20"})
+    assert (form["name"], form["email"], form["date"], form["total"]) == ("Γιάννης Κ.", "yannis@example.gr", date(2024, 1, 18), None)
+    assert project({"name": "Ελένη", "phone": "6944-123456"})["phone"] == "6944-123456"
+    assert project({}) == project(None)
+
+
+def test_parse_date():
+    assert parse_date("31.12.2023") == date(2023, 12, 31)
+    assert parse_date("31/02/2024") is None
+    assert parse_date("") is None
+
+
+def test_projection_follows_item_writes(client, db):
+    item = invoice("TF-1", "Alpha", "€100.00", "01/01/2024")
+    assert ItemFields.objects.get(item=item).total == Decimal("100.00")
+
+    client.post(reverse("detail", args=[item.id]), {
+        "invoice number": "TF-1", "date": "02/01/2024", "customer name": "Alpha",
+        "net total": "", "vat amount": "", "total": "€7.500,00", "action": "save",
+    })
+    typed = ItemFields.objects.get(item=item)
+    assert (typed.total, typed.date) == (Decimal("7500.00"), date(2024, 1, 2))
+
+    ExtractedItem.objects.filter(pk=item.pk).update(data={"total": "5"})
+    assert ItemFields.objects.get(item=item).total == Decimal("5.00")
+
+    ExtractedItem.objects.bulk_create([ExtractedItem(source_type="form", source_file="f.html", data={"email": "A@B.C"})])
+    assert ItemFields.objects.filter(email="a@b.c").exists()
+
+    item.delete()
+    assert not ItemFields.objects.filter(item_id=item.pk).exists()
+
+
+def test_filter_items_ranges_and_sorts(db):
+    small = invoice("TF-1", "Gamma", "€900.00", "15/01/2024")
+    big_january = invoice("TF-2", "Alpha", "€5,400.00", "20/01/2024")
+    big_february = invoice("TF-3", "Beta", "€12,000.00", "03/02/2024")
+    email = ExtractedItem.objects.create(source_type="email", source_file="m.eml", data={"name": "Delta"})
+
+    def ids(**params):
+        items, _ = filter_items(ExtractedItem.objects.all(), params)
+        return [item.id for item in items]
+
+    assert ids(min_total="5000", date_from="2024-01-01", date_to="2024-01-31") == [big_january.id]
+    assert ids(min_total="5.000,00", sort="-total") == [big_february.id, big_january.id]
+    assert ids(sort="total") == [small.id, big_january.id, big_february.id]  # items without a total left out
+    assert ids(sort="-name") == [small.id, email.id, big_february.id, big_january.id]
+    assert ids(invoice_number="TF-3") == [big_february.id]
+    assert len(ids(min_total="lots", date_from="January", sort="cheapest")) == 4  # malformed: ignored
+
+
+def test_typed_filters_and_sorts_use_indexes(db):
+    def plan(**params):
+        items, _ = filter_items(ExtractedItem.objects.all(), params)
+        sql, sql_params = items.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", sql_params)
+            return " | ".join(row[-1] for row in cursor.fetchall())
+
+    # Newest first: either seek the total index or walk created_at and stop after a page
+    filtered_plan = plan(min_total="5000")
+    assert "SCAN core_itemfields" not in filtered_plan
+    assert "TEMP B-TREE" not in filtered_plan
+    assert "INDEX itemfields_date" in plan(date_from="2024-01-01", sort="-date")
+    sorted_plan = plan(sort="-total")
+    assert "INDEX itemfields_total" in sorted_plan
+    assert "TEMP B-TREE" not in sorted_plan
+
+
+def test_dashboard_and_api_filters(client, db):
+    invoice("TF-1", "Gamma", "€900.00", "15/01/2024")
+    invoice("TF-2", "Alpha", "€5,400.00", "20/01/2024")
+
+    resp = client.get(reverse("dashboard"), {"min_total": "5000", "sort": "-total"})
+    assert b"TF-2.html" in resp.content
+    assert b"TF-1.html" not in resp.content
+    assert b"&amp;sort=-total" in resp.content  # kept by the status links
+
+    rows = client.get(reverse("items_api"), {"sort": "total", "limit": "1"}).json()["items"]
+    assert [(row["invoice_number"], row["total"], row["date"]) for row in rows] == [("TF-1", "900.00", "2024-01-15")]
@@ -0,0 +1,86 @@
+from core.models import ExtractedItem, RawDocument
+from parsers import email_parser, pipeline
+from parsers.local_classifier import LocalEmailClassifier, tokenize
+
+
+def test_tokenize_strips_greek_accents():
+    assert tokenize("Τιμολόγιο ΠΛΗΡΩΜΗΣ 2024") == ["τιμολογιο", "πληρωμης"]
+
+
+def test_keywords_classify_out_of_the_box():
+    classifier = LocalEmailClassifier()
+
+    category, confidence = classifier.predict("Σας αποστέλλουμε το τιμολόγιο, ποσό πληρωμής 120€.")
+    assert category == "Invoice Notification"
+    assert confidence > 0.9
+
+    category, _ = classifier.predict("Θα θέλαμε μια προσφορά για νέα ιστοσελίδα.")
+    assert category == "Client Inquiry"
+
+
+def test_unknown_text_is_uncertain_until_trained():
+    text = "Καλημέρα, στείλτε μας τα στοιχεία του έργου Alpha."
+    classifier = LocalEmailClassifier()
+    assert classifier.predict(text)[1] < 0.9
+
+    classifier.fit([text] * 5 + ["ignored"], ["Client Inquiry"] * 5 + ["Spam"])
+    assert classifier.examples == 5
+    assert classifier.predict(text)[0] == "Client Inquiry"
+    assert classifier.predict(text)[1] > 0.9
+
+
+def test_uncertain_emails_fall_back_to_llm(monkeypatch):
+    monkeypatch.setattr(email_parser, "local_classifier", LocalEmailClassifier())
+    sent = []
+    monkeypatch.setattr(
+        email_parser, "classify_emails_with_gemini",
+        lambda texts: sent.extend(texts) or ["Client Inquiry"] * len(texts),
+    )
+    before = email_parser.classifier_stats()
+
+    results = [
+        ("Επισυνάπτεται το τιμολόγιο, πληρωμή έως 30/6.", {"name": "A"}),
+        ("Καλημέρα, στείλτε μας τα στοιχεία.", {"name": "B"}),
+    ]
+    email_parser.classify_parsed_emails(results)
+
+    assert sent == ["Καλημέρα, στείλτε μας τα στοιχεία."]
+    assert [data["category"] for _, data in results] == ["Invoice Notification", "Client Inquiry"]
+    assert list(results[0][1]) == ["category", "name"]
+
+    after = email_parser.classifier_stats()
+    assert after["local"] - before["local"] == 1
+    assert after["llm"] - before["llm"] == 1
+
+
+def test_scan_trains_on_approved_emails(db, monkeypatch):
+    monkeypatch.setattr(email_parser, "local_classifier", LocalEmailClassifier())
+    monkeypatch.setattr(pipeline, "_classifier_training_signature", None)
+    text = "Καλημέρα, στείλτε μας τα στοιχεία του έργου Alpha."
+    for _ in range(3):
+        item = ExtractedItem.objects.create(
+            source_type="email", source_file="x.eml",
+            data={"category": "Client Inquiry"}, status="approved",
+        )
+        RawDocument.objects.create(item=item, content=text)
+    item = ExtractedItem.objects.create(
+        source_type="email", source_file="y.eml",
+        data={"category": "Invoice Notification"}, status="rejected",
+    )
+    RawDocument.objects.create(item=item, content=text)
+
+    pipeline.refresh_local_classifier()
+    trained = email_parser.local_classifier
+    assert trained.examples == 3
+    assert trained.predict(text)[0] == "Client Inquiry"
+
+    # unchanged approvals: no retraining
+    pipeline.refresh_local_classifier()
+    assert email_parser.local_classifier is trained
+
+
+def test_classifier_metrics_endpoint(client):
+    response = client.get("/api/metrics/classifier/")
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"local", "llm", "local_share", "threshold", "training_examples"}
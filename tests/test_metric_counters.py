@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import ExtractedItem, MetricCounter
+from core.utils import metric_counters
+
+
+def stored():
+    return {
+        (dimension, key): count
+        for dimension, key, count in MetricCounter.objects.values_list("dimension", "key", "count")
+        if count
+    }
+
+
+def actual():
+    return dict(metric_counters.tally(ExtractedItem.objects.all()))
+
+
+def make(status="pending", source_type="form", **fields):
+    return ExtractedItem(source_type=source_type, source_file="a.html", status=status, data={}, **fields)
+
+
+def test_counters_follow_save_and_delete(db):
+    item = make()
+    item.save()
+    assert MetricCounter.counts("status") == {"pending": 1}
+
+    item.status = "approved"
+    item.save()
+    assert MetricCounter.counts("status") == {"pending": 0, "approved": 1}
+
+    # Loaded without the counted fields: the stored status is looked up
+    partial = ExtractedItem.objects.only("id").get(pk=item.pk)
+    partial.status = "rejected"
+    partial.save()
+
+    ExtractedItem.objects.get(pk=item.pk).delete()
+    assert stored() == actual() == {}
+
+
+def test_counters_follow_bulk_operations(db):
+    yesterday = timezone.now() - timedelta(days=1)
+    ExtractedItem.objects.bulk_create(
+        [make() for _ in range(3)] + [make("error", "email", created_at=yesterday)]
+    )
+    assert stored() == actual()
+
+    ExtractedItem.objects.filter(status="pending").update(status="approved")
+    assert MetricCounter.counts("status")["approved"] == 3
+    assert stored() == actual()
+
+    items = list(ExtractedItem.objects.filter(source_type="email"))
+    for item in items:
+        item.status = "pending"
+    ExtractedItem.objects.bulk_update(items, ["status"])
+    assert stored() == actual()
+
+    ExtractedItem.objects.filter(status="approved")[:10]  # slicing doesn't write
+    ExtractedItem.objects.filter(source_type="form").delete()
+    assert stored() == actual()
+    assert MetricCounter.counts("source") == {"form": 0, "email": 1}
+
+
+def test_concurrent_saves_of_one_item_diff_against_the_stored_row(db):
+    item = make()
+    item.save()
+    first = ExtractedItem.objects.get(pk=item.pk)
+    second = ExtractedItem.objects.get(pk=item.pk)  # both loaded as pending
+
+    first.status = "approved"
+    first.save()
+    second.status = "rejected"
+    second.save()
+
+    assert MetricCounter.counts("status") == {"pending": 0, "approved": 0, "rejected": 1}
+    assert stored() == actual()
+
+    first.delete()  # loaded as pending, stored as rejected
+    assert stored() == actual() == {}
+
+
+def test_updates_of_other_fields_leave_counters_alone(db, django_assert_num_queries):
+    item = make()
+    item.save()
+
+    # The write, then the "items" version bump (cached pages); no counter reads
+    with django_assert_num_queries(2):
+        ExtractedItem.objects.filter(pk=item.pk).update(error_message="x")
+    with django_assert_num_queries(2):
+        item.save(update_fields=["error_message"])
+
+
+@pytest.mark.parametrize("name", ["metrics_status", "metrics_source", "metrics_daily"])
+def test_metrics_endpoints_read_counters_only(client, db, django_assert_num_queries, name):
+    ExtractedItem.objects.bulk_create([make() for _ in range(50)])
+
+    with django_assert_num_queries(2):  # the data version (ETag), then the counters
+        resp = client.get(reverse(name))
+
+    assert resp.status_code == 200
+
+
+def test_daily_counts_from_counters(client, db):
+    ExtractedItem.objects.bulk_create([
+        make("approved"),
+        make("pending", created_at=timezone.now() - timedelta(days=2)),
+        make("pending", created_at=timezone.now() - timedelta(days=30)),
+    ])
+
+    days = client.get(reverse("metrics_daily")).json()
+
+    assert len(days) == 14
+    assert days[-1]["approved"] == 1
+    assert days[-3]["pending"] == 1
+    assert sum(day["pending"] for day in days) == 1
+
+
+def test_rebuild_metrics_repairs_drift(db, capsys):
+    ExtractedItem.objects.bulk_create([make() for _ in range(2)])
+    MetricCounter.objects.filter(dimension="status", key="pending").update(count=7)
+    MetricCounter.objects.create(dimension="source", key="invoice", count=3)
+
+    call_command("rebuild_metrics")
+
+    assert stored() == actual()
+    out = capsys.readouterr().out
+    assert "Repaired 2 drifted counters" in out
+    assert "status pending: +5" in out
+
+    call_command("rebuild_metrics")
+    assert "in step" in capsys.readouterr().out
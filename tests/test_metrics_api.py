@@ -47,3 +47,10 @@ def test_metrics_daily_counts(client, db):
         assert "date" in row
         for key in ["pending", "approved", "rejected", "error"]:
             assert key in row
+
+
+def test_metrics_parser_timings(client, db):
+    resp = client.get(reverse("metrics_parsers"))
+    assert resp.status_code == 200
+    for stats in resp.json().values():
+        assert set(stats) == {"calls", "errors", "seconds"}
@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import DataVersion, ExtractedItem, MetricCounter
+
+METRICS = ["metrics_status", "metrics_source", "metrics_daily"]
+
+
+def make(status="pending"):
+    return ExtractedItem.objects.create(source_type="form", source_file="a.html", status=status, data={})
+
+
+@pytest.mark.parametrize("name", METRICS)
+def test_unchanged_metrics_answer_304_from_the_version_alone(client, db, django_assert_num_queries, name):
+    make()
+    first = client.get(reverse(name))
+    assert first.status_code == 200
+    assert first["ETag"]
+    assert "no-cache" in first["Cache-Control"]
+
+    with django_assert_num_queries(1):
+        again = client.get(reverse(name), HTTP_IF_NONE_MATCH=first["ETag"])
+    assert again.status_code == 304
+
+    since = client.get(reverse(name), HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+    assert since.status_code == 304
+
+
+@pytest.mark.parametrize("name", METRICS)
+def test_counted_writes_change_the_etag(client, db, name):
+    item = make()
+    etag = client.get(reverse(name))["ETag"]
+
+    item.error_message = "not counted"
+    item.save(update_fields=["error_message"])
+    assert client.get(reverse(name), HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    ExtractedItem.objects.filter(pk=item.pk).update(status="approved")
+    resp = client.get(reverse(name), HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert resp["ETag"] != etag
+
+
+def test_daily_etag_moves_at_midnight(client, db, monkeypatch):
+    make()
+    etag = client.get(reverse("metrics_daily"))["ETag"]
+
+    tomorrow = timezone.now() + timedelta(days=1)
+    monkeypatch.setattr(timezone, "now", lambda: tomorrow)
+
+    assert client.get(reverse("metrics_daily"), HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_version_bumps_once_per_write_and_on_repair(db):
+    assert DataVersion.current(DataVersion.METRICS) == (0, None)
+    make()
+    ExtractedItem.objects.bulk_create([ExtractedItem(source_type="email", source_file="b.eml", data={})])
+    version, changed_at = DataVersion.current(DataVersion.METRICS)
+    assert version == 2 and changed_at is not None
+
+    call_command("rebuild_metrics")
+    assert DataVersion.current(DataVersion.METRICS)[0] == 2  # nothing to repair
+
+    MetricCounter.objects.filter(dimension="status", key="pending").update(count=9)
+    call_command("rebuild_metrics")
+    assert DataVersion.current(DataVersion.METRICS)[0] == 3
+
+
+def test_dashboard_sends_the_validators(client, db):
+    assert "If-None-Match" in client.get(reverse("dashboard")).content.decode()
@@ -0,0 +1,114 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.urls import reverse
+
+from core.models import ExtractedItem
+from dashboard import metrics
+from dashboard import metrics_stream as live_metrics
+
+
+@pytest.fixture
+def stream_settings(settings):
+    settings.METRICS_STREAM_POLL_SECONDS = 0.01
+    settings.METRICS_STREAM_MIN_INTERVAL = 0
+    settings.METRICS_STREAM_HEARTBEAT_SECONDS = 0.05
+    settings.METRICS_STREAM_MAX_SECONDS = 1
+    return settings
+
+
+def parse(chunk):
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    return fields["id"], json.loads(fields["data"])
+
+
+def read(last_event_id=None, count=2, between=None):
+    """
+    The first `count` chunks of an ASGI stream; `between` runs (sync)
+    after the first event.
+    """
+    async def collect():
+        chunks = []
+        stream = live_metrics.events(last_event_id)
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                if between and chunk.startswith("event:") and len(chunks) == 2:
+                    await sync_to_async(between)()
+                if len(chunks) == count:
+                    break
+        finally:
+            await stream.aclose()
+        return chunks
+
+    return async_to_sync(collect)()
+
+
+def test_stream_starts_with_the_current_metrics(db, stream_settings):
+    ExtractedItem.objects.create(source_type="form", source_file="a.html", data={})
+
+    retry, event = read()
+
+    assert retry == "retry: 10000\n\n"
+    assert event.startswith("event: metrics\n")
+    event_id, payload = parse(event)
+    assert event_id == live_metrics.current_event_id()
+    assert payload == metrics.combined()
+    assert payload["status"]["pending"] == 1
+
+
+def test_stream_skips_what_the_client_has(db, stream_settings):
+    _, keepalive = read(live_metrics.current_event_id())
+
+    assert keepalive == ": keepalive\n\n"
+
+
+def test_stream_pushes_changes(db, stream_settings):
+    item = ExtractedItem.objects.create(source_type="form", source_file="a.html", data={})
+
+    def review():
+        ExtractedItem.objects.filter(pk=item.pk).update(status="approved")
+
+    chunks = [chunk for chunk in read(count=4, between=review) if chunk.startswith("event:")]
+
+    first_id, first = parse(chunks[0])
+    second_id, second = parse(chunks[1])
+    assert first_id != second_id
+    assert first["status"]["approved"] == 0
+    assert second["status"]["approved"] == 1
+
+
+def test_stream_ends_and_stops_watching(db, stream_settings):
+    stream_settings.METRICS_STREAM_MAX_SECONDS = 0.1
+
+    async def drain():
+        chunks = [chunk async for chunk in live_metrics.events()]
+        return chunks, live_metrics._watcher().streams
+
+    chunks, streams = async_to_sync(drain)()
+
+    assert chunks[0].startswith("retry:")
+    assert chunks[1].startswith("event:")
+    assert streams == 0
+
+
+def test_wsgi_stream_sends_one_event(client, db, stream_settings):
+    resp = client.get(reverse("metrics_stream"))
+
+    assert resp["Content-Type"] == "text/event-stream"
+    assert resp["Cache-Control"] == "no-cache"
+    retry, event = list(chunk.decode() for chunk in resp.streaming_content)
+    assert retry.startswith("retry:")
+    event_id, payload = parse(event)
+    assert payload == metrics.combined()
+
+    again = client.get(reverse("metrics_stream"), HTTP_LAST_EVENT_ID=event_id)
+    assert [chunk.decode() for chunk in again.streaming_content] == [retry]
+
+
+def test_dashboard_listens_to_the_stream(client, db):
+    html = client.get(reverse("dashboard")).content.decode()
+
+    assert "new EventSource" in html
+    assert reverse("metrics_stream") in html
@@ -0,0 +1,127 @@
+import hashlib
+import importlib
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+
+@pytest.fixture
+def migrate(transactional_db):
+    """
+    migrate(target) -> historical apps at `target`; back to the latest
+    migrations afterwards.
+    """
+    def migrate(target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([target])
+        return executor.loader.project_state([target]).apps
+
+    yield migrate
+    executor = MigrationExecutor(connection)
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+
+def test_content_hash_backfill_hashes_the_source_bytes(migrate, settings, tmp_path):
+    settings.BASE_DIR = tmp_path
+    crlf = "Subject: Γεια\r\n\r\nline one\r\nline two\r\n".encode("utf-8")
+    (tmp_path / "dummy_data" / "emails").mkdir(parents=True)
+    (tmp_path / "dummy_data" / "emails" / "crlf.eml").write_bytes(crlf)
+    stored_text = crlf.decode("utf-8").replace("\r\n", "\n")
+
+    ExtractedItem = migrate(("core", "0003_scanjob")).get_model("core", "ExtractedItem")
+    on_disk = ExtractedItem.objects.create(source_type="email", source_file="crlf.eml", raw_content=stored_text, data={})
+    gone = ExtractedItem.objects.create(source_type="form", source_file="gone.html", raw_content="<p>x</p>", data={})
+
+    ExtractedItem = migrate(("core", "0004_extracteditem_content_hash")).get_model("core", "ExtractedItem")
+
+    assert ExtractedItem.objects.get(pk=on_disk.pk).content_hash == hashlib.sha256(crlf).hexdigest()
+    assert ExtractedItem.objects.get(pk=gone.pk).content_hash == hashlib.sha256(b"<p>x</p>").hexdigest()
+
+
+def test_content_hash_backfill_covers_every_batch(migrate, settings, tmp_path, monkeypatch):
+    settings.BASE_DIR = tmp_path
+    monkeypatch.setattr(importlib.import_module("core.migrations.0004_extracteditem_content_hash"), "BATCH_SIZE", 2)
+
+    ExtractedItem = migrate(("core", "0003_scanjob")).get_model("core", "ExtractedItem")
+    for n in range(5):
+        ExtractedItem.objects.create(source_type="form", source_file=f"{n}.html", raw_content=f"<p>{n}</p>", data={})
+
+    ExtractedItem = migrate(("core", "0004_extracteditem_content_hash")).get_model("core", "ExtractedItem")
+
+    assert sorted(ExtractedItem.objects.values_list("content_hash", flat=True)) == sorted(
+        hashlib.sha256(f"<p>{n}</p>".encode()).hexdigest() for n in range(5)
+    )
+
+
+def test_raw_documents_compress_and_restore_in_batches(migrate, monkeypatch):
+    monkeypatch.setattr(importlib.import_module("core.migrations.0007_compressed_raw_documents"), "BATCH_SIZE", 2)
+    texts = [f"<html><body><p>Invoice {n}</p>{'<td>row</td>' * 50}</body></html>" for n in range(5)]
+
+    apps = migrate(("core", "0006_rawdocument"))
+    for n, text in enumerate(texts):
+        item = apps.get_model("core", "ExtractedItem").objects.create(source_type="invoice", source_file=f"{n}.html", data={})
+        apps.get_model("core", "RawDocument").objects.create(item_id=item.pk, content=text)
+
+    apps = migrate(("core", "0007_compressed_raw_documents"))
+    stored = list(apps.get_model("core", "RawDocument").objects.order_by("pk").values_list("data", "size"))
+    assert all(bytes(data)[0] == 2 and len(data) < size for data, size in stored)  # dictionary-compressed
+
+    apps = migrate(("core", "0006_rawdocument"))
+    assert list(apps.get_model("core", "RawDocument").objects.order_by("pk").values_list("content", flat=True)) == texts
+
+
+def test_metric_counters_start_from_the_existing_items(migrate):
+    apps = migrate(("core", "0007_compressed_raw_documents"))
+    ExtractedItem = apps.get_model("core", "ExtractedItem")
+    for status, source_type in [("pending", "form"), ("pending", "form"), ("approved", "email")]:
+        ExtractedItem.objects.create(source_type=source_type, source_file="x", status=status, data={})
+    days = {item.created_at.date().isoformat() for item in ExtractedItem.objects.all()}
+
+    apps = migrate(("core", "0008_metriccounter"))
+    counts = dict(
+        ((dimension, key), count)
+        for dimension, key, count in apps.get_model("core", "MetricCounter").objects.values_list("dimension", "key", "count")
+    )
+
+    assert counts[("status", "pending")] == 2 and counts[("status", "approved")] == 1
+    assert counts[("source", "form")] == 2 and counts[("source", "email")] == 1
+    assert sum(count for (dimension, _), count in counts.items() if dimension == "day") == 3
+    assert {key.split(":")[0] for dimension, key in counts if dimension == "day"} == days
+
+
+def test_search_index_covers_the_existing_items(migrate):
+    apps = migrate(("core", "0008_metriccounter"))
+    ExtractedItem = apps.get_model("core", "ExtractedItem")
+    form = ExtractedItem.objects.create(source_type="form", source_file="form1.html", data={"company": "Τιμολόγιο ΑΕ"})
+    mail = ExtractedItem.objects.create(source_type="email", source_file="mail.eml", data={})
+    raw = "Subject: Offer\nContent-Type: text/plain; charset=utf-8\n\nΚαλησπέρα, ζητάμε προσφορά.\n"
+    apps.get_model("core", "RawDocument").objects.create(item_id=mail.pk, data=bytes([0]) + raw.encode(), size=len(raw))
+
+    migrate(("core", "0009_itemsearch"))
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT rowid, source_file, fields, raw FROM core_itemsearch ORDER BY rowid")
+        rows = cursor.fetchall()
+    assert rows[0] == (form.pk, "form1.html", "τιμολογιο αε", "")
+    assert rows[1][0] == mail.pk and "ζηταμε προσφορα" in rows[1][3]
+
+
+def test_item_fields_project_the_existing_items(migrate):
+    apps = migrate(("core", "0009_itemsearch"))
+    ExtractedItem = apps.get_model("core", "ExtractedItem")
+    invoice = ExtractedItem.objects.create(
+        source_type="invoice", source_file="invoice1.html",
+        data={"customer name": "Computer World SA", "date": "26/01/2024", "total": "€1.054,00"},
+    )
+    form = ExtractedItem.objects.create(source_type="form", source_file="form1.html", data={"email": "A@Example.gr"})
+
+    typed = {
+        row.item_id: row for row in migrate(("core", "0010_itemfields")).get_model("core", "ItemFields").objects.all()
+    }
+
+    assert (typed[invoice.pk].name, typed[invoice.pk].total) == ("Computer World SA", Decimal("1054.00"))
+    assert typed[invoice.pk].date == date(2024, 1, 26)
+    assert (typed[form.pk].email, typed[form.pk].total) == ("a@example.gr", None)
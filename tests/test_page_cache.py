@@ -0,0 +1,114 @@
+import pytest
+from django.core.cache import caches
+from django.test import Client
+from django.urls import reverse
+
+from core.models import ExtractedItem, ScanJob
+from dashboard import page_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    caches["pages"].clear()
+
+
+def make(name, status="pending"):
+    return ExtractedItem.objects.create(source_type="form", source_file=name, status=status, data={"full_name": "Test"})
+
+
+def test_repeated_pages_come_from_the_cache(client, db, django_assert_num_queries):
+    item = make("a.html")
+    first = client.get(reverse("dashboard"))
+    client.get(reverse("detail", args=[item.pk]))
+    hits = page_cache.stats()["hits"]
+
+    with django_assert_num_queries(2):  # the items version and the scan banner
+        again = client.get(reverse("dashboard"))
+    with django_assert_num_queries(1):
+        detail = client.get(reverse("detail", args=[item.pk]))
+
+    assert again.context is None  # not rendered
+    assert b"a.html" in first.content and b"a.html" in again.content
+    assert f"Review Item #{item.pk}".encode() in detail.content
+    assert page_cache.stats()["hits"] == hits + 2
+
+
+def test_pages_vary_by_status_and_page(client, db, settings):
+    settings.DASHBOARD_PAGE_SIZE = 1
+    make("pending.html")
+    make("approved.html", status="approved")
+    make("approved-2.html", status="approved")
+
+    assert b"pending.html" in client.get(reverse("dashboard")).content
+    approved = client.get(reverse("dashboard"), {"status": "approved"})
+    assert b"approved-2.html" in approved.content
+    assert b"pending.html" not in approved.content
+    second = client.get(reverse("dashboard") + "?" + approved.context["next_query"])
+    assert b"approved.html" in second.content
+    assert b"approved-2.html" not in second.content
+
+
+def test_item_writes_invalidate_the_pages(client, db):
+    item = make("a.html")
+    detail_url = reverse("detail", args=[item.pk])
+    client.get(reverse("dashboard"))
+    client.get(detail_url)
+
+    make("b.html")
+    assert b"b.html" in client.get(reverse("dashboard")).content
+
+    ExtractedItem.objects.filter(pk=item.pk).update(data={"full_name": "Edited"})
+    assert b"Edited" in client.get(detail_url).content
+
+    client.post(detail_url, {"full_name": "Edited", "action": "approve"})
+    assert b"a.html" not in client.get(reverse("dashboard")).content
+    assert b"a.html" in client.get(reverse("dashboard"), {"status": "approved"}).content
+
+    ExtractedItem.objects.filter(pk=item.pk).delete()
+    assert client.get(detail_url).status_code == 404
+
+
+def test_scan_banner_is_not_cached(client, db):
+    make("a.html")
+    assert b'id="scan-progress"' not in client.get(reverse("dashboard")).content
+
+    job = ScanJob.objects.create(status="running")
+    assert b'id="scan-progress"' in client.get(reverse("dashboard")).content
+
+    job.status = "done"
+    job.save()
+    assert b'id="scan-progress"' not in client.get(reverse("dashboard")).content
+
+
+def test_each_client_gets_its_own_csrf_token(db):
+    item = make("a.html")
+    url = reverse("detail", args=[item.pk])
+    first, second = Client(enforce_csrf_checks=True), Client(enforce_csrf_checks=True)
+    first.get(url)
+
+    page = second.get(url)
+    token = page.content.decode().split('name="csrfmiddlewaretoken" value="', 1)[1].split('"', 1)[0]
+    assert page_cache.CSRF_PLACEHOLDER not in page.content.decode()
+
+    resp = second.post(url, {"csrfmiddlewaretoken": token, "action": "approve"})
+    assert resp.status_code == 302
+
+
+def test_flash_messages_are_shown_once_and_never_cached(client, db):
+    item = make("a.html")
+    client.get(reverse("dashboard"))
+
+    client.post(reverse("detail", args=[item.pk]), {"action": "reject"})
+    assert b"Item rejected." in client.get(reverse("dashboard")).content
+    assert b"Item rejected." not in client.get(reverse("dashboard")).content
+    assert b"Item rejected." not in Client().get(reverse("dashboard")).content
+
+
+def test_page_cache_endpoint(client, db):
+    client.get(reverse("dashboard"))
+    client.get(reverse("dashboard"))
+
+    stats = client.get(reverse("metrics_page_cache")).json()
+
+    assert stats["hits"] >= 1
+    assert 0 < stats["hit_rate"] <= 1
@@ -1,22 +1,166 @@
-from parsers.pipeline import run_full_scan
-from core.models import ExtractedItem
+import hashlib
+import os
+import pytest
 
-def test_pipeline_creates_items(db, settings, tmp_path, monkeypatch):
-    # Create temporary dummy_data folder
-    dummy = tmp_path / "dummy_data"
-    (dummy / "forms").mkdir(parents=True)
-    (dummy / "emails").mkdir(parents=True)
-    (dummy / "invoices").mkdir(parents=True)
+from parsers.pipeline import run_full_scan
+from parsers.registry import registry
+from core.models import ExtractedItem, MetricCounter, RawDocument, ScanManifestEntry
 
+def test_pipeline_creates_items(db, dummy_data):
     # Simple test form file
-    f = dummy / "forms" / "form1.html"
+    f = dummy_data / "forms" / "form1.html"
     f.write_text('<input name="full_name" value="Test User">')
 
-    # Point Django settings to new dummy_data directory
-    monkeypatch.setattr(settings, "BASE_DIR", tmp_path)
-
     created, errors = run_full_scan()
 
     assert created == 1
     assert errors == 0
     assert ExtractedItem.objects.count() == 1
+
+
+def test_pipeline_parallel_bulk_insert(db, dummy_data):
+    for i in range(5):
+        (dummy_data / "forms" / f"form{i}.html").write_text(
+            f'<input name="full_name" value="User {i}">'
+        )
+
+    created, errors = run_full_scan(workers=2, batch_size=2)
+
+    assert (created, errors) == (5, 0)
+    names = {item.data["full name"] for item in ExtractedItem.objects.all()}
+    assert names == {f"User {i}" for i in range(5)}
+
+    # Second run imports nothing new
+    assert run_full_scan(workers=2) == (0, 0)
+
+
+def test_pipeline_marks_parser_failures_as_error(db, dummy_data, monkeypatch):
+    (dummy_data / "forms" / "bad.html").write_text("<form></form>")
+
+    def broken(raw):
+        raise ValueError("boom")
+
+    monkeypatch.setattr(registry.get("form"), "parse", broken)
+
+    created, errors = run_full_scan()
+
+    assert (created, errors) == (0, 1)
+    item = ExtractedItem.objects.get()
+    assert item.status == "error"
+    assert item.error_message == "boom"
+
+
+def test_pipeline_manifest_skips_unchanged_and_picks_up_modified(
+    db, dummy_data, django_assert_max_num_queries
+):
+    for i in range(20):
+        (dummy_data / "forms" / f"form{i}.html").write_text(f'<input name="full_name" value="User {i}">')
+
+    assert run_full_scan() == (20, 0)
+    assert ScanManifestEntry.objects.count() == 20
+
+    # Unchanged rescan: one manifest query, no per-file lookups
+    with django_assert_max_num_queries(1):
+        assert run_full_scan() == (0, 0)
+
+    changed = dummy_data / "forms" / "form3.html"
+    changed.write_text('<input name="full_name" value="User 3 (fixed)">')
+    os.utime(changed, ns=(0, 0))
+
+    assert run_full_scan() == (1, 0)
+    item = ExtractedItem.objects.get(source_file="form3.html")
+    assert item.data["full name"] == "User 3 (fixed)"
+    assert "fixed" in item.raw_document.content
+    assert ExtractedItem.objects.count() == 20
+
+
+def test_pipeline_modified_file_updates_its_item(db, dummy_data):
+    def invoice(total):
+        return (
+            '<table class="invoice-table"><tr><th>Περιγραφή</th><th>Σύνολο</th></tr>'
+            f"<tr><td>Χαρτί Α4</td><td>€{total}</td></tr></table>"
+            f"<table><tr><td><strong>ΣΥΝΟΛΟ:</strong></td><td>€{total}</td></tr></table>"
+        )
+
+    changed = dummy_data / "invoices" / "invoice1.html"
+    changed.write_text(invoice("100.00"))
+    other = dummy_data / "forms" / "form1.html"
+    other.write_text('<input name="full_name" value="Test User">')
+    assert run_full_scan() == (2, 0)
+    item = ExtractedItem.objects.get(source_file="invoice1.html")
+    ExtractedItem.objects.filter(pk=item.pk).update(status="approved")
+
+    changed.write_text(invoice("250.00"))
+    os.utime(changed, ns=(0, 0))
+    assert run_full_scan() == (1, 0)
+
+    updated = ExtractedItem.objects.get(source_file="invoice1.html")
+    assert updated.pk == item.pk
+    assert updated.status == "pending"
+    assert updated.data["total"] == "€250.00"
+    assert updated.content_hash == hashlib.sha256(changed.read_bytes()).hexdigest()
+    assert str(updated.invoice.total) == "250.00"
+    assert [str(line.line_total) for line in updated.invoice.lines.all()] == ["250.00"]
+    assert updated.typed.total == 250
+    assert MetricCounter.counts("status", ["pending", "approved"]) == {"pending": 2, "approved": 0}
+
+
+def test_pipeline_manifest_adopts_items_imported_without_it(db, dummy_data):
+    html = '<input name="full_name" value="Test User">'
+    (dummy_data / "forms" / "form1.html").write_text(html)
+
+    # Imported before the manifest existed; content_hash as backfilled by migration 0004
+    item = ExtractedItem.objects.create(
+        source_type="form", source_file="form1.html",
+        content_hash=hashlib.sha256(html.encode("utf-8")).hexdigest(), data={},
+    )
+    RawDocument.objects.create(item=item, content=html)
+
+    assert run_full_scan() == (0, 0)
+    assert ScanManifestEntry.objects.filter(path="forms/form1.html").exists()
+
+
+def test_pipeline_deduplicates_by_content_not_name(db, dummy_data, monkeypatch):
+    invoice = "<html><body>Αριθμός: TF-1</body></html>"
+    (dummy_data / "invoices" / "invoice_a.html").write_text(invoice)
+    (dummy_data / "invoices" / "invoice_a_resent.html").write_text(invoice)
+    (dummy_data / "forms" / "invoice_a.html").write_text('<input name="full_name" value="Same name">')
+
+    calls = []
+
+    def counting_parse_invoice(raw):
+        calls.append(raw)
+        return {"invoice number": "TF-1"}
+
+    monkeypatch.setattr(registry.get("invoice"), "parse", counting_parse_invoice)
+
+    assert run_full_scan() == (2, 0)
+
+    # The re-sent invoice is linked in the manifest but never parsed or stored
+    assert len(calls) == 1
+    assert ExtractedItem.objects.filter(source_type="invoice").count() == 1
+    assert ScanManifestEntry.objects.filter(path__startswith="invoices/").count() == 2
+    # A different document reusing a name is imported
+    assert ExtractedItem.objects.filter(source_type="form", source_file="invoice_a.html").exists()
+
+
+def test_pipeline_streaming_resumes_after_last_committed_chunk(db, dummy_data):
+    for i in range(7):
+        (dummy_data / "forms" / f"form{i}.html").write_text(f'<input name="full_name" value="User {i}">')
+
+    def crash_after_first_chunk(progress):
+        raise RuntimeError("worker killed")
+
+    with pytest.raises(RuntimeError):
+        run_full_scan(stream=True, batch_size=3, progress=crash_after_first_chunk)
+
+    assert ExtractedItem.objects.count() == 3
+
+    reports = []
+    created, errors = run_full_scan(stream=True, batch_size=3, progress=reports.append)
+
+    assert (created, errors) == (4, 0)
+    assert ExtractedItem.objects.count() == 7
+    assert [p.chunk for p in reports] == [1, 2, 3]
+    assert reports[-1].files_seen == 7
+    assert reports[-1].created == 4
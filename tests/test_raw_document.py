@@ -0,0 +1,50 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import ExtractedItem, RawDocument
+from parsers.pipeline import run_full_scan
+
+RAW = "<html><body>Ονοματεπώνυμο: Test</body></html>"
+
+
+def _item_with_raw(**fields):
+    item = ExtractedItem.objects.create(source_type="form", source_file="a.html", data={}, **fields)
+    RawDocument.objects.create(item=item, content=RAW)
+    return item
+
+
+def test_scan_stores_raw_content_apart_from_the_item(db, dummy_data):
+    (dummy_data / "forms" / "form1.html").write_text('<input name="full_name" value="Test User">')
+
+    run_full_scan()
+
+    item = ExtractedItem.objects.get(source_file="form1.html")
+    assert item.raw_document.content == '<input name="full_name" value="Test User">'
+
+
+def test_dashboard_never_reads_raw_content(client, db):
+    _item_with_raw()
+
+    with CaptureQueriesContext(connection) as queries:
+        resp = client.get(reverse("dashboard"), {"status": "all"})
+
+    assert resp.status_code == 200
+    assert b"a.html" in resp.content
+    assert not any("rawdocument" in query["sql"] for query in queries.captured_queries)
+
+
+def test_detail_shows_raw_content(client, db):
+    item = _item_with_raw()
+
+    resp = client.get(reverse("detail", args=[item.id]))
+
+    assert "Ονοματεπώνυμο: Test" in resp.content.decode()
+
+
+def test_deleting_an_item_deletes_its_raw_document(db):
+    item = _item_with_raw()
+
+    item.delete()
+
+    assert not RawDocument.objects.exists()
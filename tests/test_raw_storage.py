@@ -0,0 +1,104 @@
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from core.models import CompressionDictionary, ExtractedItem, RawDocument
+from core.utils import raw_storage
+
+STYLE = "<style>body { font-family: Arial; } table { border-collapse: collapse; } td { padding: 4px; }</style>\n"
+
+
+def invoice(n):
+    return f"<html><head>{STYLE}</head><body><h1>Τιμολόγιο TF-2024-{n:03d}</h1><p>Σύνολο: €{n * 10}.00</p></body></html>"
+
+
+@pytest.fixture(autouse=True)
+def fresh_dictionaries():
+    raw_storage.reset_cache()
+    yield
+    raw_storage.reset_cache()
+
+
+@pytest.mark.parametrize("text", ["", "ok", invoice(1), "Όνομα: Μαρία\n" * 50])
+def test_encode_decode_roundtrip(text):
+    dictionary = (7, raw_storage.train_dictionary([[invoice(2)]]))
+
+    assert raw_storage.decode(raw_storage.encode(text), {}) == text
+    assert raw_storage.decode(raw_storage.encode(text, dictionary), {7: dictionary[1]}) == text
+
+
+def test_short_texts_are_stored_plain():
+    assert raw_storage.encode("ok")[0] == raw_storage.PLAIN
+
+
+def test_dictionary_beats_per_document_zlib_on_boilerplate():
+    dictionary = (1, raw_storage.train_dictionary([[invoice(n) for n in range(1, 5)]]))
+    text = invoice(42)
+
+    with_dictionary = raw_storage.encode(text, dictionary)
+
+    assert len(with_dictionary) < len(raw_storage.encode(text)) / 2
+    assert raw_storage.dictionary_of(with_dictionary) == 1
+
+
+def test_raw_document_compresses_transparently(db):
+    item = ExtractedItem.objects.create(source_type="invoice", source_file="a.html", data={})
+    RawDocument.objects.create(item=item, content=invoice(1) * 5)
+
+    document = RawDocument.objects.get(item=item)
+    assert document.size == len((invoice(1) * 5).encode("utf-8"))
+    assert len(document.data) < document.size
+    assert document.content == invoice(1) * 5
+
+
+def test_compress_command_trains_and_recompresses(db, capsys):
+    for n in range(1, 6):
+        item = ExtractedItem.objects.create(source_type="invoice", source_file=f"{n}.html", data={})
+        RawDocument.objects.create(item=item, content=invoice(n))
+    stored_before = sum(len(data) for data in RawDocument.objects.values_list("data", flat=True))
+
+    call_command("compress_raw_documents", "--train", "--batch-size", "2")
+
+    dictionary = CompressionDictionary.objects.get()
+    documents = RawDocument.objects.order_by("item_id")
+    assert all(raw_storage.dictionary_of(document.data) == dictionary.id for document in documents)
+    assert [document.content for document in documents] == [invoice(n) for n in range(1, 6)]
+    assert sum(len(document.data) for document in documents) < stored_before
+    assert "Recompressed 5 documents" in capsys.readouterr().out
+
+    # Rows written later use the new dictionary too
+    item = ExtractedItem.objects.create(source_type="invoice", source_file="6.html", data={})
+    assert raw_storage.dictionary_of(RawDocument.objects.create(item=item, content=invoice(6)).data) == dictionary.id
+
+
+def test_storage_metrics(client, db):
+    item = ExtractedItem.objects.create(source_type="invoice", source_file="a.html", data={})
+    RawDocument.objects.create(item=item, content=invoice(1) * 5)
+
+    data = client.get(reverse("metrics_storage")).json()
+
+    assert data["raw_documents"] == 1
+    assert data["compression_ratio"] > 1
+    assert data["file_bytes"] == data["pages"] * data["page_size"]
+    assert "core_rawdocument" in data["tables"]
+    assert data["cache_pages"] > 0
+
+
+def test_storage_metrics_are_cached_until_items_change(client, db, django_assert_num_queries):
+    client.get(reverse("metrics_storage"))
+
+    with django_assert_num_queries(1):  # the items version only
+        cached = client.get(reverse("metrics_storage")).json()
+    assert cached["raw_documents"] == 0
+
+    item = ExtractedItem.objects.create(source_type="invoice", source_file="a.html", data={})
+    RawDocument.objects.create(item=item, content=invoice(1))
+    assert client.get(reverse("metrics_storage")).json()["raw_documents"] == 1
+
+
+def test_db_stats_command(db, capsys):
+    call_command("db_stats")
+
+    out = capsys.readouterr().out
+    assert "Database:" in out
+    assert "Raw documents: 0" in out
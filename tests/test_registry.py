@@ -0,0 +1,36 @@
+from parsers.pipeline import run_full_scan
+from parsers.registry import ParserRegistry, registry
+from core.models import ExtractedItem
+
+
+def test_registry_matches_folder_and_pattern():
+    reg = ParserRegistry()
+    reg.register("form", "forms", "*.html", lambda raw: {})
+    reg.register("note", "forms", ("*.txt", "*.md"), lambda raw: {})
+
+    assert reg.match("forms", "a.html").source_type == "form"
+    assert reg.match("forms", "a.md").source_type == "note"
+    assert reg.match("forms", ".hidden.html") is None
+    assert reg.match("emails", "a.html") is None
+    assert reg.folders() == ["forms"]
+
+
+def test_new_document_type_is_scanned_and_timed(db, dummy_data, monkeypatch):
+    (dummy_data / "notes").mkdir()
+    (dummy_data / "notes" / "n1.txt").write_text("hello")
+    (dummy_data / "forms" / "f1.html").write_text('<input name="full_name" value="Test User">')
+
+    monkeypatch.setattr(registry, "_specs", dict(registry._specs))
+    monkeypatch.setattr(registry, "_stats", {})
+
+    @registry.register("note", "notes", "*.txt")
+    def parse_note(raw):
+        return {"text": raw}
+
+    assert run_full_scan() == (2, 0)
+    assert ExtractedItem.objects.get(source_type="note").data == {"text": "hello"}
+
+    stats = registry.stats()
+    assert stats["note"]["calls"] == 1
+    assert stats["form"]["calls"] == 1
+    assert stats["form"]["seconds"] > 0
@@ -0,0 +1,74 @@
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import ExtractedItem, ScanJob
+from parsers import pipeline
+from parsers.jobs import run_scan_job
+
+
+def _make_dummy_data(dummy_data):
+    (dummy_data / "forms" / "form1.html").write_text('<input name="full_name" value="Test User">')
+
+
+def test_scan_returns_job_and_reports_progress(client, db, settings, dummy_data):
+    _make_dummy_data(dummy_data)
+    settings.SCAN_JOBS_IN_BACKGROUND = False
+
+    resp = client.post(reverse("scan"), HTTP_ACCEPT="application/json")
+    assert resp.status_code == 202
+    job_id = resp.json()["job_id"]
+
+    status = client.get(reverse("scan_status", args=[job_id])).json()
+    assert status["status"] == "done"
+    assert status["files_seen"] == 1
+    assert status["parsed"] == 1
+    assert status["failed"] == 0
+    assert ExtractedItem.objects.count() == 1
+
+
+def test_scan_not_started_while_another_is_running(client, db, settings):
+    running = ScanJob.objects.create(status="running", started_at=timezone.now())
+
+    resp = client.post(reverse("scan"), HTTP_ACCEPT="application/json")
+
+    assert resp.status_code == 409
+    assert resp.json()["job_id"] == running.id
+    assert ScanJob.objects.count() == 1
+
+
+def test_stale_running_job_does_not_block_new_scan(client, db, settings, dummy_data):
+    _make_dummy_data(dummy_data)
+    settings.SCAN_JOBS_IN_BACKGROUND = False
+
+    stale = ScanJob.objects.create(status="running")
+    ScanJob.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - timezone.timedelta(hours=1))
+
+    resp = client.post(reverse("scan"))
+    assert resp.status_code == 302
+
+    stale.refresh_from_db()
+    assert stale.status == "failed"
+    assert ScanJob.objects.filter(status="done").count() == 1
+
+
+def test_scan_job_heartbeats_while_files_are_hashed(db, settings, dummy_data, monkeypatch):
+    for n in range(3):
+        (dummy_data / "forms" / f"form{n}.html").write_text(f'<input name="full_name" value="User {n}">')
+    settings.SCAN_HEARTBEAT_FILES = 1
+    job = ScanJob.objects.create()
+    long_ago = timezone.now() - timezone.timedelta(hours=1)
+    seen = []
+    hash_file = pipeline._hash_file
+
+    def slow_hash(path):
+        # Every file "takes an hour" unless the job reported in before it
+        seen.append(ScanJob.objects.get(pk=job.pk).updated_at)
+        ScanJob.objects.filter(pk=job.pk).update(updated_at=long_ago)
+        return hash_file(path)
+
+    monkeypatch.setattr(pipeline, "_hash_file", slow_hash)
+    run_scan_job(job.pk)
+
+    assert len(seen) == 3
+    assert all(updated_at > long_ago for updated_at in seen)
+    assert ScanJob.objects.get(pk=job.pk).status == "done"
@@ -0,0 +1,107 @@
+from django.urls import reverse
+
+from core.models import ExtractedItem, RawDocument
+from core.utils.search import match_expression, normalize, search
+
+EMAIL = """From: Ελένη Παπαδοπούλου <eleni@example.gr>
+Subject: Προσφορά για νέο έργο
+Content-Type: text/plain; charset="utf-8"
+
+Καλησπέρα, καλέστε με στο 6944-123456 για λεπτομέρειες.
+"""
+
+INVOICE = """<html><head><style>.customer { color: #333; }</style></head>
+<body><h1>Τιμολόγιο TF-2024-007</h1><p class="customer">Computer World SA</p></body></html>"""
+
+
+def item(source_type, data, raw, status="pending", source_file="doc"):
+    created = ExtractedItem.objects.create(source_type=source_type, source_file=source_file, data=data, status=status)
+    RawDocument.objects.create(item=created, content=raw)
+    return created
+
+
+def test_normalize_strips_greek_accents_and_case():
+    assert normalize("Τιμολόγιο ΕΛΈΝΗ Ψυχή") == "τιμολογιο ελενη ψυχη"
+
+
+def test_match_expression_quotes_every_word():
+    assert match_expression('Computer "World" OR') == '"computer"* "world"* "or"*'
+    assert match_expression(" -*() ") == ""
+
+
+def test_search_data_values_and_raw_text(db):
+    invoice = item("invoice", {"customer": "Computer World SA", "total": "€1,054.00"}, INVOICE, source_file="inv.html")
+    email = item("email", {"name": "Ελένη Παπαδοπούλου"}, EMAIL, source_file="mail.eml")
+
+    assert search("computer world") == [invoice.id]
+    assert search("ελενη") == [email.id]              # data value, without accents
+    assert search("6944-123456") == [email.id]        # only in the raw email body
+    assert search("τιμολογιο TF-2024-007") == [invoice.id]  # only in the raw HTML text
+    assert search("color") == []                      # CSS is not indexed
+    assert search("inv") == [invoice.id]              # file name, by prefix
+
+
+def test_data_matches_rank_above_raw_matches(db):
+    in_raw = item("email", {"name": "Someone"}, "Subject: x\n\nCall Computer World today")
+    in_data = item("invoice", {"customer": "Computer World SA"}, "<p>nothing</p>")
+
+    assert search("computer world") == [in_data.id, in_raw.id]
+
+
+def test_search_filters_by_status(db):
+    pending = item("invoice", {"customer": "Computer World SA"}, INVOICE)
+    approved = item("invoice", {"customer": "Computer World SA"}, INVOICE, status="approved")
+
+    assert search("computer", status="approved") == [approved.id]
+    assert set(search("computer")) == {pending.id, approved.id}
+
+
+def test_index_follows_edits_and_deletes(client, db):
+    invoice = item("invoice", {"customer": "Computer World SA"}, INVOICE)
+
+    client.post(reverse("detail", args=[invoice.id]), {"customer": "Δέλτα ΑΕ", "action": "save"})
+    assert search("δελτα") == [invoice.id]
+    assert search("world") == [invoice.id]  # still in the raw document
+
+    ExtractedItem.objects.filter(pk=invoice.pk).update(data={"customer": "Omega"})
+    assert search("omega") == [invoice.id]
+    assert search("δελτα") == []
+
+    ExtractedItem.objects.filter(pk=invoice.pk).delete()
+    assert search("omega") == []
+
+
+def test_dashboard_search_box(client, db):
+    item("invoice", {"customer": "Computer World SA"}, INVOICE, source_file="world.html")
+    item("invoice", {"customer": "Alpha"}, "<p>Alpha</p>", source_file="alpha.html")
+
+    resp = client.get(reverse("dashboard"), {"q": "computer world"})
+
+    assert b"world.html" in resp.content
+    assert b"alpha.html" not in resp.content
+    assert "1 result for “computer world”" in resp.content.decode()
+
+
+def test_dashboard_search_form_keeps_relevance_order(client, db):
+    strong = item("invoice", {"customer": "Computer World SA"}, "<p>nothing</p>", status="approved", source_file="strong.html")
+    weak = item("email", {"name": "Someone"}, "Subject: x\n\nCall Computer World today", source_file="weak.eml")  # newer
+
+    # Exactly what the form sends from the default (pending) tab
+    form = {"tab": "pending", "q": "computer world", "min_total": "", "max_total": "",
+            "date_from": "", "date_to": "", "sort": ""}
+    resp = client.get(reverse("dashboard"), form)
+
+    assert [row.id for row in resp.context["items"]] == [strong.id, weak.id]
+    assert resp.context["current_status"] == "all"
+
+    newest = client.get(reverse("dashboard"), {**form, "sort": "newest"})
+    assert [row.id for row in newest.context["items"]] == [weak.id, strong.id]
+
+
+def test_dashboard_filter_form_keeps_the_tab(client, db):
+    approved = item("invoice", {"customer": "A", "total": "€50.00"}, "<p>a</p>", status="approved", source_file="a.html")
+    item("invoice", {"customer": "B", "total": "€50.00"}, "<p>b</p>", source_file="b.html")
+
+    resp = client.get(reverse("dashboard"), {"tab": "approved", "q": "", "min_total": "10", "sort": ""})
+
+    assert [row.id for row in resp.context["items"]] == [approved.id]
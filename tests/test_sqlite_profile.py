@@ -0,0 +1,53 @@
+import runpy
+from pathlib import Path
+
+from django.conf import settings
+from django.db.utils import ConnectionHandler
+
+
+def open_with_profile(path, profile):
+    handler = ConnectionHandler({
+        "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": str(path), **settings.SQLITE_PROFILES[profile]},
+    })
+    return handler["default"]
+
+
+def pragma(connection, name):
+    with connection.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def test_production_profile_sets_pragmas_on_connect(tmp_path, django_db_blocker):
+    connection = open_with_profile(tmp_path / "db.sqlite3", "production")
+    with django_db_blocker.unblock():
+        try:
+            assert pragma(connection, "journal_mode") == "wal"
+            assert pragma(connection, "synchronous") == 1  # NORMAL
+            assert pragma(connection, "busy_timeout") == 20000
+            assert pragma(connection, "cache_size") == -20000
+            assert connection.transaction_mode == "IMMEDIATE"
+            assert connection.settings_dict["CONN_MAX_AGE"] == 600
+        finally:
+            connection.close()
+
+
+def test_default_profile_is_stock_sqlite(tmp_path, django_db_blocker):
+    connection = open_with_profile(tmp_path / "db.sqlite3", "default")
+    with django_db_blocker.unblock():
+        try:
+            assert pragma(connection, "journal_mode") == "delete"
+            assert connection.transaction_mode is None
+            assert connection.settings_dict["CONN_MAX_AGE"] == 0
+        finally:
+            connection.close()
+
+
+def test_asgi_closes_connections_per_request(monkeypatch):
+    path = Path(__file__).resolve().parent.parent / "automation_project" / "settings.py"
+
+    monkeypatch.setenv("SERVER_INTERFACE", "asgi")
+    assert runpy.run_path(str(path))["DATABASES"]["default"]["CONN_MAX_AGE"] == 0
+
+    monkeypatch.setenv("SERVER_INTERFACE", "wsgi")
+    assert runpy.run_path(str(path))["DATABASES"]["default"]["CONN_MAX_AGE"] == 600
@@ -0,0 +1,65 @@
+import os
+
+from django.core.management import call_command
+
+from core.models import ExtractedItem
+from parsers.watcher import DirectoryWatcher
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_watcher_batches_files_that_arrive_together(dummy_data):
+    clock = FakeClock()
+    watcher = DirectoryWatcher(dummy_data, settle=2.0, clock=clock)
+
+    assert watcher.poll() == []
+
+    (dummy_data / "emails" / "a.eml").write_text("Name: A")
+    clock.now = 1.0
+    assert watcher.poll() == []
+
+    (dummy_data / "invoices" / "b.html").write_text("<html></html>")
+    (dummy_data / "invoices" / "ignored.txt").write_text("not an invoice")
+    clock.now = 2.0
+    assert watcher.poll() == []  # still inside the settle window
+
+    clock.now = 4.5
+    assert watcher.poll() == ["emails/a.eml", "invoices/b.html"]
+
+    clock.now = 10.0
+    assert watcher.poll() == []
+
+
+def test_watcher_waits_for_files_still_being_written(dummy_data):
+    clock = FakeClock()
+    watcher = DirectoryWatcher(dummy_data, settle=2.0, full_every=1000, clock=clock)
+    watcher.poll()
+
+    growing = dummy_data / "emails" / "big.eml"
+    growing.write_text("Name: A")
+    clock.now = 1.0
+    watcher.poll()
+
+    # Appending does not touch the folder mtime, but pending files are re-stat'ed
+    with growing.open("a") as f:
+        f.write("\nEmail: a@example.com")
+    os.utime(growing, ns=(1, 1))
+    clock.now = 3.5
+    assert watcher.poll() == []
+
+    clock.now = 6.0
+    assert watcher.poll() == ["emails/big.eml"]
+
+
+def test_watch_command_ingests_pending_files(db, dummy_data):
+    (dummy_data / "forms" / "form1.html").write_text('<input name="full_name" value="Test User">')
+
+    call_command("watch_dummy_data", "--once", "--settle=0", "--interval=0")
+
+    assert ExtractedItem.objects.get().data["full name"] == "Test User"